@@ -0,0 +1,564 @@
+# src/cli.py
+"""
+Единая точка входа: python main.py <команда> [параметры]
+
+Команды:
+    roster    наряд на один день
+    simulate  моделирование месяца с сохранением в data/results
+    sandbox   проверка графиков на первых днях месяца; --depot/--run — матрица смен депо
+    view      просмотр сохраненных результатов
+    etl       инкрементальный ETL (src/pipeline.py)
+    montecarlo  случайные больничные и оценка резерва (src/montecarlo.py)
+    continuous  непрерывное моделирование периода с точками сохранения (src/continuous.py)
+    diff      сравнение двух прогонов моделирования (src/run_diff.py)
+    export    выгрузка нарядов в Excel (src/export_roster.py)
+    coverage  прогноз покрытия смен без запуска планировщика (src/coverage.py)
+    timeline  хронология водителя: табель, закрепление и смены по результатам (src/timeline.py)
+    validate  проверка исходных файлов: все ошибки с файлом, строкой и днем (src/validation.py)
+    dispatch  наряд на день и оперативные события: больничный, снятие вагона (src/dispatcher.py)
+    batch     много заданий из файла в одном процессе
+
+Тяжелые модули (pydantic, pandas, openpyxl) импортируются только внутри
+команд, которым они нужны, поэтому 'view' и '--help' запускаются быстро.
+
+В режиме batch каждая строка файла — команда с теми же параметрами, например:
+    roster --route 47 --day 3
+    simulate --route 9 --month Март
+Данные загружаются один раз на папку и переиспользуются всеми заданиями.
+"""
+import argparse
+import os
+import shlex
+import sys
+import time
+from typing import Dict, List, Optional
+
+from src.metrics import METRICS, configure_logging, get_logger
+
+logger = get_logger("cli")
+
+# Значения по умолчанию для наряда на день (как в прежнем main.py)
+ROSTER_ROUTE = "47"
+ROSTER_DAY = 1
+ROSTER_MONTH = "Январь"
+ROSTER_YEAR = 2026
+
+
+class Session:
+    """Кэш загруженных данных по папкам: в batch-режиме DataLoader создается один раз."""
+
+    def __init__(self):
+        self._loaders: Dict[str, object] = {}
+
+    def db(self, data_folder: str):
+        db = self._loaders.get(data_folder)
+        if db is None:
+            from src.database import DataLoader
+            db = DataLoader(data_folder)
+            db.load_all()
+            self._loaders[data_folder] = db
+        return db
+
+
+# ================= КОМАНДЫ =================
+
+def cmd_roster(args, session: Session):
+    from src.scheduler import WorkforceAnalyzer
+    from src.core.view_result import print_day
+
+    db = session.db(args.data)
+    analyzer = WorkforceAnalyzer(db)
+
+    print(f"\n--- ГЕНЕРАЦИЯ НАРЯДА: {args.day} {args.month} {args.year} ---")
+    result = analyzer.generate_daily_roster(
+        route_number=args.route,
+        day_of_month=args.day,
+        target_month=args.month,
+        target_year=args.year,
+        mode=args.mode
+    )
+    print_day(result, str(args.day), args.month, args.year)
+    return result.ok
+
+
+def cmd_simulate(args, session: Session):
+    from src.core import run_simulation
+    from src.scheduler import WorkforceAnalyzer
+    from src.workload import print_workload
+
+    route = args.route or run_simulation.ROUTE
+    month = args.month or run_simulation.MONTH
+    year = args.year or run_simulation.YEAR
+
+    print(f"--- ЗАПУСК МОДЕЛИРОВАНИЯ: {month} {year}, Маршрут {route} ---")
+    db = session.db(args.data)
+    analyzer = WorkforceAnalyzer(db)
+    results = run_simulation.simulate_month(db, route, month, year, mode=args.mode, analyzer=analyzer)
+    run_simulation.save_results(results, args.output or run_simulation.output_path(route, month, year, args.data))
+    if args.workload:
+        print_workload(analyzer.workload)
+    return True
+
+
+def cmd_sandbox(args, session: Session):
+    from src.core import debug_sandbox
+
+    if args.run or args.depot:
+        return _sandbox_matrix(args, session)
+    debug_sandbox.run_sandbox(
+        session.db(args.data),
+        route=args.route or debug_sandbox.ROUTE,
+        month=args.month or debug_sandbox.MONTH,
+        year=args.year or debug_sandbox.YEAR,
+        test_days=args.days or debug_sandbox.TEST_DAYS,
+        drivers_to_show=args.show or debug_sandbox.DRIVERS_TO_SHOW,
+        mode=args.mode or debug_sandbox.MODE,
+    )
+    return True
+
+
+def _sandbox_matrix(args, session: Session):
+    from src.core import debug_sandbox
+    from src.roster_matrix import build_matrix, render
+
+    fmt = args.format
+    output = args.output
+    if fmt != "text" and not output:
+        output = os.path.join(args.data, "results", f"matrix.{fmt}")
+    limit = None if args.show == 0 else (args.show or debug_sandbox.TEXT_LIMIT)
+
+    started = time.perf_counter()
+    if args.run:
+        from src.run_diff import iter_run
+        try:
+            matrix = build_matrix(iter_run(args.run), db=session.db(args.data)).order_by_route()
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return False
+        render(matrix, fmt, output, limit=limit, title=f"Матрица смен: {args.run}")
+    else:
+        debug_sandbox.run_depot(
+            session.db(args.data),
+            month=args.month or debug_sandbox.MONTH,
+            year=args.year or debug_sandbox.YEAR,
+            mode=args.mode or debug_sandbox.MODE,
+            routes=[args.route] if args.route else None,
+            fmt=fmt, output=output, limit=limit,
+        )
+    print(f"✅ Матрица за {time.perf_counter() - started:.1f} с")
+    return True
+
+
+def cmd_view(args, session: Session):
+    from src.core import view_result
+
+    route = args.route or view_result.ROUTE
+    month = args.month or view_result.MONTH
+    year = args.year or view_result.YEAR
+    path = args.file or view_result.input_path(route, month, year, args.data)
+    view_result.main(route, month, year, day=args.day, path=path)
+    return True
+
+
+def cmd_etl(args, session: Session):
+    from src.pipeline import run_pipeline
+
+    status = run_pipeline(force=args.force, dry_run=args.dry_run, data_dir=args.data)
+    return "ошибка" not in status.values()
+
+
+def cmd_montecarlo(args, session: Session):
+    from src.montecarlo import AbsenceModel, print_summary, run_montecarlo, save_summary
+
+    if args.runs < 1:
+        print(f"❌ Число прогонов должно быть не меньше 1, получено {args.runs}")
+        return False
+    model = AbsenceModel(probability=args.prob, mean_duration=args.duration)
+    summary = run_montecarlo(args.month, args.year, routes=args.routes, runs=args.runs, model=model,
+                             seed=args.seed, data_folder=args.data, mode=args.mode, max_workers=args.workers)
+    print_summary(summary)
+    if args.output:
+        save_summary(summary, args.output)
+    return True
+
+
+def cmd_coverage(args, session: Session):
+    from datetime import date
+    from src.coverage import build_coverage, print_summary
+
+    start = date.fromisoformat(args.start) if args.start else date(args.year, 1, 1)
+    end = date.fromisoformat(args.end) if args.end else date(args.year, 12, 31)
+    if start > end:
+        print(f"❌ Начало периода {start} позже конца {end}")
+        return False
+
+    db = session.db(args.data)
+    started = time.perf_counter()
+    forecast = build_coverage(db, start, end, routes=args.routes)
+    elapsed = time.perf_counter() - started
+
+    print_summary(forecast, top=args.top)
+    print(f"\nРасчет: {elapsed * 1000:.0f} мс")
+    if args.output:
+        forecast.to_csv(args.output)
+        print(f"Результаты сохранены: {args.output}")
+    return True
+
+
+def cmd_continuous(args, session: Session):
+    from datetime import date
+    from src.continuous import ContinuousSimulator
+
+    start = date.fromisoformat(args.start)
+    end = date.fromisoformat(args.end)
+    output_dir = args.output or os.path.join(args.data, "results", f"continuous_{args.start}_{args.end}")
+
+    sim = ContinuousSimulator(session.db(args.data), args.routes, start, end, output_dir,
+                              mode=args.mode, checkpoint_every=args.every)
+    try:
+        stats = sim.run(fresh=args.fresh)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+    print(f"\n✅ Готово: {stats['days']} дн., незакрытых смен {stats['unfilled']}, "
+          f"недоотдых {stats['warnings']} (на стыке месяцев {stats['month_boundary_warnings']})")
+    print(f"Результаты: {sim.results_path}")
+    return True
+
+
+def cmd_diff(args, session: Session):
+    from src.run_diff import KIND_TITLES, diff_summary, format_change
+
+    try:
+        counts, shown = diff_summary(args.old, args.new, output=args.output, limit=args.limit)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return False
+
+    print(f"\n--- СРАВНЕНИЕ: {args.old} → {args.new} ---")
+    for change in shown:
+        print(f"  {format_change(change)}")
+    if sum(counts.values()) > len(shown):
+        print(f"  ... и еще {sum(counts.values()) - len(shown)}")
+
+    print("\nИтого:")
+    if not counts:
+        print("  ✅ Прогоны совпадают")
+    for kind, n in counts.most_common():
+        print(f"  {KIND_TITLES.get(kind, kind)}: {n}")
+    if args.output:
+        print(f"Все изменения: {args.output}")
+    return True
+
+
+def cmd_export(args, session: Session):
+    from src.export_roster import export_rosters
+
+    default = "naryad.xlsx" if args.layout == "day" else "naryad"
+    output = args.output or os.path.join(args.data, "results", "export", default)
+
+    started = time.perf_counter()
+    try:
+        written = export_rosters(args.source, output, layout=args.layout)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return False
+    for path in written:
+        print(f"Создан {path}")
+    print(f"✅ Выгрузка за {time.perf_counter() - started:.1f} с")
+    return True
+
+
+def cmd_timeline(args, session: Session):
+    from datetime import date
+    from src.timeline import TimelineIndex, print_timeline
+
+    try:
+        date_from = date.fromisoformat(args.date_from) if args.date_from else None
+        date_to = date.fromisoformat(args.date_to) if args.date_to else None
+    except ValueError as e:
+        print(f"❌ Дата ожидается в формате ГГГГ-ММ-ДД: {e}")
+        return False
+
+    db = session.db(args.data)
+    started = time.perf_counter()
+    try:
+        index = TimelineIndex(db, run=args.run)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return False
+    built = time.perf_counter() - started
+
+    first, last = index.run_days
+    start = date_from or (date.fromordinal(first) if first else date(ROSTER_YEAR, 1, 1))
+    end = date_to or (date.fromordinal(last) if last else date(start.year, 12, 31))
+    if start > end:
+        print(f"❌ Начало периода {start} позже конца {end}")
+        return False
+
+    started = time.perf_counter()
+    days = index.timeline(args.driver, start, end)
+    summary = index.summary(args.driver, start, end)
+    lookup = time.perf_counter() - started
+
+    print_timeline(days, args.driver)
+    print(f"\nПо табелю смен: {summary['planned_shifts']}, фактически: {summary['actual_shifts']} "
+          f"(из резерва {summary['reserve_shifts']}, предупреждений {summary['warnings']}), "
+          f"маршруты: {', '.join(summary['routes']) or '-'}")
+    print(f"⏱ Индекс: {built * 1000:.0f} мс, запрос: {lookup * 1000:.1f} мс")
+    return True
+
+
+def cmd_validate(args, session: Session):
+    from src.validation import print_report, validate_folder
+
+    started = time.perf_counter()
+    report = validate_folder(args.data)
+    elapsed = time.perf_counter() - started
+    print_report(report, limit=args.limit)
+    print(f"\n⏱ Проверка: {elapsed * 1000:.0f} мс")
+    if args.csv:
+        report.to_csv(args.csv)
+        print(f"💾 Все проблемы: {args.csv}")
+    return report.ok and not (args.strict and report.warnings)
+
+
+def cmd_dispatch(args, session: Session):
+    from src.scheduler import WorkforceAnalyzer
+    from src.dispatcher import Dispatcher, print_event
+    from src.core.view_result import print_day
+
+    # Событие в командной строке: вид:значение, например sick:123, withdraw:5, add:99
+    keys = {"sick": "driver", "available": "driver", "withdraw": "tram", "add": "tram"}
+    events = []
+    for raw in args.event:
+        kind, _, value = raw.partition(":")
+        if kind not in keys or not value:
+            print(f"❌ Непонятное событие '{raw}' (ожидается {', '.join(k + ':...' for k in keys)})")
+            return False
+        events.append({"type": kind, keys[kind]: value})
+
+    db = session.db(args.data)
+    try:
+        dispatcher = Dispatcher(WorkforceAnalyzer(db), args.route, args.day, args.month, args.year,
+                                mode=args.mode, log_path=args.event_log)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+
+    print(f"\n--- НАРЯД: {args.day} {args.month} {args.year}, маршрут {args.route} ---")
+    print(f"Пустых смен: {len(dispatcher.open_shifts())}")
+    ok = True
+    for event in events:
+        try:
+            print_event(dispatcher.apply(event))
+        except (KeyError, ValueError) as e:
+            print(f"❌ {event}: {e}")
+            ok = False
+    print_day(dispatcher.result, str(args.day), args.month, args.year)
+    return ok
+
+
+def cmd_batch(args, session: Session):
+    parser = build_parser()
+    with open(args.file, "r", encoding="utf-8") as f:
+        lines = [(n, line.strip()) for n, line in enumerate(f, 1)]
+    jobs = [(n, line) for n, line in lines if line and not line.startswith("#")]
+
+    print(f"📦 Заданий в {args.file}: {len(jobs)}")
+    failed = 0
+    started = time.perf_counter()
+
+    for n, line in jobs:
+        print(f"\n▶ [{n}] {line}")
+        job_started = time.perf_counter()
+        try:
+            job_args = parser.parse_args(["--data", args.data] + shlex.split(line))
+            if job_args.command in (None, "batch"):
+                commands = "/".join(c for c in sorted(COMMANDS) if c != "batch")
+                raise ValueError(f"ожидается команда {commands}")
+            ok = COMMANDS[job_args.command](job_args, session)
+        except SystemExit:
+            # argparse уже напечатал причину
+            ok = False
+        except Exception as e:
+            logger.error(f"❌ Задание {n}: {e}")
+            ok = False
+
+        if not ok:
+            failed += 1
+        METRICS.observe("cli.batch_job", time.perf_counter() - job_started, {"command": line.split()[0]})
+
+    elapsed = time.perf_counter() - started
+    print(f"\n📦 Готово: {len(jobs) - failed} из {len(jobs)} за {elapsed:.1f} с")
+    return failed == 0
+
+
+COMMANDS = {
+    "roster": cmd_roster,
+    "simulate": cmd_simulate,
+    "sandbox": cmd_sandbox,
+    "view": cmd_view,
+    "etl": cmd_etl,
+    "montecarlo": cmd_montecarlo,
+    "coverage": cmd_coverage,
+    "timeline": cmd_timeline,
+    "validate": cmd_validate,
+    "dispatch": cmd_dispatch,
+    "continuous": cmd_continuous,
+    "diff": cmd_diff,
+    "export": cmd_export,
+    "batch": cmd_batch,
+}
+
+
+# ================= ПАРАМЕТРЫ =================
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="main.py", description="Моделирование нарядов трамвайного депо")
+    parser.add_argument("--data", default="data", help="папка с данными (по умолчанию data)")
+    parser.add_argument("--log-level", default="INFO")
+    parser.add_argument("--log-format", choices=["text", "json"], default="text")
+    parser.add_argument("--metrics", choices=["json", "prom"], help="собрать метрики и вывести в конце")
+    parser.add_argument("--profile", choices=["sample", "cprofile"],
+                        help="профилировать команду (src/profiling.py): стеки, этапы, память")
+    parser.add_argument("--profile-dir", default=os.path.join("data", "results", "profile"),
+                        help="куда писать отчеты профилирования")
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("roster", help="наряд на один день")
+    p.add_argument("--route", default=ROSTER_ROUTE)
+    p.add_argument("--day", type=int, default=ROSTER_DAY)
+    p.add_argument("--month", default=ROSTER_MONTH)
+    p.add_argument("--year", type=int, default=ROSTER_YEAR)
+    p.add_argument("--mode", choices=["real", "strict"], default="real")
+
+    # Для остальных команд None — взять настройки из соответствующего скрипта
+    p = sub.add_parser("simulate", help="моделирование месяца")
+    p.add_argument("--route")
+    p.add_argument("--month")
+    p.add_argument("--year", type=int)
+    p.add_argument("--mode", choices=["real", "strict"], default="real")
+    p.add_argument("--output", help="файл результата (по умолчанию data/results/...)")
+    p.add_argument("--workload", action="store_true", help="показать нагрузку по маршруту и водителям")
+
+    p = sub.add_parser("sandbox", help="проверка графиков на первых днях месяца")
+    p.add_argument("--route")
+    p.add_argument("--month")
+    p.add_argument("--year", type=int)
+    p.add_argument("--days", type=int, help="сколько дней считать")
+    p.add_argument("--show", type=int, help="сколько водителей показать (для матрицы 0 — всех)")
+    p.add_argument("--mode", choices=["real", "strict"])
+    p.add_argument("--depot", action="store_true", help="весь месяц по всем маршрутам: матрица смен депо")
+    p.add_argument("--run", help="матрица по готовому прогону: simulation_*.json, results.jsonl или папка")
+    p.add_argument("--format", choices=["text", "csv", "html"], default="text")
+    p.add_argument("--output", help="файл матрицы (для csv/html по умолчанию data/results/matrix.*)")
+
+    p = sub.add_parser("view", help="просмотр результатов моделирования")
+    p.add_argument("--route")
+    p.add_argument("--month")
+    p.add_argument("--year", type=int)
+    p.add_argument("--day", help="показать один день (без него — интерактивно)")
+    p.add_argument("--file", help="файл результата вместо data/results/...")
+
+    p = sub.add_parser("etl", help="инкрементальный ETL")
+    p.add_argument("--force", action="store_true", help="перезапустить все этапы")
+    p.add_argument("--dry-run", action="store_true", help="только показать, что будет запущено")
+
+    p = sub.add_parser("montecarlo", help="случайные больничные и оценка резерва")
+    p.add_argument("--month", default=ROSTER_MONTH)
+    p.add_argument("--year", type=int, default=ROSTER_YEAR)
+    p.add_argument("--routes", nargs="+", help="маршруты (по умолчанию все из расписания)")
+    p.add_argument("--runs", type=int, default=1000)
+    p.add_argument("--prob", type=float, default=0.02, help="вероятность начала отсутствия в день")
+    p.add_argument("--duration", type=float, default=3.0, help="средняя длительность отсутствия, дней")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--workers", type=int, help="процессов (по умолчанию по числу ядер)")
+    p.add_argument("--mode", choices=["real", "strict"], default="real")
+    p.add_argument("--output", help="сохранить сводку в JSON")
+
+    p = sub.add_parser("coverage", help="прогноз покрытия смен по расписанию и табелям")
+    p.add_argument("--year", type=int, default=ROSTER_YEAR)
+    p.add_argument("--start", help="начало периода YYYY-MM-DD (по умолчанию 1 января)")
+    p.add_argument("--end", help="конец периода YYYY-MM-DD (по умолчанию 31 декабря)")
+    p.add_argument("--routes", nargs="+")
+    p.add_argument("--top", type=int, default=20, help="сколько дефицитов показать")
+    p.add_argument("--output", help="сохранить таблицу в CSV")
+
+    p = sub.add_parser("timeline", help="хронология водителя за период")
+    p.add_argument("driver", type=int, help="табельный номер")
+    p.add_argument("--from", dest="date_from", help="ГГГГ-ММ-ДД (по умолчанию начало прогона или года)")
+    p.add_argument("--to", dest="date_to", help="ГГГГ-ММ-ДД (по умолчанию конец прогона или года)")
+    p.add_argument("--run", help="результаты: simulation_*.json, results.jsonl или папка")
+
+    p = sub.add_parser("validate", help="проверка исходных данных")
+    p.add_argument("--csv", help="сохранить все проблемы в CSV")
+    p.add_argument("--limit", type=int, default=30, help="сколько проблем показать")
+    p.add_argument("--strict", action="store_true", help="предупреждения тоже считаются ошибкой")
+
+    p = sub.add_parser("dispatch", help="наряд на день с оперативными событиями")
+    p.add_argument("--route", default=ROSTER_ROUTE)
+    p.add_argument("--day", type=int, default=ROSTER_DAY)
+    p.add_argument("--month", default=ROSTER_MONTH)
+    p.add_argument("--year", type=int, default=ROSTER_YEAR)
+    p.add_argument("--mode", choices=["real", "strict"], default="real")
+    p.add_argument("--event", action="append", default=[],
+                   help="sick:<водитель>, available:<водитель>, withdraw:<вагон>, add:<вагон>; можно несколько")
+    p.add_argument("--event-log", help="дописывать журнал событий в JSONL")
+
+    p = sub.add_parser("continuous", help="непрерывное моделирование периода с точками сохранения")
+    p.add_argument("--start", default=f"{ROSTER_YEAR}-01-01")
+    p.add_argument("--end", default=f"{ROSTER_YEAR}-12-31")
+    p.add_argument("--routes", nargs="+", default=[ROSTER_ROUTE])
+    p.add_argument("--mode", choices=["real", "strict"], default="real")
+    p.add_argument("--every", type=int, default=7, help="точка сохранения каждые N дней")
+    p.add_argument("--output", help="папка результатов (по умолчанию data/results/continuous_...)")
+    p.add_argument("--fresh", action="store_true", help="начать заново, удалив точку сохранения")
+
+    p = sub.add_parser("diff", help="сравнение двух прогонов моделирования")
+    p.add_argument("old", help="файл simulation_*.json, results.jsonl или папка")
+    p.add_argument("new")
+    p.add_argument("--limit", type=int, default=30, help="сколько изменений показать")
+    p.add_argument("--output", help="записать все изменения в JSONL")
+
+    p = sub.add_parser("export", help="выгрузка нарядов в Excel")
+    p.add_argument("source", help="файл simulation_*.json, results.jsonl или папка")
+    p.add_argument("--layout", choices=["day", "route"], default="day",
+                   help="day — книга с листом на день, route — книга на маршрут")
+    p.add_argument("--output", help="файл (day) или папка (route), по умолчанию data/results/export")
+
+    p = sub.add_parser("batch", help="задания из файла (по одной команде в строке)")
+    p.add_argument("file")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = build_parser()
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = parser.parse_args(argv)
+    if args.command is None:
+        # Без команды — наряд на день, как раньше делал main.py
+        args = parser.parse_args(argv + ["roster"])
+
+    configure_logging(args.log_level, args.log_format)
+    if args.metrics:
+        METRICS.enable()
+
+    if args.profile:
+        from src.profiling import profile_run
+        with profile_run(args.command, args.profile, args.profile_dir):
+            ok = COMMANDS[args.command](args, Session())
+    else:
+        ok = COMMANDS[args.command](args, Session())
+
+    if args.metrics == "json":
+        print(METRICS.to_json())
+    elif args.metrics == "prom":
+        print(METRICS.to_prometheus(), end="")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# src/continuous.py
+"""
+Непрерывное моделирование по дням через границы месяцев.
+
+В отличие от run_simulation (месяц с пустой историей), здесь один
+WorkforceAnalyzer идет по всему периоду, и история отдыха переходит
+из месяца в месяц — недоотдых "ночь 31-го → утро 1-го" становится виден.
+Маршруты одного дня считаются одним анализатором: водитель резерва,
+занятый на одном маршруте, получит предупреждение на другом.
+
+Результаты дописываются в results.jsonl (строка на маршрут-день),
+раз в checkpoint_every дней состояние (история + следующая дата +
+длина results.jsonl) атомарно сохраняется в checkpoint.json.
+Повторный запуск с теми же параметрами продолжает с последней точки,
+а дни после нее, успевшие попасть в results.jsonl, отбрасываются.
+
+Запуск: python main.py continuous --start 2026-01-01 --end 2026-12-31 --routes 47 9
+"""
+import json
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from src.db.assignment_registry import atomic_write_json
+from src.metrics import METRICS, get_logger
+from src.models import DayRoster, roster_json
+from src.utils import MONTH_MAP
+
+logger = get_logger("continuous")
+
+MONTH_NAMES = {num: name for name, num in MONTH_MAP.items()}
+CHECKPOINT_VERSION = 1
+CHECKPOINT_EVERY = 7  # дней
+
+
+def iter_days(start: date, end: date) -> Iterator[date]:
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def dump_history(history: dict) -> dict:
+    return {
+        driver_id: {"end_dt": rec["end_dt"].isoformat(), "duration": rec["duration"]}
+        for driver_id, rec in history.items()
+    }
+
+
+def restore_history(data: dict) -> dict:
+    return {
+        driver_id: {"end_dt": datetime.fromisoformat(rec["end_dt"]), "duration": rec["duration"]}
+        for driver_id, rec in data.items()
+    }
+
+
+class ContinuousSimulator:
+    def __init__(self, db, routes: List[str], start: date, end: date, output_dir: str,
+                 mode: str = "real", checkpoint_every: int = CHECKPOINT_EVERY):
+        self.db = db
+        self.routes = [str(r) for r in routes]
+        self.start = start
+        self.end = end
+        self.mode = mode
+        self.checkpoint_every = checkpoint_every
+        self.output_dir = Path(output_dir)
+        self.results_path = self.output_dir / "results.jsonl"
+        self.checkpoint_path = self.output_dir / "checkpoint.json"
+
+    def _params(self) -> dict:
+        return {
+            "routes": self.routes,
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "mode": self.mode,
+        }
+
+    # ================= ТОЧКИ СОХРАНЕНИЯ =================
+
+    def load_checkpoint(self) -> Optional[dict]:
+        if not self.checkpoint_path.exists():
+            return None
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Несовместимая версия {self.checkpoint_path}")
+        if data.get("params") != self._params():
+            raise ValueError(
+                f"{self.checkpoint_path} создан с другими параметрами: {data.get('params')}. "
+                f"Начните заново (fresh=True, в CLI --fresh) или укажите другую папку."
+            )
+        return data
+
+    def save_checkpoint(self, next_day: date, history: dict, results_offset: int, stats: dict):
+        atomic_write_json(self.checkpoint_path, {
+            "version": CHECKPOINT_VERSION,
+            "params": self._params(),
+            "next_date": next_day.isoformat(),
+            "results_offset": results_offset,
+            "history": dump_history(history),
+            "stats": stats,
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    # ================= ЗАПУСК =================
+
+    def run(self, fresh: bool = False) -> dict:
+        """Моделирует период (или его остаток после точки сохранения). Возвращает итоговую статистику."""
+        from src.scheduler import WorkforceAnalyzer
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if fresh:
+            for path in (self.checkpoint_path, self.results_path):
+                if path.exists():
+                    os.remove(path)
+
+        analyzer = WorkforceAnalyzer(self.db)
+        stats = {"days": 0, "unfilled": 0, "warnings": 0, "month_boundary_warnings": 0, "errors": 0}
+        start = self.start
+        offset = 0
+
+        checkpoint = self.load_checkpoint()
+        if checkpoint is not None:
+            analyzer.load_history(restore_history(checkpoint["history"]))
+            stats = checkpoint["stats"]
+            start = date.fromisoformat(checkpoint["next_date"])
+            offset = checkpoint["results_offset"]
+            logger.info(f"▶ Продолжение с {start} (точка сохранения {checkpoint['saved_at']})")
+
+        # Дни после точки сохранения пересчитываются заново
+        with open(self.results_path, "a+b") as f:
+            f.truncate(offset)
+
+        since_checkpoint = 0
+        # Бинарный режим: tell() дает точное смещение в байтах для точки сохранения
+        with open(self.results_path, "ab") as out:
+            for day in iter_days(start, self.end):
+                month = MONTH_NAMES[day.month]
+                for route in self.routes:
+                    result = analyzer.generate_daily_roster(route, day.day, month, day.year, mode=self.mode)
+                    self._count(result, day, stats)
+                    with METRICS.span("continuous.write"):
+                        line = json.dumps({"date": day.isoformat(), "route": route, "result": result},
+                                          ensure_ascii=False, default=roster_json)
+                        out.write(line.encode("utf-8") + b"\n")
+                stats["days"] += 1
+                since_checkpoint += 1
+
+                if since_checkpoint >= self.checkpoint_every or day == self.end:
+                    out.flush()
+                    os.fsync(out.fileno())
+                    self.save_checkpoint(day + timedelta(days=1), analyzer.history, out.tell(), stats)
+                    since_checkpoint = 0
+                    logger.info(f"💾 {day}: сохранено ({stats['days']} дн.)")
+
+        return stats
+
+    @staticmethod
+    def _count(result: DayRoster, day: date, stats: dict):
+        if not result.ok:
+            stats["errors"] += 1
+            return
+        stats["unfilled"] += result.unfilled_count()
+        warns = result.warnings_count()
+        stats["warnings"] += warns
+        if day.day == 1:
+            stats["month_boundary_warnings"] += warns
+
+
+def read_results(output_dir: str) -> Iterator[Dict]:
+    """Построчное чтение results.jsonl без загрузки файла целиком."""
+    with open(Path(output_dir) / "results.jsonl", "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -1,14 +1,22 @@
 import sys
 import os
 
-# Настройка путей
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(os.path.dirname(current_dir))
-sys.path.insert(0, project_root)
-os.chdir(project_root)
+# Настройка путей (только при запуске файлом; при импорте как src.core.debug_sandbox не нужна)
+if __name__ == "__main__":
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(os.path.dirname(current_dir))
+    sys.path.insert(0, project_root)
+    os.chdir(project_root)
+
+import calendar
+from datetime import date
+from typing import List, Optional
 
 from src.database import DataLoader
 from src.scheduler import WorkforceAnalyzer
+from src.metrics import configure_logging
+from src.roster_matrix import TEXT_LIMIT, build_matrix, month_records, render
+from src.utils import MONTH_MAP
 
 # === НАСТРОЙКИ ТЕСТА ===
 ROUTE = "47"
@@ -19,56 +27,69 @@ DRIVERS_TO_SHOW = 15
 MODE = "strict"  # 'real' или 'strict'
 
 
-def main():
-    print(f"=== SANDBOX TEST ({MODE.upper()}) ===")
-
-    db = DataLoader()
-    db.load_all()
+def run_sandbox(db, route: str = ROUTE, month: str = MONTH, year: int = YEAR,
+                test_days: int = TEST_DAYS, drivers_to_show: int = DRIVERS_TO_SHOW, mode: str = MODE):
+    print(f"=== SANDBOX TEST ({mode.upper()}) ===")
 
-    all_drivers = [d for d in db.drivers if str(d.assigned_route_number) == str(ROUTE) and d.month == MONTH]
+    all_drivers = [d for d in db.drivers if str(d.assigned_route_number) == str(route) and d.month == month]
     if not all_drivers:
         print("Водители не найдены!")
         return
 
-    display_ids = [str(d.id) for d in all_drivers[:DRIVERS_TO_SHOW]]
+    display_ids = [d.id for d in all_drivers[:drivers_to_show]]
 
     # Инициализация (история пустая)
     analyzer = WorkforceAnalyzer(db)
 
-    # Таблица результатов
-    results = {did: {} for did in display_ids}
-
     print("Запуск симуляции по дням...")
-    for day in range(1, TEST_DAYS + 1):
-        res = analyzer.generate_daily_roster(ROUTE, day, MONTH, YEAR, mode=MODE)
-
-        if "roster" in res:
-            for tram in res["roster"]:
-                for shift_key in ["shift_1", "shift_2"]:
-                    shift_data = tram.get(shift_key)
-                    if shift_data and shift_data.get("driver"):
-                        did = shift_data["driver"].split(" ")[0]
-                        if did in display_ids:
-                            val = "1" if shift_key == "shift_1" else "2"
-                            if shift_data.get("warnings"):
-                                val += "!"
-                            results[did][day] = val
-
-    # Вывод
+    results = {
+        str(day): analyzer.generate_daily_roster(route, day, month, year, mode=mode)
+        for day in range(1, test_days + 1)
+    }
+
+    month_num = MONTH_MAP[month]
+    # С db в матрице есть все водители табеля, в том числе без смен; порядок строк — как в табеле
+    matrix = build_matrix(month_records(results, route, month, year), db=db,
+                          start=date(year, month_num, 1), end=date(year, month_num, test_days))
+    shown = matrix.select(display_ids)
     print("\n" + "=" * 60)
-    print(f"{'ID':<6} |", end="")
-    for d in range(1, TEST_DAYS + 1): print(f" {d:<3}|", end="")
-    print("\n" + "-" * 60)
-
-    for did in display_ids:
-        print(f"{did:<6} |", end="")
-        for day in range(1, TEST_DAYS + 1):
-            val = results[did].get(day, ".")
-            print(f" {val:<3}|", end="")
-        print("")
+    print(shown.to_text(limit=None))
     print("=" * 60)
-    print("Легенда: '.' - пусто, '1'/'2' - смена, '!' - нарушение отдыха")
+
+
+def run_depot(db, month: str = MONTH, year: int = YEAR, mode: str = MODE, routes: Optional[List[str]] = None,
+              fmt: str = "text", output: Optional[str] = None, limit: Optional[int] = TEXT_LIMIT):
+    """Весь месяц по всем маршрутам одним анализатором и матрица смен всего депо (src/roster_matrix.py)."""
+    if routes is None:
+        routes = sorted({str(s.route_number) for s in db.schedules}, key=lambda r: (len(r), r))
+    month_num = MONTH_MAP[month]
+    days_in_month = calendar.monthrange(year, month_num)[1]
+    print(f"=== МАТРИЦА ДЕПО: {month} {year}, маршруты {', '.join(routes)} ({mode.upper()}) ===")
+
+    analyzer = WorkforceAnalyzer(db)
+    records = []
+    # Дни по порядку, маршруты внутри дня — как в непрерывном моделировании
+    for day in range(1, days_in_month + 1):
+        print(f"Расчет дня: {day}/{days_in_month}...", end="\r")
+        for route in routes:
+            records.append((date(year, month_num, day).isoformat(), route,
+                            analyzer.generate_daily_roster(route, day, month, year, mode=mode)))
+    print()
+
+    matrix = build_matrix(records, db=db, start=date(year, month_num, 1),
+                          end=date(year, month_num, days_in_month)).order_by_route()
+    render(matrix, fmt, output, limit=limit, title=f"Матрица смен: {month} {year}")
+    return matrix
+
+
+def main():
+    configure_logging()
+
+    db = DataLoader()
+    db.load_all()
+
+    run_sandbox(db)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -5,64 +5,81 @@ import calendar
 from src.database import DataLoader
 # ВАЖНО: Проверь этот импорт. Он должен указывать туда, где лежит твой class WorkforceAnalyzer
 from src.scheduler import WorkforceAnalyzer
+from src.metrics import METRICS, configure_logging
+from src.models import DayRoster, roster_json
+from src.utils import MONTH_MAP
 
 # === НАСТРОЙКИ ===
 ROUTE = "47"
 MONTH = "Февраль"
 YEAR = 2026
-OUTPUT_FILE = f"data/results/simulation_{ROUTE}_{MONTH}_{YEAR}.json"
 
 
-def main():
-    print(f"--- ЗАПУСК МОДЕЛИРОВАНИЯ: {MONTH} {YEAR}, Маршрут {ROUTE} ---")
+def output_path(route: str, month: str, year: int, data_folder: str = "data") -> str:
+    return os.path.join(data_folder, "results", f"simulation_{route}_{month}_{year}.json")
 
-    # 1. Загрузка данных
-    try:
-        db = DataLoader()
-        db.load_all()
-    except Exception as e:
-        print(f"❌ Ошибка загрузки данных: {e}")
-        return
 
-    analyzer = WorkforceAnalyzer(db)
+def simulate_month(db, route: str, month: str, year: int, mode: str = "real", analyzer=None) -> dict:
+    """
+    Наряды на все дни месяца для одного маршрута: { "1": DayRoster, ... }
+    Можно передать свой analyzer, чтобы потом взять из него сводку нагрузки (analyzer.workload).
+    """
+    analyzer = analyzer or WorkforceAnalyzer(db)
 
-    # Карта месяцев
-    month_map = {
-        "Январь": 1, "Февраль": 2, "Март": 3, "Апрель": 4, "Май": 5, "Июнь": 6,
-        "Июль": 7, "Август": 8, "Сентябрь": 9, "Октябрь": 10, "Ноябрь": 11, "Декабрь": 12
-    }
-    month_num = month_map.get(MONTH, 2)
-    _, days_in_month = calendar.monthrange(YEAR, month_num)
+    month_num = MONTH_MAP.get(month, 2)
+    _, days_in_month = calendar.monthrange(year, month_num)
 
     full_month_results = {}
 
-    # 2. Цикл по дням
     for day in range(1, days_in_month + 1):
         print(f"Расчет дня: {day}/{days_in_month}...", end="\r")
 
         try:
             day_result = analyzer.generate_daily_roster(
-                route_number=ROUTE,
+                route_number=route,
                 day_of_month=day,
-                target_month=MONTH,
-                target_year=YEAR
+                target_month=month,
+                target_year=year,
+                mode=mode
             )
             full_month_results[str(day)] = day_result
         except Exception as e:
             print(f"\n❌ Ошибка при расчете дня {day}: {e}")
-            full_month_results[str(day)] = {"error": str(e)}
+            full_month_results[str(day)] = DayRoster.failed(str(e), day, route)
 
     print(f"\n✅ Готово! Расчет завершен.")
+    return full_month_results
+
+
+def save_results(results: dict, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with METRICS.span("simulate.save"), open(path, "w", encoding="utf-8") as f:
+        # Наряды превращаются в словари только здесь (roster_json), даты/время — в строки
+        json.dump(results, f, ensure_ascii=False, indent=2, default=roster_json)
+
+    print(f"Результаты сохранены: {path}")
 
-    # 3. Сохранение
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        # default=str нужен, чтобы даты/время превратились в строки, если они есть
-        json.dump(full_month_results, f, ensure_ascii=False, indent=2, default=str)
+def main(route: str = ROUTE, month: str = MONTH, year: int = YEAR, output_file: str = None, db=None):
+    configure_logging()
+    print(f"--- ЗАПУСК МОДЕЛИРОВАНИЯ: {month} {year}, Маршрут {route} ---")
 
-    print(f"Результаты сохранены: {OUTPUT_FILE}")
+    # 1. Загрузка данных (можно передать уже загруженную базу)
+    if db is None:
+        try:
+            db = DataLoader()
+            db.load_all()
+        except Exception as e:
+            print(f"❌ Ошибка загрузки данных: {e}")
+            return
+
+    # 2. Цикл по дням
+    results = simulate_month(db, route, month, year)
+
+    # 3. Сохранение
+    save_results(results, output_file or output_path(route, month, year))
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
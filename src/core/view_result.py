@@ -2,45 +2,86 @@ import json
 import os
 import sys
 
+# Настройка путей (только при запуске файлом; при импорте как src.core.view_result не нужна)
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.models import DayRoster
+
 # === НАСТРОЙКИ ===
 ROUTE = "9"
 MONTH = "Февраль"
 YEAR = 2026
-# Путь с учетом вашей структуры папок
-INPUT_FILE = f"data/results/simulation_{ROUTE}_{MONTH}_{YEAR}.json"
 
 
-def get_driver_name(tram_data, shift_num):
-    """
-    Универсальная функция для получения водителя.
-    Поддерживает и старую структуру (shift_1_driver), и новую (shift_1 -> driver).
-    """
-    # 1. Пробуем старый формат (плоский)
-    key_flat = f"shift_{shift_num}_driver"
-    if key_flat in tram_data:
-        return tram_data[key_flat]
+def input_path(route: str, month: str, year: int, data_folder: str = "data") -> str:
+    return os.path.join(data_folder, "results", f"simulation_{route}_{month}_{year}.json")
+
+
+def print_day(result, day_label: str, month: str, year: int):
+    """Печать наряда одного дня: DayRoster или словарь из файла результатов."""
+    if isinstance(result, dict):
+        # Старый плоский формат (shift_1_driver) разбирается там же
+        result = DayRoster.from_dict(result)
+
+    # Проверка на ошибки генерации
+    if not result.ok:
+        print(f"⛔ ОШИБКА В РАСЧЕТЕ ДНЯ: {result.error}")
+        return
+
+    # === ВЫВОД ===
+    print("\n" + "=" * 60)
+    print(f"📄 РЕЗУЛЬТАТ: Маршрут №{result.route or 'Unknown'}")
+    print(f"📅 Дата: {day_label} {month} {year}")
+
+    # Доп. инфо, если есть (в старых файлах нет)
+    if result.day_name:
+        print(f"🗓  День: {result.day_name} ({result.day_type or ''})")
+    print("=" * 60 + "\n")
 
-    # 2. Пробуем новый формат (вложенный)
-    key_nested = f"shift_{shift_num}"
-    if key_nested in tram_data and isinstance(tram_data[key_nested], dict):
-        return tram_data[key_nested].get("driver")
+    if not result.trams:
+        print("⚠️ Список нарядов пуст.")
 
-    return None
+    for tram in result.trams:
+        print(f"Вагон {tram.tram_number if tram.tram_number is not None else '???'}:")
+        print(f"  🌞 Утро : {tram.shift_1.driver or '❌ ПУСТО'}")
+        print(f"  🌜 Вечер: {tram.shift_2.driver or '❌ ПУСТО'}")
 
+        # Вывод проблем (issues)
+        for issue in tram.issues:
+            print(f"     ⚠️ {issue}")
+
+        # Вывод предупреждений по сменам
+        for w in tram.shift_1.warnings: print(f"     ⚠️ (Утро) {w}")
+        for w in tram.shift_2.warnings: print(f"     ⚠️ (Вечер) {w}")
+
+    print("-" * 30)
+    print(f"Резерв: {len(result.leftover)} чел.")
+
+
+def main(route: str = ROUTE, month: str = MONTH, year: int = YEAR, day: str = None, path: str = None):
+    """Без day — интерактивный просмотр, с day — печать одного дня."""
+    input_file = path or input_path(route, month, year)
 
-def main():
     # Проверка наличия файла
-    if not os.path.exists(INPUT_FILE):
-        print(f"❌ Файл {INPUT_FILE} не найден.")
+    if not os.path.exists(input_file):
+        print(f"❌ Файл {input_file} не найден.")
         print(f"Убедитесь, что вы запустили run_month.py и путь к файлу верный.")
         return
 
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
+    with open(input_file, "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    print(f"--- ПРОСМОТР РЕЗУЛЬТАТОВ: {MONTH} {YEAR} ---")
+    print(f"--- ПРОСМОТР РЕЗУЛЬТАТОВ: {month} {year} ---")
     print(f"Всего дней в файле: {len(data)}")
 
+    if day is not None:
+        if str(day) not in data:
+            print(f"❌ Нет данных за день '{day}'.")
+            return
+        print_day(data[str(day)], str(day), month, year)
+        return
+
     while True:
         print("\nВведите день для просмотра (или 'q' для выхода):")
         user_input = input("> ").strip()
@@ -52,61 +93,8 @@ def main():
             print(f"❌ Нет данных за день '{user_input}'. Доступные дни: {list(data.keys())[:5]}...")
             continue
 
-        result = data[user_input]
-
-        # Проверка на ошибки генерации
-        if "error" in result:
-            print(f"⛔ ОШИБКА В РАСЧЕТЕ ДНЯ: {result['error']}")
-            continue
-
-        # === ВЫВОД ===
-        print("\n" + "=" * 60)
-        route_num = result.get('route', 'Unknown')
-        print(f"📄 РЕЗУЛЬТАТ: Маршрут №{route_num}")
-        print(f"📅 Дата: {user_input} {MONTH} {YEAR}")
-
-        # Доп. инфо, если есть
-        if 'day_name' in result:
-            print(f"🗓  День: {result['day_name']} ({result.get('day_type', '')})")
-        print("=" * 60 + "\n")
-
-        roster = result.get("roster", [])
-        if not roster:
-            print("⚠️ Список нарядов пуст.")
-
-        for tram in roster:
-            # Используем универсальную функцию
-            u_driver = get_driver_name(tram, 1) or '❌ ПУСТО'
-            v_driver = get_driver_name(tram, 2) or '❌ ПУСТО'
-
-            t_num = tram.get('tram_number', '???')
-            print(f"Вагон {t_num}:")
-            print(f"  🌞 Утро : {u_driver}")
-            print(f"  🌜 Вечер: {v_driver}")
-
-            # Вывод проблем (issues)
-            issues = tram.get('issues', [])
-            if issues:
-                for issue in issues:
-                    print(f"     ⚠️ {issue}")
-
-            # Вывод предупреждений (warnings из новой структуры), если они есть
-            if 'shift_1' in tram and isinstance(tram['shift_1'], dict):
-                warns = tram['shift_1'].get('warnings', [])
-                for w in warns: print(f"     ⚠️ (Утро) {w}")
-
-            if 'shift_2' in tram and isinstance(tram['shift_2'], dict):
-                warns = tram['shift_2'].get('warnings', [])
-                for w in warns: print(f"     ⚠️ (Вечер) {w}")
-
-        print("-" * 30)
-        # Статистика резерва (поддержка разных ключей)
-        if 'drivers_leftover' in result:
-            leftover = result['drivers_leftover']
-            print(f"Резерв: {len(leftover)} чел.")
-        elif 'stats' in result and 'leftover' in result['stats']:
-            print(f"Резерв: {result['stats']['leftover']} чел.")
+        print_day(data[user_input], user_input, month, year)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
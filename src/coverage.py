@@ -0,0 +1,221 @@
+# src/coverage.py
+"""
+Аналитический прогноз покрытия без запуска планировщика.
+
+Спрос — число вагонов со сменой 1/2 в расписании маршрута для типа дня
+(рабочий/выходной), предложение — число водителей маршрута с кодом "1"/"2"
+в табеле на эту дату. Резерв "ANY" считается отдельно по (дата, смена).
+
+Табели один раз переводятся в матрицы кодов (водители × дни), дальше
+весь год считается матричными операциями numpy:
+
+    forecast = build_coverage(db, date(2026, 1, 1), date(2026, 12, 31))
+    forecast.surplus            # (маршруты × даты × 2), < 0 — дефицит
+    forecast.deficits()         # список дефицитов с учетом/без учета резерва
+"""
+import calendar
+import csv
+import os
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.models import DAY_VALUES, Driver
+from src.utils import MONTH_MAP
+
+RESERVE_ROUTE = "ANY"
+DAY_TYPES = ("рабочий", "выходной")
+SHIFT_CODES = ("1", "2")
+
+
+class CoverageForecast:
+    def __init__(self, dates: np.ndarray, routes: List[str], demand: np.ndarray,
+                 supply: np.ndarray, reserve: np.ndarray, missing: np.ndarray):
+        self.dates = dates          # datetime64[D], (T,)
+        self.routes = routes        # (R,)
+        self.demand = demand        # (R, T, 2) — нужно смен
+        self.supply = supply        # (R, T, 2) — водителей маршрута с этим кодом
+        self.reserve = reserve      # (T, 2) — водителей резерва с этим кодом
+        self.missing = missing      # (R, T) — нет расписания на этот тип дня
+
+    @property
+    def surplus(self) -> np.ndarray:
+        return self.supply - self.demand
+
+    def net_with_reserve(self) -> np.ndarray:
+        """(T, 2): резерв минус суммарный дефицит всех маршрутов; < 0 — не хватает даже с резервом."""
+        shortage = np.clip(-self.surplus, 0, None).sum(axis=0)
+        return self.reserve - shortage
+
+    def deficits(self, include_reserve: bool = False) -> List[dict]:
+        """
+        Дефициты по (маршрут, дата, смена). include_reserve=True оставляет только
+        даты/смены, где резерва не хватает, чтобы закрыть дефициты всех маршрутов.
+        """
+        mask = self.surplus < 0
+        if include_reserve:
+            mask &= (self.net_with_reserve() < 0)[None, :, :]
+        result = []
+        for r, t, s in zip(*np.nonzero(mask)):
+            result.append({
+                "route": self.routes[r],
+                "date": str(self.dates[t]),
+                "shift": s + 1,
+                "demand": int(self.demand[r, t, s]),
+                "supply": int(self.supply[r, t, s]),
+                "deficit": int(-self.surplus[r, t, s]),
+                "reserve": int(self.reserve[t, s]),
+            })
+        return result
+
+    def monthly_summary(self) -> Dict[str, Dict[str, dict]]:
+        """{ маршрут: { 'ГГГГ-ММ': {'deficit_days': ..., 'worst': ...} } } — для быстрого обзора."""
+        months = self.dates.astype("datetime64[M]")
+        short = np.clip(-self.surplus, 0, None).max(axis=2)     # (R, T)
+        summary = {}
+        for m in np.unique(months):
+            cols = months == m
+            for r, route in enumerate(self.routes):
+                row = short[r, cols]
+                summary.setdefault(route, {})[str(m)] = {
+                    "deficit_days": int((row > 0).sum()),
+                    "worst": int(row.max()) if len(row) else 0,
+                }
+        return summary
+
+    def to_csv(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        net = self.net_with_reserve()
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["route", "date", "shift", "demand", "supply", "surplus", "reserve", "net_with_reserve"])
+            for r, route in enumerate(self.routes):
+                for t, day in enumerate(self.dates):
+                    for s in range(2):
+                        writer.writerow([route, str(day), s + 1, self.demand[r, t, s], self.supply[r, t, s],
+                                         self.supply[r, t, s] - self.demand[r, t, s], self.reserve[t, s], net[t, s]])
+
+
+# ================= ПОСТРОЕНИЕ =================
+
+def _weekday(dates: np.ndarray) -> np.ndarray:
+    # 1970-01-01 — четверг (3)
+    return (dates.astype("int64") + 3) % 7
+
+
+def _days_between(a: np.datetime64, b: np.datetime64) -> int:
+    return int((b - a).astype("int64"))
+
+
+def _demand_table(schedules, routes: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """(R, 2 типа дня, 2 смены) вагонов и (R, 2) наличие расписания; как в анализаторе — первое совпадение."""
+    table = np.zeros((len(routes), len(DAY_TYPES), 2), dtype=np.int32)
+    found = np.zeros((len(routes), len(DAY_TYPES)), dtype=bool)
+    index = {r: i for i, r in enumerate(routes)}
+    for s in schedules:
+        r = index.get(str(s.route_number))
+        day_type = s.day_type.lower()
+        if r is None or day_type not in DAY_TYPES:
+            continue
+        k = DAY_TYPES.index(day_type)
+        if found[r, k]:
+            continue
+        found[r, k] = True
+        table[r, k, 0] = sum(1 for t in s.trams if t.shift_1)
+        table[r, k, 1] = sum(1 for t in s.trams if t.shift_2)
+    return table, found
+
+
+def tabel_matrix(drivers, days: int) -> np.ndarray:
+    """Коды табеля (водители × дни): 0 — нет смены, 1/2 — смена."""
+    # Таблица перевода байтовых кодов Driver.codes в 0/1/2
+    lut = np.zeros(256, dtype=np.int8)
+    for code, value in enumerate(DAY_VALUES):
+        if value in SHIFT_CODES:
+            lut[code] = 1 if value == "1" else 2
+
+    codes = np.zeros((len(drivers), days), dtype=np.int8)
+    for i, d in enumerate(drivers):
+        if type(d) is Driver:
+            raw = np.frombuffer(d.codes[:days], dtype=np.uint8)
+            codes[i, :len(raw)] = lut[raw]
+            continue
+        # Обертки сценариев — через iter_days (с учетом правок)
+        for day, value in d.iter_days():
+            if 1 <= day <= days and value in SHIFT_CODES:
+                codes[i, day - 1] = 1 if value == "1" else 2
+    return codes
+
+
+def build_coverage(db, start: date, end: date, routes: Optional[List[str]] = None) -> CoverageForecast:
+    """Прогноз на [start, end] по загруженному DataLoader (или сценарию)."""
+    if start > end:
+        raise ValueError(f"Начало периода {start} позже конца {end}")
+    dates = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    if routes is None:
+        routes = sorted({str(s.route_number) for s in db.schedules}, key=lambda r: (len(r), r))
+    route_index = {r: i for i, r in enumerate(routes)}
+    n_routes, n_dates = len(routes), len(dates)
+
+    # Спрос: тип дня по дню недели, как get_day_type_by_date
+    table, found = _demand_table(db.schedules, routes)
+    kind = (_weekday(dates) >= 5).astype(np.int64)                 # 0 — рабочий, 1 — выходной
+    demand = table[:, kind, :]                                      # (R, T, 2)
+    missing = ~found[:, kind]                                       # (R, T)
+
+    # Предложение: водители группируются по (год, месяц) табеля
+    groups: Dict[Tuple[int, int], list] = {}
+    years = range(start.year, end.year + 1)
+    for d in db.drivers:
+        month_num = MONTH_MAP.get(d.month)
+        if month_num is None:
+            continue
+        # Табель без года относится к этому месяцу любого года периода
+        for year in ([d.year] if d.year else years):
+            groups.setdefault((year, month_num), []).append(d)
+
+    supply = np.zeros((n_routes, n_dates, 2), dtype=np.int32)
+    reserve = np.zeros((n_dates, 2), dtype=np.int32)
+    first = dates[0]
+
+    for (year, month_num), drivers in groups.items():
+        month_start = np.datetime64(f"{year:04d}-{month_num:02d}", "D")
+        days = calendar.monthrange(year, month_num)[1]
+        # Пересечение месяца с периодом
+        lo = max(0, _days_between(month_start, first))
+        hi = min(days, _days_between(month_start, dates[-1]) + 1)
+        if lo >= hi:
+            continue
+
+        codes = tabel_matrix(drivers, days)[:, lo:hi]
+        t0 = _days_between(first, month_start) + lo
+
+        owner = np.array([route_index.get(str(d.assigned_route_number), -1) for d in drivers])
+        is_reserve = np.array([str(d.assigned_route_number) == RESERVE_ROUTE for d in drivers])
+
+        # one-hot (R × водители) @ маска кода (водители × дни) = водителей маршрута по дням
+        onehot = np.zeros((n_routes, len(drivers)), dtype=np.int32)
+        valid = owner >= 0
+        onehot[owner[valid], np.nonzero(valid)[0]] = 1
+        for s in range(2):
+            mask = (codes == s + 1).astype(np.int32)
+            supply[:, t0:t0 + hi - lo, s] += onehot @ mask
+            reserve[t0:t0 + hi - lo, s] += mask[is_reserve].sum(axis=0)
+
+    return CoverageForecast(dates, routes, demand, supply, reserve, missing)
+
+
+def print_summary(forecast: CoverageForecast, top: int = 20):
+    print(f"\n--- ПРОГНОЗ ПОКРЫТИЯ: {forecast.dates[0]} — {forecast.dates[-1]} ---")
+    print(f"{'Маршрут':<10} {'Дней с дефицитом':>17} {'Макс. дефицит':>14} {'Без расписания':>15}")
+    short = np.clip(-forecast.surplus, 0, None).max(axis=2)
+    for r, route in enumerate(forecast.routes):
+        print(f"{route:<10} {int((short[r] > 0).sum()):>17} {int(short[r].max()):>14} "
+              f"{int(forecast.missing[r].sum()):>15}")
+
+    uncovered = forecast.deficits(include_reserve=True)
+    print(f"\nДефицитов, которые не закрывает резерв: {len(uncovered)}")
+    for item in uncovered[:top]:
+        print(f"  ⚠️ {item['date']} маршрут {item['route']}, смена {item['shift']}: "
+              f"нужно {item['demand']}, есть {item['supply']}, резерв {item['reserve']}")
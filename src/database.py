@@ -1,100 +1,206 @@
 import json
 import os
-from typing import List
-from src.models import Driver, RouteSchedule, Assignment
+from typing import Dict, List, Optional, Tuple
+from src.models import Driver, DriverProfile, DriverRecord, RouteSchedule, Assignment, encode_days
+from src.db.assignment_registry import AssignmentRegistry
+from src.metrics import METRICS, get_logger
+
+logger = get_logger("database")
+
+# (таб.№, график, режим, коды дней) — строка файла табеля до создания объектов
+DriverRow = Tuple[int, str, str, bytes]
+
+
+def read_drivers_file(filepath: str) -> Tuple[str, object, List[DriverRow]]:
+    """Читает drivers_json/<месяц>.json: (месяц, год, строки водителей)."""
+    return parse_drivers_data(read_drivers_json(filepath))
+
+
+def read_drivers_json(filepath: str):
+    with open(filepath, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_drivers_data(data) -> Tuple[str, object, List[DriverRow]]:
+    """Уже прочитанный JSON табеля → (месяц, год, строки водителей)."""
+    # Ожидаем структуру: { "month": "...", "drivers": [...] }
+    month_name = data.get("month", "Unknown")
+    year = data.get("year", "Unknown")
+    rows = [_driver_row(d) for d in data.get("drivers", [])]
+    return month_name, year, rows
+
+
+def _driver_row(record) -> DriverRow:
+    """
+    Запись водителя → строка табеля. Обычные записи разбираются напрямую; остальные
+    (таб.№ строкой вида "0009", пропущенные поля, значения не того типа) проверяет
+    DriverRecord — приводит типы или бросает ValidationError, как прежняя модель Driver.
+    """
+    if (type(record) is dict and type(record.get("tab_number")) is int
+            and type(record.get("schedule")) is str and type(record.get("mode")) is str
+            and type(record.get("days")) is list):
+        try:
+            return record["tab_number"], record["schedule"], record["mode"], encode_days(record["days"])
+        except (TypeError, KeyError):
+            pass
+
+    checked = DriverRecord.model_validate(record)
+    days = [{"day": d.day, "value": d.value} for d in checked.days_list]
+    return checked.id, checked.schedule_pattern, checked.shift_preference, encode_days(days)
+
+
+def read_schedules(path: str) -> List[RouteSchedule]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict): data = [data]
+    return [RouteSchedule(**s) for s in data]
 
 
 class DataLoader:
     def __init__(self, data_folder: str = "data"):
         self.data_folder = data_folder
         self.drivers: List[Driver] = []
+        # Один профиль на (таб.№, график, режим) для всех месяцев
+        self.profiles: Dict[Tuple[int, str, str], DriverProfile] = {}
         self.schedules: List[RouteSchedule] = []
         self.assignments: List[Assignment] = []
-
-    def load_all(self):
-        print("--- НАЧАЛО ЗАГРУЗКИ ---")
-        self._load_drivers()
-        self._load_schedules()
-        self._load_assignments()
-        self._link_drivers_to_routes()
-        print("--- ЗАГРУЗКА ЗАВЕРШЕНА ---")
-
-    def _load_drivers(self):
+        self.registry = AssignmentRegistry(os.path.join(data_folder, "assignments.json"))
+        self.validation = None  # ValidationReport, если load_all(validate=...)
+
+    def load_all(self, validate=False):
+        """
+        validate: False — без проверки; True — проверить исходные файлы (src/validation.py)
+        и записать проблемы в лог; "strict" — при ошибках не загружать (ValueError).
+        """
+        logger.info("--- НАЧАЛО ЗАГРУЗКИ ---")
+        with METRICS.span("load.total"):
+            # Табели читаются один раз: тот же JSON и проверяется, и загружается
+            with METRICS.span("load.read"):
+                files = self._read_drivers_json()
+            if validate:
+                self._validate(strict=validate == "strict", drivers=files)
+            with METRICS.span("load.drivers"):
+                self._load_drivers(files)
+            with METRICS.span("load.schedules"):
+                self._load_schedules()
+            with METRICS.span("load.assignments"):
+                self._load_assignments()
+            with METRICS.span("load.link"):
+                self._link_drivers_to_routes()
+        logger.info("--- ЗАГРУЗКА ЗАВЕРШЕНА ---")
+
+    def _validate(self, strict: bool, drivers: Optional[Dict[str, object]] = None):
+        from src.validation import ERROR, validate_folder
+
+        with METRICS.span("load.validate"):
+            self.validation = validate_folder(self.data_folder, drivers=drivers)
+        for issue in self.validation.issues:
+            log = logger.error if issue["severity"] == ERROR else logger.warning
+            log(f"{issue['file']}: {issue['message']}",
+                extra={k: issue[k] for k in ("file", "row", "day", "field") if issue[k] is not None})
+        errors = len(self.validation.errors)
+        METRICS.inc("load.validation_errors", errors)
+        if strict and errors:
+            raise ValueError(f"Проверка данных: {errors} ошибок в {self.data_folder}")
+
+    def _read_drivers_json(self) -> Optional[Dict[str, object]]:
+        """JSON табелей: {имя файла: данные}. Файлы с ошибкой чтения пропускаются (в лог)."""
         # Путь к папке с JSON-ами месяцев
         drivers_dir = os.path.join(self.data_folder, "drivers_json")
 
         # Проверяем, существует ли папка
         if not os.path.exists(drivers_dir):
-            print(f"Ошибка: Папка {drivers_dir} не найдена!")
-            return
+            logger.error(f"Ошибка: Папка {drivers_dir} не найдена!", extra={"path": drivers_dir})
+            return {}
 
-        print(f"Сканирую папку: {drivers_dir} ...")
+        logger.debug(f"Сканирую папку: {drivers_dir} ...")
 
         # Получаем список всех файлов в папке
-        files = [f for f in os.listdir(drivers_dir) if f.endswith('.json')]
+        # Служебные файлы (например, .manifest.json конвертера) пропускаем
+        files = [f for f in os.listdir(drivers_dir) if f.endswith('.json') and not f.startswith('.')]
+
+        if not files:
+            logger.warning("В папке нет JSON файлов!", extra={"path": drivers_dir})
+            return {}
 
+        data = {}
+        for filename in files:
+            try:
+                data[filename] = read_drivers_json(os.path.join(drivers_dir, filename))
+            except json.JSONDecodeError as e:
+                METRICS.inc("load.errors", labels={"file": filename})
+                logger.error(f"Ошибка JSON в файле {filename}: {e} "
+                             "(Проверь, нет ли у тебя чисел вида 0009 без кавычек?)", extra={"file": filename})
+            except Exception as e:
+                METRICS.inc("load.errors", labels={"file": filename})
+                logger.error(f"Ошибка чтения {filename}: {e}", extra={"file": filename})
+        return data
+
+    def _load_drivers(self, files: Optional[Dict[str, object]] = None):
+        """files — JSON табелей из _read_drivers_json; None — прочитать здесь."""
+        if files is None:
+            files = self._read_drivers_json()
         if not files:
-            print("В папке нет JSON файлов!")
             return
 
         self.drivers = []
+        self.profiles = {}
 
-        for filename in files:
-            filepath = os.path.join(drivers_dir, filename)
+        for filename, data in files.items():
             try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
-                    # Ожидаем структуру: { "month": "...", "drivers": [...] }
-                    month_name = data.get("month", "Unknown")
-                    year = data.get("year", "Unknown")
-                    drivers_list = data.get("drivers", [])
-
-                    # Превращаем в объекты и добавляем в общий список
-                    count = 0
-                    for d_dict in drivers_list:
-                        # ВАЖНО: обрабатываем случай, если ID написан как "0009" (строка) или 9 (число)
-                        # Pydantic сам попытается привести к int, если в модели int
-                        driver = Driver(**d_dict)
-                        driver.month = month_name  # Прописываем месяц
-                        self.drivers.append(driver)
-                        count += 1
-
-                    print(f"   📄 {filename}: Загружен {month_name} {year} ({count} вод.)")
+                month_name, year, rows = parse_drivers_data(data)
+                # Превращаем в объекты и добавляем в общий список
+                self.drivers.extend(self._make_drivers(month_name, year, rows))
+                count = len(rows)
+
+                METRICS.inc("load.files")
+                METRICS.inc("load.drivers", count)
+                logger.debug(f"   📄 {filename}: Загружен {month_name} {year} ({count} вод.)",
+                             extra={"file": filename, "month": month_name, "year": year, "drivers": count})
 
-            except json.JSONDecodeError as e:
-                print(f"Ошибка JSON в файле {filename}: {e}")
-                print("(Проверь, нет ли у тебя чисел вида 0009 без кавычек?)")
             except Exception as e:
-                print(f"Ошибка чтения {filename}: {e}")
+                METRICS.inc("load.errors", labels={"file": filename})
+                logger.error(f"Ошибка чтения {filename}: {e}", extra={"file": filename})
+
+        logger.info(f"Всего загружено водителей (сумма по всем месяцам): {len(self.drivers)}",
+                    extra={"drivers": len(self.drivers), "files": len(files)})
 
-        print(f"Всего загружено водителей (сумма по всем месяцам): {len(self.drivers)}")
+    def _make_drivers(self, month_name: str, year, rows: List[DriverRow]) -> List[Driver]:
+        year = year if isinstance(year, int) else None
+        return [Driver(self._intern_profile(driver_id, schedule, mode), codes, month_name, year)
+                for driver_id, schedule, mode, codes in rows]
+
+    def _intern_profile(self, driver_id: int, schedule: str, mode: str) -> DriverProfile:
+        key = (driver_id, schedule, mode)
+        profile = self.profiles.get(key)
+        if profile is None:
+            profile = self.profiles[key] = DriverProfile(driver_id, schedule, mode)
+        return profile
 
     def _load_schedules(self):
         path = os.path.join(self.data_folder, "schedule.json")
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, dict): data = [data]
-                self.schedules = [RouteSchedule(**s) for s in data]
-            print(f"Расписание: {len(self.schedules)} маршрутов")
+            self.schedules = read_schedules(path)
+            logger.info(f"Расписание: {len(self.schedules)} маршрутов", extra={"schedules": len(self.schedules)})
         except Exception as e:
-            print(f"Ошибка schedule.json: {e}")
+            METRICS.inc("load.errors", labels={"file": "schedule.json"})
+            logger.error(f"Ошибка schedule.json: {e}", extra={"file": "schedule.json"})
 
     def _load_assignments(self):
-        path = os.path.join(self.data_folder, "assignments.json")
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self.assignments = [Assignment(**a) for a in data]
-            print(f"Закрепления: {len(self.assignments)} связей")
-        except FileNotFoundError:
-            print("Файл assignments.json не найден (пропускаем)")
+        if not self.registry.path.exists() and not self.registry.journal_path.exists():
+            logger.warning("Файл assignments.json не найден (пропускаем)")
+            return
+        # Снимок assignments.json + журнал изменений
+        self.registry.load()
+        self.assignments = [Assignment(**a) for a in self.registry.records()]
+        logger.info(f"Закрепления: {len(self.assignments)} связей", extra={"assignments": len(self.assignments)})
 
     def _link_drivers_to_routes(self):
-        for assign in self.assignments:
-            # Ищем водителей по ID
-            target_drivers = [d for d in self.drivers if int(d.id) == int(assign.driver_id)]
-            for d in target_drivers:
+        # Закрепление по умолчанию — в профиль, помесячное — в запись месяца, только если отличается
+        for profile in self.profiles.values():
+            profile.assigned_route_number = self.registry.resolve(profile.id)
+        for d in self.drivers:
+            route = self.registry.resolve(d.id, d.month, d.year)
+            if route is not None:
                 # ВАЖНО: Присваиваем номер маршрута как СТРОКУ
-                d.assigned_route_number = str(assign.route_number)
+                d.assigned_route_number = route
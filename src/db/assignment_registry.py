@@ -0,0 +1,242 @@
+# src/db/assignment_registry.py
+"""
+Реестр закреплений водителей за маршрутами.
+
+assignments.json остается основным снимком (тот же формат списка, что и раньше),
+а все изменения дописываются в журнал assignments.journal.jsonl.
+При загрузке снимок читается и журнал проигрывается поверх него;
+периодически журнал сворачивается в новый снимок (атомарная замена файла).
+
+Закрепление может действовать всегда (без месяца) или только в конкретном
+месяце: {"driver_id": 1, "route_number": "47", "month": "Март", "year": 2026}.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from src.utils import MONTH_MAP
+
+MONTH_NAMES = {num: name for name, num in MONTH_MAP.items()}
+
+# Ключ периода: (год или None, номер месяца или None). (None, None) — закрепление по умолчанию
+PeriodKey = Tuple[Optional[int], Optional[int]]
+DEFAULT_PERIOD: PeriodKey = (None, None)
+
+
+def atomic_write_json(path: Path, data):
+    """Пишет JSON во временный файл и атомарно подменяет им исходный."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _month_num(month: Union[str, int, None]) -> Optional[int]:
+    if month is None:
+        return None
+    if isinstance(month, int):
+        return month
+    if str(month).isdigit():
+        return int(month)
+    num = MONTH_MAP.get(month)
+    if num is None:
+        raise ValueError(f"Неизвестный месяц: {month}")
+    return num
+
+
+def _period(month=None, year=None) -> PeriodKey:
+    month_num = _month_num(month)
+    if month_num is None and year is not None:
+        raise ValueError("Год закрепления задается только вместе с месяцем")
+    return (int(year) if year is not None else None, month_num)
+
+
+class AssignmentRegistry:
+    def __init__(self, path: Union[str, Path], compact_every: int = 1000):
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.stem + ".journal.jsonl")
+        self.compact_every = compact_every
+        # { driver_id: { (год, месяц): маршрут } }
+        self._index: Dict[int, Dict[PeriodKey, str]] = {}
+        self._journal_ops = 0
+        self._lock = threading.Lock()
+
+    # ================= ЗАГРУЗКА =================
+
+    def load(self) -> "AssignmentRegistry":
+        """Читает снимок и проигрывает журнал. Отсутствие снимка — пустой реестр."""
+        self._index = {}
+        self._journal_ops = 0
+
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for rec in data or []:
+                self._apply(rec)
+
+        if self.journal_path.exists():
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Оборванная последняя строка (сбой во время записи) — пропускаем
+                        continue
+                    self._apply(rec)
+                    self._journal_ops += 1
+        return self
+
+    def _apply(self, rec: dict):
+        driver_id = int(rec["driver_id"])
+        period = _period(rec.get("month"), rec.get("year"))
+        if rec.get("op") == "remove":
+            periods = self._index.get(driver_id)
+            if periods is not None:
+                periods.pop(period, None)
+                if not periods:
+                    del self._index[driver_id]
+            return
+        self._index.setdefault(driver_id, {})[period] = str(rec["route_number"])
+
+    # ================= ЧТЕНИЕ =================
+
+    def resolve(self, driver_id: int, month=None, year=None) -> Optional[str]:
+        """
+        Маршрут водителя в заданном месяце: сначала закрепление на (год, месяц),
+        затем на месяц любого года, затем закрепление по умолчанию.
+        """
+        periods = self._index.get(int(driver_id))
+        if not periods:
+            return None
+        try:
+            month_num = _month_num(month)
+        except ValueError:
+            month_num = None  # месяц не распознан ("Unknown") — только закрепление по умолчанию
+        if month_num is not None:
+            if year is not None:
+                route = periods.get((int(year), month_num))
+                if route is not None:
+                    return route
+            route = periods.get((None, month_num))
+            if route is not None:
+                return route
+        return periods.get(DEFAULT_PERIOD)
+
+    def __contains__(self, driver_id) -> bool:
+        return int(driver_id) in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def driver_ids(self) -> Iterator[int]:
+        return iter(self._index)
+
+    def read_only(self) -> "ReadOnlyRegistry":
+        """Представление только для чтения (например, для снимка данных)."""
+        return ReadOnlyRegistry(self)
+
+    def records(self) -> List[dict]:
+        """Все закрепления в формате assignments.json."""
+        result = []
+        for driver_id, periods in self._index.items():
+            for (year, month_num), route in periods.items():
+                rec = {"driver_id": driver_id, "route_number": route}
+                if month_num is not None:
+                    rec["month"] = MONTH_NAMES[month_num]
+                if year is not None:
+                    rec["year"] = year
+                result.append(rec)
+        return result
+
+    # ================= ЗАПИСЬ =================
+
+    def upsert(self, driver_id: int, route_number, month=None, year=None):
+        """Добавляет или заменяет закрепление (по умолчанию или на месяц)."""
+        rec = {"op": "upsert", "driver_id": int(driver_id), "route_number": str(route_number)}
+        self._write([self._with_period(rec, month, year)])
+
+    def remove(self, driver_id: int, month=None, year=None):
+        self._write([self._with_period({"op": "remove", "driver_id": int(driver_id)}, month, year)])
+
+    def add_if_absent(self, driver_id: int, route_number) -> bool:
+        """Закрепляет водителя, только если у него еще нет ни одного закрепления."""
+        return self.add_many_if_absent([driver_id], route_number) == 1
+
+    def add_many_if_absent(self, driver_ids, route_number) -> int:
+        """Пакетный add_if_absent: одна запись в журнал на весь пакет. Возвращает число добавленных."""
+        recs = []
+        seen = set()
+        for driver_id in driver_ids:
+            driver_id = int(driver_id)
+            if driver_id in self._index or driver_id in seen:
+                continue
+            seen.add(driver_id)
+            recs.append({"op": "upsert", "driver_id": driver_id, "route_number": str(route_number)})
+        self._write(recs)
+        return len(recs)
+
+    @staticmethod
+    def _with_period(rec: dict, month, year) -> dict:
+        _period(month, year)  # проверка до записи в журнал
+        if month is not None:
+            rec["month"] = MONTH_NAMES[_month_num(month)]
+        if year is not None:
+            rec["year"] = int(year)
+        return rec
+
+    def _write(self, recs: List[dict]):
+        if not recs:
+            return
+        with self._lock:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                for rec in recs:
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            for rec in recs:
+                self._apply(rec)
+            self._journal_ops += len(recs)
+            if self.compact_every and self._journal_ops >= self.compact_every:
+                self._compact_locked()
+
+    def compact(self):
+        """Сворачивает журнал в новый снимок assignments.json."""
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        atomic_write_json(self.path, self.records())
+        # Снимок уже содержит все операции журнала; при сбое до очистки
+        # повторное проигрывание журнала ничего не меняет
+        if self.journal_path.exists():
+            os.remove(self.journal_path)
+        self._journal_ops = 0
+
+
+class ReadOnlyRegistry(AssignmentRegistry):
+    """
+    Реестр только для чтения: индекс общий с исходным реестром (без копирования),
+    запись и перезагрузка запрещены. Исходный реестр после этого менять нельзя —
+    SnapshotStore держит его у себя и только заменяет новым.
+    """
+
+    def __init__(self, source: AssignmentRegistry):
+        super().__init__(source.path, compact_every=0)
+        self._index = source._index
+        self._journal_ops = source._journal_ops
+
+    def load(self):
+        raise TypeError("Реестр только для чтения: загрузите новый AssignmentRegistry")
+
+    def _write(self, recs: List[dict]):
+        raise TypeError("Реестр только для чтения: закрепления меняются через AssignmentRegistry")
+
+    def compact(self):
+        raise TypeError("Реестр только для чтения: сворачивать журнал нельзя")
@@ -0,0 +1,282 @@
+# src/dispatcher.py
+"""
+Оперативные изменения наряда в течение дня.
+
+Наряд строится один раз через WorkforceAnalyzer, дальше события
+(водитель заболел, вагон снят с линии, добавлен выход) меняют только
+затронутые смены: для них ищется замена среди оставшихся водителей
+маршрута и резерва той же проверкой табеля и отдыха
+(WorkforceAnalyzer.find_candidate). История отдыха и нагрузка анализатора поддерживаются
+в согласованном состоянии, каждое событие пишется в журнал.
+
+    dispatcher = Dispatcher(analyzer, "47", 3, "Январь", 2026)
+    dispatcher.driver_sick(1234)
+    dispatcher.withdraw_tram("5")
+    dispatcher.add_run("99")
+    dispatcher.result          # DayRoster, как у generate_daily_roster
+
+Запуск: python main.py dispatch --route 47 --day 3 --event sick:1234 --event withdraw:5
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from src.metrics import METRICS, get_logger
+from src.models import DayRoster, TramRoster
+from src.scheduler import SHIFT_DURATION, SHIFT_START_HOURS
+from src.utils import MONTH_MAP
+
+logger = get_logger("dispatcher")
+
+RESERVE_ROUTE = "ANY"
+
+# (номер вагона, смена "1"/"2")
+ShiftKey = Tuple[str, str]
+
+
+class Dispatcher:
+    def __init__(self, analyzer, route_number: str, day_of_month: int, target_month: str,
+                 target_year: int, mode: str = "real", log_path: Optional[str] = None):
+        self.analyzer = analyzer
+        self.route = str(route_number)
+        self.day = day_of_month
+        self.month = target_month
+        self.year = target_year
+        self.mode = mode
+        self.log_path = log_path
+        self.log: List[dict] = []
+
+        # История до наряда: при снятии водителя со смены его запись возвращается
+        self._history_before = dict(analyzer.history)
+        self.result: DayRoster = analyzer.generate_daily_roster(self.route, day_of_month, target_month,
+                                                                target_year, mode=mode)
+        if not self.result.ok:
+            raise ValueError(f"Маршрут {self.route}, {day_of_month} {target_month}: {self.result.error}")
+
+        self.date = datetime(target_year, MONTH_MAP[target_month], day_of_month)
+        # Какие смены есть в расписании, хранит сама смена (required): пустая смена без выхода — не проблема
+        self.trams: Dict[str, TramRoster] = {str(t.tram_number): t for t in self.result.trams}
+
+        # Пулы водителей — как в анализаторе, за вычетом уже назначенных
+        self.drivers = {}
+        self.main_pool, self.reserve_pool = [], []
+        for d in analyzer.db.drivers:
+            if d.month != target_month:
+                continue
+            route = str(d.assigned_route_number)
+            if route == self.route:
+                self.main_pool.append(d)
+            elif route == RESERVE_ROUTE:
+                self.reserve_pool.append(d)
+            else:
+                continue
+            self.drivers[int(d.id)] = d
+
+        self.assigned: Dict[ShiftKey, int] = {}
+        for number, tram in self.trams.items():
+            for slot in tram.shifts:
+                if slot.filled:
+                    self.assigned[(number, str(slot.number))] = slot.driver_id
+        busy = set(self.assigned.values())
+        self.main_pool = [d for d in self.main_pool if int(d.id) not in busy]
+        self.reserve_pool = [d for d in self.reserve_pool if int(d.id) not in busy]
+        self.unavailable = set()
+
+    # ================= СОБЫТИЯ =================
+
+    def driver_sick(self, driver_id) -> dict:
+        """Водитель выбыл до конца дня: его смены переходят к замене."""
+        driver_id = int(driver_id)
+        with self._event("driver_sick", driver=driver_id) as changes:
+            self.unavailable.add(driver_id)
+            self._drop_from_pool(driver_id)
+            for key in [k for k, v in self.assigned.items() if v == driver_id]:
+                self._release(key, changes)
+                self._fill(key, changes)
+        return self.log[-1]
+
+    def driver_available(self, driver_id) -> dict:
+        """Водитель снова может работать: возвращается в пул и закрывает пустые смены, если подходит."""
+        driver_id = int(driver_id)
+        with self._event("driver_available", driver=driver_id) as changes:
+            self.unavailable.discard(driver_id)
+            driver = self.drivers.get(driver_id)
+            if driver is not None and driver_id not in self.assigned.values():
+                self._return_to_pool(driver)
+            self._fill_open(changes)
+        return self.log[-1]
+
+    def withdraw_tram(self, tram_number) -> dict:
+        """Вагон снят с линии: его водители возвращаются в пул и могут закрыть пустые смены."""
+        number = str(tram_number)
+        if number not in self.trams:
+            raise KeyError(f"Вагона {number} нет в наряде маршрута {self.route}")
+        with self._event("withdraw_tram", tram=number) as changes:
+            tram = self.trams[number]
+            for slot in tram.shifts:
+                key = (number, str(slot.number))
+                if slot.required and not slot.filled:
+                    self.analyzer.workload.record_unfilled(self.route, sign=-1)
+                slot.required = False
+                if key in self.assigned:
+                    self._release(key, changes)
+            del self.trams[number]
+            self.result.trams.remove(tram)
+            self._fill_open(changes)
+        return self.log[-1]
+
+    def add_run(self, tram_number, shifts=("1", "2")) -> dict:
+        """Дополнительный выход: новые смены закрываются из оставшихся водителей."""
+        number = str(tram_number)
+        if number in self.trams:
+            raise ValueError(f"Вагон {number} уже есть в наряде маршрута {self.route}")
+        with self._event("add_run", tram=number, shifts=list(shifts)) as changes:
+            tram = TramRoster(number, "1" in shifts, "2" in shifts)
+            self.trams[number] = tram
+            self.result.trams.append(tram)
+            for slot in tram.shifts:
+                if slot.required:
+                    # Новая смена сначала считается пустой, _fill снимет отметку при назначении
+                    self.analyzer.workload.record_unfilled(self.route)
+                    self._fill((number, str(slot.number)), changes)
+        return self.log[-1]
+
+    def apply(self, event: dict) -> dict:
+        """Событие в виде словаря: {"type": "sick", "driver": 123} / {"type": "withdraw", "tram": "5"} / ..."""
+        kind = event["type"]
+        if kind in ("sick", "driver_sick"):
+            return self.driver_sick(event["driver"])
+        if kind in ("available", "driver_available"):
+            return self.driver_available(event["driver"])
+        if kind in ("withdraw", "withdraw_tram"):
+            return self.withdraw_tram(event["tram"])
+        if kind in ("add", "add_run"):
+            return self.add_run(event["tram"], tuple(str(s) for s in event.get("shifts", ("1", "2"))))
+        raise ValueError(f"Неизвестное событие: {kind}")
+
+    # ================= ЗАМЕНЫ =================
+
+    def _shift_window(self, shift: str):
+        return self.date + timedelta(hours=SHIFT_START_HOURS[shift]), SHIFT_DURATION
+
+    def _release(self, key: ShiftKey, changes: list):
+        """Снимает водителя со смены; история отдыха и нагрузка откатываются."""
+        number, shift = key
+        driver_id = self.assigned.pop(key)
+        slot = self.trams[number].shift(shift)
+        self.analyzer.workload.record(driver_id, self.route, shift, slot.duration or SHIFT_DURATION,
+                                      slot.is_reserve, len(slot.warnings), sign=-1)
+        history_key = str(driver_id)
+        if history_key in self._history_before:
+            self.analyzer.history[history_key] = self._history_before[history_key]
+        else:
+            self.analyzer.history.pop(history_key, None)
+
+        changes.append({"tram": number, "shift": shift, "old": slot.driver, "new": None})
+        slot.clear()
+        if slot.required:
+            self.analyzer.workload.record_unfilled(self.route)
+
+        driver = self.drivers.get(driver_id)
+        if driver is not None and driver_id not in self.unavailable:
+            self._return_to_pool(driver)
+
+    def _fill(self, key: ShiftKey, changes: list) -> bool:
+        number, shift = key
+        s_start, s_dur = self._shift_window(shift)
+        cand, src, warns = self.analyzer.find_candidate(
+            [self.main_pool, self.reserve_pool], self.day, shift, s_start, s_dur, self.mode
+        )
+        if cand is None:
+            METRICS.inc("dispatcher.unfilled", labels={"route": self.route, "shift": shift})
+            return False
+
+        slot = self.trams[number].shift(shift)
+        slot.assign(cand.id, src, warns, s_start, s_dur)
+        self.assigned[key] = slot.driver_id
+        self.analyzer.history[str(cand.id)] = {'end_dt': s_start + timedelta(hours=s_dur), 'duration': s_dur}
+        self.analyzer.workload.record_unfilled(self.route, sign=-1)
+        self.analyzer.workload.record(cand.id, self.route, shift, s_dur, src == "reserve", len(warns))
+        (self.main_pool if src == "main" else self.reserve_pool).remove(cand)
+
+        # Замена дописывается к последнему изменению этой смены (снятие → назначение)
+        if changes and changes[-1]["tram"] == number and changes[-1]["shift"] == shift and changes[-1]["new"] is None:
+            changes[-1]["new"] = slot.driver
+            changes[-1]["warnings"] = list(warns)
+        else:
+            changes.append({"tram": number, "shift": shift, "old": None, "new": slot.driver,
+                            "warnings": list(warns)})
+        return True
+
+    def _fill_open(self, changes: list):
+        for key in self.open_shifts():
+            self._fill(key, changes)
+
+    def open_shifts(self) -> List[ShiftKey]:
+        return [(number, str(slot.number)) for number, tram in self.trams.items()
+                for slot in tram.shifts if slot.required and not slot.filled]
+
+    def _return_to_pool(self, driver):
+        pool = self.reserve_pool if str(driver.assigned_route_number) == RESERVE_ROUTE else self.main_pool
+        if driver not in pool:
+            pool.append(driver)
+
+    def _drop_from_pool(self, driver_id: int):
+        self.main_pool = [d for d in self.main_pool if int(d.id) != driver_id]
+        self.reserve_pool = [d for d in self.reserve_pool if int(d.id) != driver_id]
+
+    # ================= ЖУРНАЛ =================
+
+    def _event(self, kind: str, **params):
+        return _EventRecord(self, kind, params)
+
+    def _write_log(self, entry: dict):
+        self.log.append(entry)
+        self.result.leftover = [d.id for d in self.main_pool] + [d.id for d in self.reserve_pool]
+        METRICS.inc("dispatcher.events", labels={"type": entry["event"]})
+        logger.debug(f"⚡ {entry['event']} {entry['params']}: изменений {len(entry['changes'])}, "
+                    f"{entry['elapsed_ms']:.2f} мс", extra={"route": self.route, "day": self.day})
+        if self.log_path:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class _EventRecord:
+    """Контекст одного события: собирает изменения и время обработки."""
+
+    def __init__(self, dispatcher: Dispatcher, kind: str, params: dict):
+        self.dispatcher = dispatcher
+        self.kind = kind
+        self.params = params
+        self.changes: List[dict] = []
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self.changes
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            return False
+        d = self.dispatcher
+        self.dispatcher._write_log({
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "route": d.route,
+            "date": d.date.date().isoformat(),
+            "event": self.kind,
+            "params": self.params,
+            "changes": self.changes,
+            "unfilled": len(d.open_shifts()),
+            "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 3),
+        })
+        return False
+
+
+def print_event(entry: dict):
+    print(f"\n⚡ {entry['event']} {entry['params']} — {entry['elapsed_ms']:.2f} мс, "
+          f"пустых смен: {entry['unfilled']}")
+    for ch in entry["changes"]:
+        warn = f" ⚠️ {'; '.join(ch['warnings'])}" if ch.get("warnings") else ""
+        print(f"   вагон {ch['tram']}, смена {ch['shift']}: {ch['old'] or 'ПУСТО'} → {ch['new'] or 'ПУСТО'}{warn}")
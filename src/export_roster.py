@@ -0,0 +1,220 @@
+# src/export_roster.py
+"""
+Выгрузка нарядов в Excel для печати и диспетчерской.
+
+Источник — любой прогон, который читает src/run_diff.iter_run:
+simulation_*.json, results.jsonl непрерывного моделирования или папка с ними.
+Дни читаются потоком и сразу пишутся в книги openpyxl в режиме write-only,
+поэтому память не растет с длиной периода и числом маршрутов. Открыта
+всегда одна книга (каждый лист write-only держит временный файл), и книга
+делится на части по MAX_SHEETS_PER_BOOK листов.
+
+Варианты:
+  layout="day"   — лист на каждый день, на листе все маршруты (naryad.xlsx);
+  layout="route" — книги на каждый маршрут (naryad_<маршрут>.xlsx), лист на день;
+                   прогон читается отдельно для каждого маршрута.
+Если листов больше MAX_SHEETS_PER_BOOK, части нумеруются: naryad_1.xlsx, naryad_2.xlsx, ...
+
+Запуск: python main.py export data/results/continuous_2026-01-01_2026-12-31 --layout route
+"""
+import os
+from datetime import date
+from typing import List, Optional
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils import get_column_letter
+
+from src.models import DayRoster, ShiftAssignment
+from src.utils import WEEKDAY_NAMES
+
+# Листов в одной книге: у каждого листа write-only открыт временный файл до save()
+MAX_SHEETS_PER_BOOK = 200
+
+COLUMNS = ["Маршрут", "Вагон", "Утро", "Рез.", "Вечер", "Рез.", "Проблемы", "Предупреждения"]
+COLUMN_WIDTHS = [10, 8, 14, 6, 14, 6, 28, 48]
+
+TITLE_FONT = Font(bold=True, size=14)
+_THIN = Side(style='thin')
+CELL_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+HEADER_FONT = Font(bold=True)
+CENTER = Alignment(horizontal='center')
+WRAP = Alignment(wrap_text=True, vertical='top')
+EMPTY_FILL = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")    # смена не закрыта
+WARNING_FILL = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")  # недоотдых
+RESERVE_FILL = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")  # водитель резерва
+
+# Именованные стили книги: {имя: атрибуты NamedStyle}; шрифт по умолчанию — как у книги
+TITLE = "naryad_title"
+HEADER = "naryad_header"
+PLAIN = "naryad_plain"
+CENTERED = "naryad_center"
+EMPTY = "naryad_empty"
+WARNING = "naryad_warning"
+RESERVE = "naryad_reserve"
+TEXT = "naryad_text"
+STYLES = {
+    TITLE: dict(font=TITLE_FONT),
+    HEADER: dict(font=HEADER_FONT, alignment=CENTER, border=CELL_BORDER),
+    PLAIN: dict(font=DEFAULT_FONT, border=CELL_BORDER),
+    CENTERED: dict(font=DEFAULT_FONT, alignment=CENTER, border=CELL_BORDER),
+    EMPTY: dict(font=DEFAULT_FONT, alignment=CENTER, fill=EMPTY_FILL, border=CELL_BORDER),
+    WARNING: dict(font=DEFAULT_FONT, alignment=CENTER, fill=WARNING_FILL, border=CELL_BORDER),
+    RESERVE: dict(font=DEFAULT_FONT, alignment=CENTER, fill=RESERVE_FILL, border=CELL_BORDER),
+    TEXT: dict(font=DEFAULT_FONT, alignment=WRAP, border=CELL_BORDER),
+}
+
+
+class _BookWriter:
+    """
+    Книга нарядов, которая пишется частями: не больше MAX_SHEETS_PER_BOOK листов,
+    открыта только текущая часть. Первая часть называется path; если понадобилась
+    вторая, части переименовываются в <имя>_1.xlsx, <имя>_2.xlsx, ...
+    """
+
+    def __init__(self, path: str, max_sheets: int = MAX_SHEETS_PER_BOOK):
+        self.path = path
+        self.max_sheets = max_sheets
+        self.written: List[str] = []
+        self.wb: Optional[Workbook] = None
+        self.sheets = 0
+
+    def _part_path(self, n: int) -> str:
+        stem, ext = os.path.splitext(self.path)
+        return f"{stem}_{n}{ext}"
+
+    def _open(self):
+        self.wb = Workbook(write_only=True)
+        for name, attrs in STYLES.items():
+            self.wb.add_named_style(NamedStyle(name=name, **attrs))
+        self.sheets = 0
+
+    def sheet(self, title: str):
+        if self.wb is not None and self.sheets >= self.max_sheets:
+            self._save()
+        if self.wb is None:
+            self._open()
+        self.sheets += 1
+        return self.wb.create_sheet(title)
+
+    def _save(self):
+        n = len(self.written) + 1
+        if n == 2:
+            # Книга делится на части: первая получает номер
+            first = self._part_path(1)
+            os.replace(self.written[0], first)
+            self.written[0] = first
+        path = self.path if n == 1 else self._part_path(n)
+        self.wb.save(path)
+        self.written.append(path)
+        self.wb = None
+
+    def close(self) -> List[str]:
+        if self.wb is not None:
+            self._save()
+        return self.written
+
+
+def _cell(ws, value, style: str):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def _new_sheet(book: _BookWriter, day: date, title: str):
+    ws = book.sheet(day.strftime("%d.%m.%Y"))
+    for idx, width in enumerate(COLUMN_WIDTHS, start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    ws.append([_cell(ws, f"{title} на {day:%d.%m.%Y}, {WEEKDAY_NAMES[day.weekday()]}", TITLE)])
+    ws.append([])
+    ws.append([_cell(ws, name, HEADER) for name in COLUMNS])
+    return ws
+
+
+def _shift_cells(ws, shift: ShiftAssignment) -> list:
+    if not shift.filled:
+        return [_cell(ws, "ПУСТО", EMPTY), _cell(ws, None, CENTERED)]
+    style = WARNING if shift.warnings else (RESERVE if shift.is_reserve else CENTERED)
+    return [_cell(ws, str(shift.driver_id), style), _cell(ws, "Р" if shift.is_reserve else None, CENTERED)]
+
+
+def _write_route(ws, route: str, result: DayRoster):
+    if not result.ok:
+        ws.append([_cell(ws, route, CENTERED), _cell(ws, None, PLAIN),
+                   _cell(ws, None, PLAIN), _cell(ws, None, PLAIN),
+                   _cell(ws, None, PLAIN), _cell(ws, None, PLAIN),
+                   _cell(ws, result.error, TEXT), _cell(ws, None, TEXT)])
+        return
+
+    for tram in result.trams:
+        warnings = [f"{label}: {w}" for label, shift in (("Утро", tram.shift_1), ("Вечер", tram.shift_2))
+                    for w in shift.warnings]
+        ws.append([
+            _cell(ws, route, CENTERED),
+            _cell(ws, tram.tram_number, CENTERED),
+            *_shift_cells(ws, tram.shift_1),
+            *_shift_cells(ws, tram.shift_2),
+            _cell(ws, "; ".join(tram.issues) or None, TEXT),
+            _cell(ws, "; ".join(warnings) or None, TEXT),
+        ])
+
+    ws.append([_cell(ws, None, PLAIN), _cell(ws, f"Резерв: {len(result.leftover)} чел.", PLAIN)])
+
+
+def _route_key(route: str):
+    return len(route), route
+
+
+def export_rosters(source, output: str, layout: str = "day",
+                   max_sheets: int = MAX_SHEETS_PER_BOOK) -> List[str]:
+    """
+    Пишет наряды прогона source в Excel. layout='day' — output это файл .xlsx,
+    layout='route' — output это папка. Возвращает список созданных файлов.
+    """
+    from src.run_diff import iter_dates, iter_run
+
+    if layout not in ("day", "route"):
+        raise ValueError(f"Неизвестный вариант выгрузки: {layout}")
+    if max_sheets < 1:
+        raise ValueError(f"Листов в книге должно быть не меньше 1, получено {max_sheets}")
+
+    if layout == "day":
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        book = _BookWriter(output, max_sheets)
+        for day_str, routes in iter_dates(iter_run(source)):
+            ws = _new_sheet(book, date.fromisoformat(day_str), "Наряд")
+            for route in sorted(routes, key=_route_key):
+                _write_route(ws, route, routes[route])
+        return book.close()
+
+    # По маршрутам: отдельный проход по прогону на каждый маршрут, чтобы держать
+    # открытой одну книгу. Маршруты узнаем по ходу первого прохода.
+    os.makedirs(output, exist_ok=True)
+    written: List[str] = []
+    pending: Optional[List[str]] = None
+    done = set()
+    while pending is None or pending:
+        current = pending.pop(0) if pending else None
+        seen = set()
+        book = None
+        for day_str, routes in iter_dates(iter_run(source)):
+            seen.update(routes)
+            if current is None:
+                current = min(routes, key=_route_key)
+            result = routes.get(current)
+            if result is None:
+                continue
+            if book is None:
+                book = _BookWriter(os.path.join(output, f"naryad_{current}.xlsx"), max_sheets)
+            ws = _new_sheet(book, date.fromisoformat(day_str), f"Наряд маршрута №{current}")
+            _write_route(ws, current, result)
+        if current is None:
+            break                       # пустой прогон
+        done.add(current)
+        if book is not None:
+            written.extend(book.close())
+        if pending is None:
+            pending = sorted(seen - done, key=_route_key)
+    return written
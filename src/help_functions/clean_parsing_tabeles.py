@@ -1,15 +1,28 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 import calendar
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, timedelta
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
 
 # ================= НАСТРОЙКИ =================
-INPUT_FILE = '../../data/tabeles_2026/february_2026.xlsx'
-OUTPUT_DIR = '../../data/tabeles_2026'
+DATA_DIR = os.environ.get('VKR_DATA_DIR', '../../data')  # папку данных задает ETL (src/pipeline.py)
+INPUT_FILE = os.path.join(DATA_DIR, 'tabeles_2026', 'february_2026.xlsx')
+OUTPUT_DIR_TEMPLATE = os.path.join(DATA_DIR, 'tabeles_{year}')  # для генерации на несколько лет
+
+# Входной файл — табель за этот месяц; от его 1-го числа считаются смещения циклов
+REFERENCE_YEAR = 2026
+REFERENCE_MONTH = 2
+
+# Период генерации (берутся все месяцы, которые он затрагивает)
+START_DATE = date(2026, 1, 1)
+END_DATE = date(2026, 12, 31)
+MAX_WORKERS = None  # None → по числу ядер
 
 SHIFT_1 = 1
 SHIFT_2 = 2
@@ -25,6 +38,24 @@ HOLIDAYS_2026 = {
     (11, 4)
 }
 
+# Фиксированные праздники без переносов — для лет, которых нет в HOLIDAYS_BY_YEAR
+FIXED_HOLIDAYS = {
+    (1, 1), (1, 2), (1, 3), (1, 4), (1, 5), (1, 6), (1, 7), (1, 8),
+    (2, 23),
+    (3, 8),
+    (5, 1), (5, 9),
+    (6, 12),
+    (11, 4)
+}
+
+HOLIDAYS_BY_YEAR = {
+    2026: HOLIDAYS_2026,
+}
+
+MONTH_NAMES = {1: 'january', 2: 'february', 3: 'march', 4: 'april', 5: 'may', 6: 'june',
+               7: 'july', 8: 'august', 9: 'september', 10: 'october', 11: 'november', 12: 'december'}
+META_COLS = ['Таб.№', 'График', 'Режим', 'см.', 'вых.']
+
 # Цикличные графики (кроме 5х2)
 CYCLIC_PATTERNS = {
     '4x2': [1, 1, 1, 1, 0, 0],
@@ -44,15 +75,20 @@ def normalize_key(s):
 
 
 def is_holiday(d):
-    return (d.month, d.day) in HOLIDAYS_2026
+    return (d.month, d.day) in HOLIDAYS_BY_YEAR.get(d.year, FIXED_HOLIDAYS)
+
+
+def get_5x2_shift(mode):
+    """Смена для рабочих дней 5х2 по режиму водителя"""
+    norm_mode = normalize_key(mode)
+    return SHIFT_2 if '2' in norm_mode and '1' not in norm_mode else SHIFT_1
 
 
 def get_5x2_val_for_date(d, mode):
     """Логика 5х2 с праздниками"""
     if is_holiday(d) or d.weekday() >= 5:
         return REST
-    norm_mode = normalize_key(mode)
-    return SHIFT_2 if '2' in norm_mode and '1' not in norm_mode else SHIFT_1
+    return get_5x2_shift(mode)
 
 
 def build_cycle_for_pattern(pattern_name, mode, mask):
@@ -106,161 +142,392 @@ def build_cycle_for_pattern(pattern_name, mode, mask):
         return [(SHIFT_1 if x else REST) for x in mask]
 
 
-def solve_cyclic(feb_vals, pattern_name, mode):
+def find_cyclic_mask(pattern_name):
+    """Маска цикла из CYCLIC_PATTERNS по (ненормализованному) названию графика."""
     pkey = normalize_key(pattern_name)
-    mask = None
     for k, v in CYCLIC_PATTERNS.items():
         if normalize_key(k) == pkey:
-            mask = v
-            break
-    if not mask: return None
+            return v
+    return None
 
-    # Строим цикл с учетом новой логики
-    cycle = build_cycle_for_pattern(pattern_name, mode, mask)
 
-    # Поиск смещения
-    cycle_len = len(cycle)
-    candidates = []
+# ================= ПАКЕТНЫЙ ПОДБОР СМЕЩЕНИЙ =================
 
-    for offset in range(cycle_len):
-        score = 0
-        mismatch = False
-        for i, val in enumerate(feb_vals):
-            theo = cycle[(offset + i) % cycle_len]
+# Целочисленные коды табеля для векторного сравнения
+CODE_REST = 0
+CODE_UNKNOWN = 3  # нерабочий день, который не совпадает ни с чем (пусто, 'О' и т.п.)
 
-            val_s = str(val).replace('.0', '')
-            if val_s.lower() in ['b', 'v']: val_s = REST
 
-            is_w_act = (val_s in ['1', '2'])
-            is_w_theo = (str(theo) in ['1', '2'])
+def encode_day_frame(day_frame):
+    """
+    Кодирует значения дней (строки) в матрицу int8: 1/2 — смены, 0 — 'В', 3 — прочее.
+    'b', 'v', 'nan' считаются выходным.
+    """
+    text = day_frame.astype(str).apply(lambda col: col.str.strip().str.replace('.0', '', regex=False))
+    values = text.to_numpy(dtype=str)
+    lower = np.char.lower(values)
 
-            if is_w_act != is_w_theo:
-                mismatch = True
-                break
+    codes = np.full(values.shape, CODE_UNKNOWN, dtype=np.int8)
+    codes[(values == REST) | np.isin(lower, ['b', 'v', 'nan'])] = CODE_REST
+    codes[values == str(SHIFT_1)] = SHIFT_1
+    codes[values == str(SHIFT_2)] = SHIFT_2
+    return codes
 
-            if val_s == str(theo): score += 1
 
-        if not mismatch:
-            candidates.append((score, offset))
+def encode_cycle(cycle):
+    return np.array([CODE_REST if v == REST else int(v) for v in cycle], dtype=np.int8)
 
-    if not candidates: return None
 
-    best_offset = max(candidates, key=lambda x: x[0])[1]
+def infer_cyclic_offsets(day_codes, patterns, modes):
+    """
+    Подбирает смещение цикла сразу для всех водителей.
 
-    # Генерация года
-    jan1_offset = (best_offset - 31) % cycle_len
-    full_seq = []
-    for i in range(365):
-        full_seq.append(cycle[(jan1_offset + i) % cycle_len])
+    day_codes — матрица (водители × дни) из encode_day_frame,
+    patterns/modes — график и режим для каждой строки.
+    Водители группируются по циклу (с учетом вариантов 1x2 из build_cycle_for_pattern),
+    в каждой группе все пары (водитель, смещение) оцениваются одной операцией NumPy.
 
-    return full_seq
+    Возвращает (cycles, offsets, confidence):
+      cycles[i]     — закодированный цикл (np.ndarray) или None, если график не цикличный;
+      offsets[i]    — лучшее смещение относительно первого дня входа, -1 если не подошло;
+      confidence[i] — доля дней, совпавших с циклом точно (0..1).
+    """
+    n_drivers, n_days = day_codes.shape
+    cycles = [None] * n_drivers
+    offsets = np.full(n_drivers, -1, dtype=np.int64)
+    confidence = np.zeros(n_drivers, dtype=np.float64)
+
+    # Группы: цикл → индексы строк
+    groups = {}
+    built = {}  # (график, режим) → цикл, чтобы не строить его для каждой строки
+    for i, key in enumerate(zip(patterns, modes)):
+        if key not in built:
+            mask = find_cyclic_mask(key[0])
+            built[key] = tuple(build_cycle_for_pattern(key[0], key[1], mask)) if mask else None
+        cycle = built[key]
+        if cycle is None:
+            continue
+        groups.setdefault(cycle, []).append(i)
+
+    if n_days == 0:
+        return cycles, offsets, confidence
+
+    actual = day_codes
+    actual_work = (actual == SHIFT_1) | (actual == SHIFT_2)
+
+    for cycle, rows in groups.items():
+        cycle_arr = encode_cycle(cycle)
+        cycle_len = len(cycle_arr)
+        # Все сдвиги цикла: theo[offset, day] = cycle[(offset + day) % len]
+        theo = cycle_arr[(np.arange(cycle_len)[:, None] + np.arange(n_days)[None, :]) % cycle_len]
+        theo_work = theo != CODE_REST
+
+        rows = np.asarray(rows)
+        group_codes = actual[rows][:, None, :]
+        mismatch = (actual_work[rows][:, None, :] != theo_work[None, :, :]).any(axis=2)
+        score = (group_codes == theo[None, :, :]).sum(axis=2)
+        score = np.where(mismatch, -1, score)
+
+        # argmax берет первое максимальное смещение
+        best = score.argmax(axis=1)
+        best_score = score[np.arange(len(rows)), best]
+        ok = best_score >= 0
+
+        for i in rows:
+            cycles[i] = cycle_arr
+        offsets[rows[ok]] = best[ok]
+        confidence[rows[ok]] = best_score[ok] / n_days
+
+    return cycles, offsets, confidence
 
 
-def solve_5x2(feb_vals, mode):
-    full_seq = []
-    start_date = date(2026, 1, 1)
+# ================= ЭКСПОРТ В EXCEL С ФОРМАТИРОВАНИЕМ =================
 
-    for i in range(365):
-        curr_date = start_date + timedelta(days=i)
-        val = get_5x2_val_for_date(curr_date, mode)
-        full_seq.append(val)
+TABEL_FONT = Font(name='Verdana', size=12)
+CENTER = Alignment(horizontal='center')
+HOLIDAY_FILL = PatternFill(start_color="FFB7FD", end_color="FFB7FD", fill_type="solid")
+_THIN = Side(style='thin')
+HEADER_FONT = Font(bold=True)
+HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+MAX_COLUMN_WIDTH = 20
+DAY_STYLE = 'tabel_day'
+HOLIDAY_STYLE = 'tabel_holiday'
+SHEET_NAME = 'Sheet1'
 
-    # Простая проверка совпадений (не строгая)
-    feb_slice = full_seq[31:59]
-    matches = sum(1 for i in range(28) if str(feb_vals[i]).replace('.0', '') == str(feb_slice[i]))
-    if matches < 15:
-        print("Предупреждение: 5х2 не совпало более чем на 50%")
 
-    return full_seq
+def _day_fills(year, month_num):
+    """Для каждого дня месяца: нужна ли заливка (календарный выходной или праздник)."""
+    _, days_in_month = calendar.monthrange(year, month_num)
+    fills = {}
+    for day in range(1, days_in_month + 1):
+        curr_date = date(year, month_num, day)
+        fills[str(day)] = curr_date.weekday() >= 5 or is_holiday(curr_date)
+    return fills
 
 
-# ================= ЭКСПОРТ В EXCEL С ФОРМАТИРОВАНИЕМ =================
+def count_rest_days(day_frame):
+    """Векторный подсчет 'В' по строкам (значение для колонки 'вых.')."""
+    return day_frame.astype(str).apply(lambda col: col.str.strip()).eq(REST).sum(axis=1)
 
-def format_excel_file(filepath, month_num):
+
+def write_formatted_month(df, filepath, month_num, year=2026):
     """
-    Открывает файл, применяет форматирование, пересчитывает 'вых.' и сохраняет.
+    Пишет уже отформатированный табель за один проход (write-only режим openpyxl).
+    Карта колонок дней строится один раз, 'вых.' считается векторно по DataFrame,
+    ширина колонок — по длинам строк в DataFrame, без повторного чтения ячеек.
     """
-    wb = load_workbook(filepath)
-    ws = wb.active
+    df = df.copy()
+    fills = _day_fills(year, month_num)
+    day_cols = [c for c in df.columns if str(c) in fills]
+
+    if 'вых.' in df.columns and day_cols:
+        df['вых.'] = count_rest_days(df[day_cols])
+
+    columns = list(df.columns)
+    day_flags = [str(c) in fills for c in columns]
+    fill_flags = [fills.get(str(c), False) for c in columns]
+
+    # Ширина: максимум длины заголовка и значений (NaN/None считаются пустыми)
+    text = df.astype(object).where(df.notna(), "").astype(str)
+    widths = [
+        min(max(len(str(c)), int(text[c].str.len().max()) if len(text) else 0) + 2, MAX_COLUMN_WIDTH)
+        for c in columns
+    ]
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET_NAME)
+    for idx, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+
+    header = []
+    for c in columns:
+        cell = WriteOnlyCell(ws, value=str(c))
+        cell.font = HEADER_FONT
+        cell.border = HEADER_BORDER
+        cell.alignment = CENTER
+        header.append(cell)
+    ws.append(header)
+
+    # Стили регистрируются в книге один раз, ячейкам назначаются по имени
+    day_style = NamedStyle(name=DAY_STYLE, font=TABEL_FONT, alignment=CENTER)
+    holiday_style = NamedStyle(name=HOLIDAY_STYLE, font=TABEL_FONT, alignment=CENTER, fill=HOLIDAY_FILL)
+    wb.add_named_style(day_style)
+    wb.add_named_style(holiday_style)
+    templates = [
+        (HOLIDAY_STYLE if is_fill else DAY_STYLE) if is_day else None
+        for is_day, is_fill in zip(day_flags, fill_flags)
+    ]
+
+    for values in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+        row = []
+        for value, style in zip(values, templates):
+            if value == "":
+                value = None
+            if style is None:
+                row.append(value)
+                continue
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            row.append(cell)
+        ws.append(row)
 
-    # Шрифт Verdana 12 для всего
-    font = Font(name='Verdana', size=12)
+    wb.save(filepath)
 
-    # Заливка для выходных
-    holiday_fill = PatternFill(start_color="FFB7FD", end_color="FFB7FD", fill_type="solid")
 
-    # Определяем даты месяца
-    year = 2026
-    _, days_in_month = calendar.monthrange(year, month_num)
-    start_date = date(year, month_num, 1)
+def format_excel_file(filepath, month_num, year=2026):
+    """
+    Открывает файл, применяет форматирование, пересчитывает 'вых.' и сохраняет.
+    Колонки дней находятся один раз по заголовку, все ячейки обходятся за один проход.
+    """
+    wb = load_workbook(filepath)
+    ws = wb.active
 
-    # Индекс колонки "вых." (предполагаем, что она есть)
-    col_names = [ws.cell(row=1, column=c).value for c in range(1, ws.max_column + 1)]
-    try:
-        col_vyh_index = col_names.index('вых.') + 1  # +1 потому что openpyxl индексирует с 1
-    except ValueError:
+    fills = _day_fills(year, month_num)
+
+    # Карта колонок: индекс (с 1) → номер дня
+    header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+    day_columns = {}
+    col_vyh_index = None
+    for c, name in enumerate(header, start=1):
+        if str(name) in fills:
+            day_columns[c] = str(name)
+        elif name == 'вых.':
+            col_vyh_index = c
+    if col_vyh_index is None:
         print(f"В файле {filepath} не найдена колонка 'вых.'. Пропуск форматирования этой колонки.")
-        col_vyh_index = None
+
+    widths = {c: len(str(name)) for c, name in enumerate(header, start=1)}
 
     # Проходим по всем строкам (начиная со 2-й, т.к. 1-я — заголовки)
-    for row_idx in range(2, ws.max_row + 1):
-        # Подсчет выходных для колонки "вых."
+    for row in ws.iter_rows(min_row=2):
+        rest_count = 0
+        for cell in row:
+            c = cell.column
+            if c in day_columns:
+                if str(cell.value).strip() == REST:
+                    rest_count += 1
+                cell.font = TABEL_FONT
+                cell.alignment = CENTER
+                if fills[day_columns[c]]:
+                    cell.fill = HOLIDAY_FILL
+            if c != col_vyh_index and cell.value is not None:
+                widths[c] = max(widths.get(c, 0), len(str(cell.value)))
+
         if col_vyh_index:
-            rest_count = 0
-            for day_col in range(1, days_in_month + 1):
-                # Ищем колонку дня (по названию столбца)
-                day_col_letter = None
-                for c in range(1, ws.max_column + 1):
-                    if str(ws.cell(row=1, column=c).value) == str(day_col):
-                        day_col_letter = c
-                        break
-                if day_col_letter:
-                    cell_val = str(ws.cell(row=row_idx, column=day_col_letter).value).strip()
-                    if cell_val == 'В':
-                        rest_count += 1
-            ws.cell(row=row_idx, column=col_vyh_index, value=rest_count)
-
-        # Форматирование дней
-        for day_col in range(1, days_in_month + 1):
-            # Находим колонку дня
-            col_letter = None
-            for c in range(1, ws.max_column + 1):
-                if str(ws.cell(row=1, column=c).value) == str(day_col):
-                    col_letter = c
-                    break
-            if not col_letter:
-                continue
+            ws.cell(row=row[0].row, column=col_vyh_index, value=rest_count)
+            widths[col_vyh_index] = max(widths.get(col_vyh_index, 0), len(str(rest_count)))
 
-            # Применяем шрифт ко всем ячейкам
-            cell = ws.cell(row=row_idx, column=col_letter)
-            cell.font = font
-            cell.alignment = Alignment(horizontal='center')
-
-            # Проверяем, является ли день календарным выходным (для заливки)
-            curr_date = start_date.replace(day=day_col)
-            if curr_date.weekday() >= 5 or is_holiday(curr_date):
-                cell.fill = holiday_fill
-
-    # Автоподбор ширины столбцов
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter  # Получаем букву столбца
-        for cell in col:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 20)  # Ограничиваем макс. ширину
-        ws.column_dimensions[column].width = adjusted_width
+    # Автоподбор ширины столбцов (ограничиваем макс. ширину)
+    for c, max_length in widths.items():
+        ws.column_dimensions[get_column_letter(c)].width = min(max_length + 2, MAX_COLUMN_WIDTH)
 
     wb.save(filepath)
 
 
+# ================= ГЕНЕРАЦИЯ НА ПРОИЗВОЛЬНЫЙ ПЕРИОД =================
+
+def build_plan(df, day_cols):
+    """
+    Сжатое описание графика каждого водителя, не привязанное к году:
+      cycles   — уникальные закодированные циклы;
+      cycle_id — индекс цикла в cycles (-1, если не цикличный или не подобран);
+      offset   — смещение цикла на 1-е число опорного месяца;
+      shift_5x2 — смена для 5х2 (0 — не 5х2).
+    Из плана можно получить значения на любую дату (см. build_month_codes).
+    """
+    grafiks = [normalize_key(g) for g in df['График']]
+    modes = [str(m) for m in df['Режим']]
+    day_codes = encode_day_frame(df[day_cols])
+    row_cycles, offsets, _ = infer_cyclic_offsets(day_codes, grafiks, modes)
+
+    n_drivers = len(df)
+    cycles = []
+    cycle_index = {}
+    cycle_id = np.full(n_drivers, -1, dtype=np.int64)
+    shift_5x2 = np.zeros(n_drivers, dtype=np.int8)
+
+    ref_start = date(REFERENCE_YEAR, REFERENCE_MONTH, 1)
+    ref_rest = _rest_mask_5x2(ref_start, len(day_cols))
+
+    failed = []
+    for i, grafik in enumerate(grafiks):
+        if '5x2' in grafik:
+            shift_5x2[i] = get_5x2_shift(modes[i])
+            # Простая проверка совпадений (не строгая)
+            expected = np.where(ref_rest, CODE_REST, shift_5x2[i])
+            if (day_codes[i] == expected).sum() < len(day_cols) // 2 + 1:
+                print(f"Предупреждение: 5х2 не совпало более чем на 50% (строка {df.index[i]})")
+        elif offsets[i] >= 0:
+            key = row_cycles[i].tobytes()
+            if key not in cycle_index:
+                cycle_index[key] = len(cycles)
+                cycles.append(row_cycles[i])
+            cycle_id[i] = cycle_index[key]
+        else:
+            failed.append((df.index[i], grafik))
+
+    plan = {
+        "anchor": ref_start,
+        "cycles": cycles,
+        "cycle_id": cycle_id,
+        "offset": offsets,
+        "shift_5x2": shift_5x2,
+    }
+    return plan, failed
+
+
+def _rest_mask_5x2(start, days):
+    """Маска выходных 5х2 (суббота, воскресенье, праздники года) на days дней от start."""
+    return np.array([
+        (d.weekday() >= 5 or is_holiday(d))
+        for d in (start + timedelta(days=i) for i in range(days))
+    ], dtype=bool)
+
+
+def build_month_codes(plan, year, month_num):
+    """Матрица значений (водители × дни месяца): 1/2, 'В' или '' для неподобранных."""
+    _, days_cnt = calendar.monthrange(year, month_num)
+    month_start = date(year, month_num, 1)
+    # Дни от опорной даты: для прошлых дат отрицательные, модуль цикла это учитывает
+    day_idx = (month_start - plan["anchor"]).days + np.arange(days_cnt)
+
+    cycle_id = plan["cycle_id"]
+    codes = np.full((len(cycle_id), days_cnt), -1, dtype=np.int8)
+
+    for cid, cycle_arr in enumerate(plan["cycles"]):
+        rows = np.flatnonzero(cycle_id == cid)
+        if len(rows):
+            idx = (plan["offset"][rows][:, None] + day_idx[None, :]) % len(cycle_arr)
+            codes[rows] = cycle_arr[idx]
+
+    rows_5x2 = np.flatnonzero(plan["shift_5x2"])
+    if len(rows_5x2):
+        rest = _rest_mask_5x2(month_start, days_cnt)
+        codes[rows_5x2] = np.where(rest[None, :], CODE_REST, plan["shift_5x2"][rows_5x2][:, None])
+
+    values = codes.astype(object)
+    values[codes == CODE_REST] = REST
+    values[codes == SHIFT_1] = SHIFT_1
+    values[codes == SHIFT_2] = SHIFT_2
+    values[codes < 0] = ""
+    return values
+
+
+def write_month_from_plan(meta_df, plan, year, month_num, output_dir):
+    """Строит и пишет табель одного месяца. Выполняется в отдельном процессе."""
+    values = build_month_codes(plan, year, month_num)
+    day_df = pd.DataFrame(values, columns=[str(d) for d in range(1, values.shape[1] + 1)],
+                          index=meta_df.index)
+    new_df = pd.concat([meta_df, day_df], axis=1)
+
+    os.makedirs(output_dir, exist_ok=True)
+    out_path = os.path.join(output_dir, f"{MONTH_NAMES[month_num]}_{year}.xlsx")
+    write_formatted_month(new_df, out_path, month_num, year)
+    return out_path
+
+
+def iter_months(start, end):
+    """Все (год, месяц), которые затрагивает период [start, end]."""
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def generate_tabels(df, plan, start, end, output_template=OUTPUT_DIR_TEMPLATE, max_workers=MAX_WORKERS):
+    """
+    Проецирует план на период [start, end] и пишет помесячные табели в параллельных процессах.
+    Опорный месяц (входной файл) не перезаписывается.
+    """
+    meta_df = df[META_COLS].copy()
+    months = [
+        (y, m) for y, m in iter_months(start, end)
+        if (y, m) != (REFERENCE_YEAR, REFERENCE_MONTH)
+    ]
+    if not months:
+        return []
+
+    if len(months) == 1:
+        y, m = months[0]
+        return [write_month_from_plan(meta_df, plan, y, m, output_template.format(year=y))]
+
+    written = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(write_month_from_plan, meta_df, plan, y, m, output_template.format(year=y))
+            for y, m in months
+        ]
+        for future in futures:
+            out_path = future.result()
+            print(f"Создан {os.path.basename(out_path)}")
+            written.append(out_path)
+    return written
+
+
 # ================= MAIN =================
 
-def main():
-    print("--- Генератор табелей v5 (Специальные графики + Форматирование) ---")
+def main(start=START_DATE, end=END_DATE):
+    print("--- Генератор табелей v6 (Специальные графики + Форматирование + любой период) ---")
 
     if not os.path.exists(INPUT_FILE):
         print("Файл не найден")
@@ -269,72 +536,29 @@ def main():
     df = pd.read_excel(INPUT_FILE, dtype=str)
     df.columns = [str(c).strip() for c in df.columns]
 
+    _, ref_days = calendar.monthrange(REFERENCE_YEAR, REFERENCE_MONTH)
     day_cols = []
-    for i in range(1, 29):
+    for i in range(1, ref_days + 1):
         if str(i) in df.columns: day_cols.append(str(i))
 
-    meta_cols = ['Таб.№', 'График', 'Режим', 'см.', 'вых.']
-    for c in meta_cols:
+    for c in META_COLS:
         if c not in df.columns: df[c] = ""
 
-    full_year_map = {}
-    stats_ok = 0
+    plan, failed = build_plan(df, day_cols)
+    for idx, grafik in failed:
+        print(f"Строка {idx}: Не удалось построить график {grafik}")
 
-    for idx, row in df.iterrows():
-        grafik = normalize_key(row['График'])
-        mode = str(row['Режим'])
-        feb_vals = []
-        for d in day_cols:
-            val = str(row[d]).strip()
-            if val.lower() in ['b', 'v', 'nan']: val = REST
-            feb_vals.append(val)
+    print(f"Успешно обработано: {len(df) - len(failed)}")
+    print(f"Период: {start} — {end}")
 
-        result_seq = None
-        if '5x2' in grafik:
-            result_seq = solve_5x2(feb_vals, mode)
-        else:
-            result_seq = solve_cyclic(feb_vals, grafik, mode)
-
-        if result_seq:
-            full_year_map[idx] = result_seq
-            stats_ok += 1
-        else:
-            print(f"Строка {idx}: Не удалось построить график {grafik}")
-            full_year_map[idx] = [""] * 365
-
-    print(f"Успешно обработано: {stats_ok}")
-
-    if not os.path.exists(OUTPUT_DIR): os.makedirs(OUTPUT_DIR)
-
-    months = [1] + list(range(3, 13))
-    m_names = {1: 'january', 2: 'february', 3: 'march', 4: 'april', 5: 'may', 6: 'june',
-               7: 'july', 8: 'august', 9: 'september', 10: 'october', 11: 'november', 12: 'december'}
-
-    for m in months:
-        fname = f"{m_names[m]}_2026.xlsx"
-        print(f"Создаем {fname}...")
-
-        _, days_cnt = calendar.monthrange(2026, m)
-        doy_start = date(2026, m, 1).timetuple().tm_yday - 1
-
-        new_df = df[meta_cols].copy()
-
-        for d in range(1, days_cnt + 1):
-            vals = []
-            d_idx = doy_start + (d - 1)
-            for idx in df.index:
-                vals.append(full_year_map[idx][d_idx])
-            new_df[str(d)] = vals
-
-        out_path = os.path.join(OUTPUT_DIR, fname)
-        new_df.to_excel(out_path, index=False)
-
-        # Применяем форматирование
-        format_excel_file(out_path, m)
-        print(f" -> Форматирование применено.")
-
-    print("✅ Все готово!")
+    written = generate_tabels(df, plan, start, end)
+    print(f"✅ Все готово! Файлов: {len(written)}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Необязательные аргументы: дата начала и конца периода (ГГГГ-ММ-ДД)
+    args = sys.argv[1:]
+    if len(args) == 2:
+        main(date.fromisoformat(args[0]), date.fromisoformat(args[1]))
+    else:
+        main()
@@ -1,12 +1,17 @@
+import calendar
 import json
+import os
 from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
 MONTH = "Февраль"
 YEAR = 2026
-DAYS_IN_MONTH = 28
+DAYS_IN_MONTH = None  # None → по календарю (MONTH, YEAR)
 
-MAX_DRIVERS = 20
+MAX_DRIVERS = None  # None → весь табель; число — первые N водителей (для отладки)
+CHUNK_SIZE = 1000   # водителей на одну запись в файл
 
 SHEET_NAME = "Весь_табель"
 
@@ -15,6 +20,104 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 EXCEL_PATH = PROJECT_ROOT / "data" / "data.xlsx"
 OUTPUT_JSON = PROJECT_ROOT / "data" / "drivers.json"
 
+MONTH_MAP = {
+    "Январь": 1, "Февраль": 2, "Март": 3, "Апрель": 4, "Май": 5, "Июнь": 6,
+    "Июль": 7, "Август": 8, "Сентябрь": 9, "Октябрь": 10, "Ноябрь": 11, "Декабрь": 12
+}
+BASE_COLUMNS = ["Таб.№", "График", "Режим", "см.", "вых."]
+
+
+def _plain(value):
+    """Значение ячейки для JSON: NaN → None, 3.0 → 3, numpy-типы → обычные."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (np.integer, np.floating)):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def day_matrix(df: pd.DataFrame, days_in_month: int) -> np.ndarray:
+    """
+    Значения дней (водители × дни месяца) строками; пустые ячейки — ''.
+    Колонки дней ищутся по номеру ('1' или 1), недостающие дни — пустые.
+    """
+    columns = {str(c).strip().removesuffix(".0"): c for c in df.columns}
+    matrix = np.full((len(df), days_in_month), "", dtype=object)
+    for day in range(1, days_in_month + 1):
+        col = columns.get(str(day))
+        if col is not None:
+            matrix[:, day - 1] = df[col].to_numpy(dtype=object)
+
+    # Разных значений в табеле единицы: чистятся уникальные, результат раскладывается индексами
+    uniq, inverse = np.unique(matrix.astype(str), return_inverse=True)
+    cleaned = np.array(["" if v in ("nan", "None", "NaT") else v.strip().removesuffix(".0") for v in uniq],
+                       dtype=object)
+    return cleaned[inverse].reshape(matrix.shape)
+
+
+def days_json(values: np.ndarray) -> list:
+    """
+    Готовые JSON-фрагменты списков дней для всех водителей.
+    Каждая пара (день, значение) кодируется один раз в таблицу,
+    ячейки матрицы выбираются из нее индексами.
+    """
+    n_days = values.shape[1]
+    uniq, inverse = np.unique(values, return_inverse=True)
+    inverse = inverse.reshape(values.shape)
+    # Пустая ячейка → null (как раньше для NaN)
+    encoded = [json.dumps(v if v != "" else None, ensure_ascii=False) for v in uniq]
+    table = np.array([[f'{{"day": {day}, "value": {enc}}}' for enc in encoded]
+                      for day in range(1, n_days + 1)], dtype=object)
+    cells = table[np.arange(n_days)[None, :], inverse]
+    return ["[" + ", ".join(row) + "]" for row in cells]
+
+
+def convert(df: pd.DataFrame, output: Path, month: str = MONTH, year: int = YEAR,
+            days_in_month=DAYS_IN_MONTH, max_drivers=MAX_DRIVERS, chunk_size: int = CHUNK_SIZE) -> int:
+    """Пишет табель листа в JSON частями по chunk_size водителей. Возвращает число водителей."""
+    if days_in_month is None:
+        days_in_month = calendar.monthrange(year, MONTH_MAP[month])[1]
+
+    df = df.dropna(how="all")
+    if max_drivers is not None:
+        df = df.head(max_drivers)
+    missing = [c for c in BASE_COLUMNS if c not in df.columns]
+    if missing:
+        raise KeyError(f"В листе нет колонок: {', '.join(missing)}")
+
+    meta = df[BASE_COLUMNS].to_numpy(dtype=object)
+    values = day_matrix(df, days_in_month)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output.with_name(output.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"month": month, "year": year, "days_in_month": days_in_month},
+                           ensure_ascii=False)[:-1])
+        f.write(', "drivers": [\n')
+        for start in range(0, len(df), chunk_size):
+            days = days_json(values[start:start + chunk_size])
+            lines = []
+            chunk = meta[start:start + chunk_size]
+            for (tab_number, schedule, mode, shift_start, shift_end), driver_days in zip(chunk, days):
+                head = json.dumps({
+                    "tab_number": _plain(tab_number),
+                    "schedule": _plain(schedule),
+                    "mode": _plain(mode),
+                    "shift_start": _plain(shift_start),
+                    "shift_end": _plain(shift_end),
+                }, ensure_ascii=False)
+                lines.append(f'  {head[:-1]}, "days": {driver_days}}}')
+            if start:
+                f.write(",\n")
+            f.write(",\n".join(lines))
+        f.write("\n]}\n")
+    os.replace(tmp_path, output)
+    return len(df)
+
 
 def main():
     if not EXCEL_PATH.exists():
@@ -26,50 +129,10 @@ def main():
         engine="openpyxl"
     )
 
-    df = df.dropna(how="all")
-
-    if MAX_DRIVERS is not None:
-        df = df.head(MAX_DRIVERS)
-
-    base_columns = ["Таб.№", "График", "Режим", "см.", "вых."]
-    day_columns = [str(day) for day in range(1, DAYS_IN_MONTH + 1)]
-
-    df = df[base_columns + day_columns]
-
-    drivers = []
-
-    for _, row in df.iterrows():
-        driver = {
-            "tab_number": row["Таб.№"],
-            "schedule": row["График"],
-            "mode": row["Режим"],
-            "shift_start": row["см."],
-            "shift_end": row["вых."],
-            "days": []
-        }
-
-        for day in range(1, DAYS_IN_MONTH + 1):
-            value = row[str(day)]
-            driver["days"].append({
-                "day": day,
-                "value": None if pd.isna(value) else value
-            })
-
-        drivers.append(driver)
-
-    result = {
-        "month": MONTH,
-        "year": YEAR,
-        "days_in_month": DAYS_IN_MONTH,
-        "drivers": drivers
-    }
-
-    OUTPUT_JSON.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    count = convert(df, OUTPUT_JSON)
 
     print(f"Табель на {MONTH} {YEAR} сохранён")
-    print(f"Водителей в файле: {len(drivers)}")
+    print(f"Водителей в файле: {count}")
     print(f"{OUTPUT_JSON}")
 
 
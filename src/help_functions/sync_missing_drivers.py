@@ -1,9 +1,16 @@
 import json
 import os
+import sys
+from pathlib import Path
+
+# Корень проекта в sys.path, чтобы скрипт можно было запускать из его папки
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.db.assignment_registry import AssignmentRegistry
 
 # НАСТРОЙКИ ПУТЕЙ
-DRIVERS_PATH = "../../data/drivers_json/drivers_april.json"
-ASSIGNMENTS_PATH = "../../data/assignments.json"
+DATA_DIR = os.environ.get("VKR_DATA_DIR", "../../data")  # папку данных задает ETL (src/pipeline.py)
+DRIVERS_PATH = os.path.join(DATA_DIR, "drivers_json", "drivers_april.json")
+ASSIGNMENTS_PATH = os.path.join(DATA_DIR, "assignments.json")
 
 
 def sync_drivers():
@@ -47,27 +54,18 @@ def sync_drivers():
 
     # 3. СБОР ID ИЗ ЗАКРЕПЛЕНИЙ
     print(f"📖 Читаю текущие закрепления: {ASSIGNMENTS_PATH}...")
-    assigned_ids = set()
-    current_assignments = []
-
+    registry = AssignmentRegistry(ASSIGNMENTS_PATH)
     try:
-        with open(ASSIGNMENTS_PATH, "r", encoding="utf-8") as f:
-            current_assignments = json.load(f)
-            for a in current_assignments:
-                try:
-                    uid = int(a.get("driver_id"))
-                    assigned_ids.add(uid)
-                except (ValueError, TypeError):
-                    continue
+        registry.load()
     except Exception as e:
         print(f"❌ Ошибка чтения закреплений: {e}")
         return
 
-    print(f"   Найдено {len(assigned_ids)} уже закрепленных водителей.")
+    print(f"   Найдено {len(registry)} уже закрепленных водителей.")
 
     # 4. ПОИСК ПОТЕРЯШЕК
     # Вычитаем множества: (Все водители) - (Закрепленные)
-    missing_ids = drivers_ids - assigned_ids
+    missing_ids = {uid for uid in drivers_ids if uid not in registry}
 
     if not missing_ids:
         print("\n✅ Все водители уже закреплены! Добавлять некого.")
@@ -76,28 +74,17 @@ def sync_drivers():
     print(f"\n🔍 Обнаружено {len(missing_ids)} незакрепленных водителей.")
     print("   Добавляю их в маршрут 'ANY'...")
 
-    # 5. ДОБАВЛЕНИЕ
-    new_entries = []
-    for missing_id in missing_ids:
-        new_entry = {
-            "driver_id": missing_id,
-            "route_number": "ANY"
-        }
-        current_assignments.append(new_entry)
-        new_entries.append(missing_id)
-
-    # 6. СОХРАНЕНИЕ
+    # 5. ДОБАВЛЕНИЕ (журнал) И 6. СОХРАНЕНИЕ (атомарная замена assignments.json)
     try:
-        with open(ASSIGNMENTS_PATH, "w", encoding="utf-8") as f:
-            json.dump(current_assignments, f, ensure_ascii=False, indent=2)
+        registry.add_many_if_absent(missing_ids, "ANY")
+        registry.compact()
         print("💾 Файл assignments.json успешно обновлен!")
 
         # Вывод первых 5 добавленных для примера
-        print(f"   Примеры добавленных ID: {list(new_entries)[:5]}...")
+        print(f"   Примеры добавленных ID: {list(missing_ids)[:5]}...")
 
     except Exception as e:
         print(f"❌ Ошибка при сохранении: {e}")
 
-
 if __name__ == "__main__":
     sync_drivers()
\ No newline at end of file
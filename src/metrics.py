@@ -0,0 +1,209 @@
+# src/metrics.py
+"""
+Счетчики, замеры времени и структурированные логи для горячих участков.
+
+По умолчанию сбор выключен: span() возвращает общий пустой контекст,
+inc()/observe() сразу выходят, так что в рабочем режиме накладные расходы —
+одна проверка флага. Включается через METRICS.enable().
+
+Экспорт: METRICS.to_json() или METRICS.to_prometheus().
+Переменная окружения VKR_METRICS=1 включает сбор с самого старта.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def _label_key(labels: Optional[dict]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _NullSpan:
+    """Пустой контекст для выключенного режима (один объект на всех)."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "key", "started")
+
+    def __init__(self, metrics, name, key):
+        self.metrics = metrics
+        self.name = name
+        self.key = key
+
+    def __enter__(self):
+        if self.metrics.profiler is not None:
+            self.metrics.profiler.enter(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.metrics._observe(self.name, self.key, elapsed)
+        if self.metrics.profiler is not None:
+            self.metrics.profiler.exit(self.name, elapsed)
+        return False
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        # { имя: { метки: значение } }
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        # { имя: { метки: [count, sum, max] } }
+        self.timings: Dict[str, Dict[LabelKey, list]] = {}
+        self._lock = threading.Lock()
+        # src/profiling.Profiler: пока идет профилирование, span() отмечает этапы
+        self.profiler = None
+
+    def enable(self, flag: bool = True):
+        self.enabled = flag
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.timings = {}
+
+    # ================= СБОР =================
+
+    def inc(self, name: str, value: float = 1, labels: Optional[dict] = None):
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def span(self, name: str, labels: Optional[dict] = None):
+        """Замер длительности блока: with METRICS.span("load.drivers"): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, _label_key(labels))
+
+    def observe(self, name: str, seconds: float, labels: Optional[dict] = None):
+        if not self.enabled:
+            return
+        self._observe(name, _label_key(labels), seconds)
+
+    def _observe(self, name: str, key: LabelKey, seconds: float):
+        with self._lock:
+            stat = self.timings.setdefault(name, {}).setdefault(key, [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += seconds
+            if seconds > stat[2]:
+                stat[2] = seconds
+
+    # ================= ЭКСПОРТ =================
+
+    def to_dict(self) -> dict:
+        def _series(data, convert):
+            return {
+                name: [{"labels": dict(key), **convert(value)} for key, value in series.items()]
+                for name, series in data.items()
+            }
+
+        return {
+            "counters": _series(self.counters, lambda v: {"value": v}),
+            "timings": _series(self.timings, lambda v: {"count": v[0], "sum_seconds": v[1], "max_seconds": v[2]}),
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    def to_prometheus(self, prefix: str = "vkr") -> str:
+        """Текстовый формат Prometheus: счетчики как *_total, замеры как summary."""
+        lines = []
+        for name, series in sorted(self.counters.items()):
+            metric = f"{prefix}_{_prom_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for key, value in series.items():
+                lines.append(f"{metric}{_prom_labels(key)} {value}")
+        for name, series in sorted(self.timings.items()):
+            metric = f"{prefix}_{_prom_name(name)}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for key, (count, total, peak) in series.items():
+                labels = _prom_labels(key)
+                lines.append(f"{metric}_count{labels} {count}")
+                lines.append(f"{metric}_sum{labels} {total:.6f}")
+                lines.append(f"{metric}_max{labels} {peak:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+def _prom_name(name: str) -> str:
+    return "".join(ch if ch.isalnum() else "_" for ch in name)
+
+
+def _prom_label_value(value) -> str:
+    # Текстовый формат Prometheus: в значении метки экранируются \, " и перевод строки
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    inner = ",".join(f'{k}="{_prom_label_value(v)}"' for k, v in key)
+    return "{" + inner + "}"
+
+
+METRICS = Metrics()
+METRICS.enable(os.environ.get("VKR_METRICS") == "1")
+
+
+# ================= ЛОГИ =================
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись; поля из extra=... попадают в объект как есть."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"vkr.{name}")
+
+
+def configure_logging(level: str = "INFO", fmt: str = "text", stream=None):
+    """
+    Настраивает логгер "vkr". fmt: 'text' — как прежние print(), 'json' — структурированно.
+    """
+    handler = logging.StreamHandler(stream or sys.stdout)
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(message)s"))
+
+    root = logging.getLogger("vkr")
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+    return root
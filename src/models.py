@@ -1,27 +1,169 @@
 # src/models.py
 from pydantic import BaseModel, Field, ConfigDict, field_validator
-from typing import List, Optional, Union
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+from src.metrics import get_logger
+
+logger = get_logger("models")
 
 # --- Вспомогательная модель для одного дня ---
 class DayStatus(BaseModel):
     day: int
     value: str
 
-# --- Основная модель водителя ---
-class Driver(BaseModel):
+# --- Коды дней табеля ---
+# Значения ячеек ("1", "2", "В", ...) хранятся байтами: индекс в общей таблице значений.
+# Код 0 — дня нет в табеле (get_status_for_day вернет "Unknown").
+# Таблица общая для процесса: новые значения добавляются под замком (табели может
+# читать и фоновый поток SnapshotStore), чтение идет без замка.
+# Когда таблица заполнена, новые значения получают общий код UNKNOWN_DAY_CODE:
+# день считается нерабочим, файл загружается целиком.
+MAX_DAY_VALUES = 255  # кодов в байте, кроме 0
+UNKNOWN_DAY_VALUE = "Unknown"
+UNKNOWN_DAY_CODE = 1
+DAY_VALUES: List[Optional[str]] = [None, UNKNOWN_DAY_VALUE]
+_DAY_CODES: Dict[str, int] = {UNKNOWN_DAY_VALUE: UNKNOWN_DAY_CODE}
+_DAY_CODES_LOCK = threading.Lock()
+_overflow_logged = False
+
+
+def encode_day_value(value: str) -> int:
+    global _overflow_logged
+    code = _DAY_CODES.get(value)
+    if code is not None:
+        return code
+    with _DAY_CODES_LOCK:
+        code = _DAY_CODES.get(value)
+        if code is None:
+            if len(DAY_VALUES) > MAX_DAY_VALUES:
+                if not _overflow_logged:
+                    _overflow_logged = True
+                    logger.warning(
+                        f"Таблица кодов табеля заполнена ({MAX_DAY_VALUES} разных значений): "
+                        f"{value!r} и следующие новые значения читаются как {UNKNOWN_DAY_VALUE!r}. "
+                        f"Ожидаются коды вида 1, 2, В, Б, О — проверьте табели: python main.py validate")
+                return UNKNOWN_DAY_CODE
+            code = len(DAY_VALUES)
+            # Сначала значение, потом код: читатель без замка не увидит код без значения
+            DAY_VALUES.append(value)
+            _DAY_CODES[value] = code
+    return code
+
+
+def encode_days(days: List[dict]) -> bytes:
+    """
+    [{"day": 1, "value": "1"}, ...] → bytes, где i-й байт — код дня i+1.
+    Типы не приводятся: день — int, значение — str, иначе TypeError/KeyError
+    (такие записи разбирает DriverRecord, см. database.read_drivers_file).
+    """
+    if not days:
+        return b""
+    codes = bytearray(max(d["day"] for d in days))
+    for d in days:
+        day, value = d["day"], d["value"]
+        if type(day) is not int or type(value) is not str:
+            raise TypeError(f"день табеля {day!r}: {value!r}")
+        if day >= 1:
+            codes[day - 1] = encode_day_value(value)
+    return bytes(codes)
+
+
+# --- Запись водителя в drivers_json (схема прежней pydantic-модели Driver) ---
+class DriverRecord(BaseModel):
+    """Проверка записи, которая не прошла быстрый разбор read_drivers_file: те же ошибки, что раньше."""
+    model_config = ConfigDict(title="Driver")
+
     id: int = Field(alias="tab_number")
     schedule_pattern: str = Field(alias="schedule")
     shift_preference: str = Field(alias="mode")
     days_list: List[DayStatus] = Field(alias="days")
-    assigned_route_number: Optional[str] = None # Теперь храним как строку!
-    month: Optional[str] = None 
+
+
+# --- Водитель: одна запись на человека + компактные помесячные табели ---
+class DriverProfile:
+    """Постоянные данные водителя. Один объект на (таб.№, график, режим) на всю загрузку."""
+    __slots__ = ("id", "schedule_pattern", "shift_preference", "assigned_route_number")
+
+    def __init__(self, id: int, schedule_pattern: str, shift_preference: str,
+                 assigned_route_number: Optional[str] = None):
+        self.id = id
+        self.schedule_pattern = schedule_pattern
+        self.shift_preference = shift_preference
+        self.assigned_route_number = assigned_route_number  # закрепление по умолчанию
+
+    def __repr__(self):
+        return (f"DriverProfile(id={self.id}, schedule={self.schedule_pattern!r}, "
+                f"mode={self.shift_preference!r}, route={self.assigned_route_number!r})")
+
+
+class Driver:
+    """
+    Водитель в конкретном месяце: ссылка на профиль + коды дней.
+    Маршрут хранится здесь, только если в этом месяце он отличается от профиля.
+    """
+    __slots__ = ("profile", "month", "year", "codes", "route")
+
+    def __init__(self, profile: DriverProfile, codes: bytes, month: Optional[str] = None,
+                 year: Optional[int] = None, route: Optional[str] = None):
+        self.profile = profile
+        self.codes = codes
+        self.month = month
+        self.year = year
+        self.route = route
+
+    @property
+    def id(self) -> int:
+        return self.profile.id
+
+    @property
+    def schedule_pattern(self) -> str:
+        return self.profile.schedule_pattern
+
+    @property
+    def shift_preference(self) -> str:
+        return self.profile.shift_preference
+
+    @property
+    def assigned_route_number(self) -> Optional[str]:
+        return self.route if self.route is not None else self.profile.assigned_route_number
+
+    @assigned_route_number.setter
+    def assigned_route_number(self, value: Optional[str]):
+        self.route = None if value == self.profile.assigned_route_number else value
 
     def get_status_for_day(self, day_num: int) -> str:
-        found = next((d for d in self.days_list if d.day == day_num), None)
-        if found:
-            return found.value
+        if 1 <= day_num <= len(self.codes):
+            code = self.codes[day_num - 1]
+            if code:
+                return DAY_VALUES[code]
         return "Unknown"
 
+    def iter_days(self):
+        """(день, значение) для дней, которые есть в табеле."""
+        for i, code in enumerate(self.codes):
+            if code:
+                yield i + 1, DAY_VALUES[code]
+
+    @property
+    def days_list(self) -> List[DayStatus]:
+        # Для совместимости: собирается на лету, в памяти не хранится
+        return [DayStatus(day=day, value=value) for day, value in self.iter_days()]
+
+    # Коды зависят от порядка загрузки в процессе, поэтому между процессами передаются значения
+    def __getstate__(self):
+        values = [DAY_VALUES[c] for c in self.codes]
+        return self.profile, self.month, self.year, self.route, values
+
+    def __setstate__(self, state):
+        self.profile, self.month, self.year, self.route, values = state
+        self.codes = bytes(0 if v is None else encode_day_value(v) for v in values)
+
+    def __repr__(self):
+        return f"Driver(id={self.id}, month={self.month!r}, year={self.year!r}, route={self.assigned_route_number!r})"
+
+
 # --- Модели маршрута ---
 class TimeWindow(BaseModel):
     start: str = Field(alias="отправление")
@@ -55,9 +197,202 @@ class RouteSchedule(BaseModel):
 class Assignment(BaseModel):
     driver_id: int
     route_number: Union[str, int] # И тут разрешаем число
+    # Если указаны — закрепление действует только в этом месяце
+    month: Optional[str] = None
+    year: Optional[int] = None
 
     # ВАЛИДАТОР: Превращает int в str автоматически
     @field_validator('route_number')
     @classmethod
     def force_string(cls, v):
-        return str(v)
\ No newline at end of file
+        return str(v)
+
+# --- Результат наряда ---
+# Объекты со __slots__: водитель хранится числом, резерв — полем source,
+# словари в формате JSON результатов собираются только в to_dict()
+# (json.dump(..., default=roster_json) вызывает его при записи).
+RESERVE_MARK = " (Рез)"
+SHIFT_LABELS = {1: "утро", 2: "вечер"}
+_NO_WARNINGS: tuple = ()
+
+
+class ShiftAssignment:
+    """Смена вагона: водитель, откуда взят ("main"/"reserve"), предупреждения, начало и длительность."""
+    __slots__ = ("number", "required", "driver_id", "source", "warnings", "start", "duration")
+
+    def __init__(self, number: int, required: bool = True):
+        self.number = number
+        self.required = required  # смена есть в расписании
+        self.driver_id: Optional[int] = None
+        self.source: Optional[str] = None
+        self.warnings = _NO_WARNINGS
+        self.start: Optional[datetime] = None
+        self.duration: Optional[float] = None
+
+    def assign(self, driver_id: int, source: str, warnings=_NO_WARNINGS,
+               start: Optional[datetime] = None, duration: Optional[float] = None):
+        self.driver_id = int(driver_id)
+        self.source = source
+        self.warnings = warnings or _NO_WARNINGS
+        self.start = start
+        self.duration = duration
+
+    def clear(self):
+        self.driver_id = self.source = self.start = self.duration = None
+        self.warnings = _NO_WARNINGS
+
+    @property
+    def filled(self) -> bool:
+        return self.driver_id is not None
+
+    @property
+    def is_reserve(self) -> bool:
+        return self.source == "reserve"
+
+    @property
+    def driver(self) -> Optional[str]:
+        """Водитель как в JSON результатов: "123" или "123 (Рез)"."""
+        if self.driver_id is None:
+            return None
+        return f"{self.driver_id}{RESERVE_MARK}" if self.is_reserve else str(self.driver_id)
+
+    def to_dict(self) -> dict:
+        return {"driver": self.driver, "warnings": list(self.warnings)}
+
+    @classmethod
+    def from_dict(cls, number: int, data, required: bool = True) -> "ShiftAssignment":
+        """Смена из JSON: {"driver": "123 (Рез)", "warnings": [...]} или строка старого плоского формата."""
+        shift = cls(number, required)
+        driver, warnings = (data.get("driver"), data.get("warnings")) if isinstance(data, dict) else (data, None)
+        if driver is not None:
+            driver = str(driver)
+            is_reserve = driver.endswith(RESERVE_MARK)
+            driver_id = driver[:-len(RESERVE_MARK)] if is_reserve else driver
+            shift.assign(int(driver_id), "reserve" if is_reserve else "main", tuple(warnings or ()))
+        return shift
+
+    def __repr__(self):
+        return f"ShiftAssignment({self.number}, driver={self.driver!r}, warnings={list(self.warnings)!r})"
+
+
+class TramRoster:
+    """Наряд одного вагона: утренняя и вечерняя смены."""
+    __slots__ = ("tram_number", "shift_1", "shift_2")
+
+    def __init__(self, tram_number: str, shift_1_required: bool = True, shift_2_required: bool = True):
+        self.tram_number = tram_number
+        self.shift_1 = ShiftAssignment(1, shift_1_required)
+        self.shift_2 = ShiftAssignment(2, shift_2_required)
+
+    def shift(self, number) -> ShiftAssignment:
+        """Смена по номеру: 1/"1" — утро, 2/"2" — вечер."""
+        return self.shift_1 if str(number) == "1" else self.shift_2
+
+    @property
+    def shifts(self) -> Tuple[ShiftAssignment, ShiftAssignment]:
+        return self.shift_1, self.shift_2
+
+    @property
+    def issues(self) -> List[str]:
+        """Незакрытые смены из расписания: ["Нет водителя (утро)", ...]."""
+        return [f"Нет водителя ({SHIFT_LABELS[s.number]})" for s in self.shifts if s.required and not s.filled]
+
+    @property
+    def warnings_count(self) -> int:
+        return len(self.shift_1.warnings) + len(self.shift_2.warnings)
+
+    def to_dict(self) -> dict:
+        return {"tram_number": self.tram_number, "shift_1": self.shift_1.to_dict(),
+                "shift_2": self.shift_2.to_dict(), "issues": self.issues}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TramRoster":
+        tram = cls.__new__(cls)
+        tram.tram_number = data.get("tram_number")
+        issues = " ".join(data.get("issues", []))
+        for n in (1, 2):
+            raw = data[f"shift_{n}"] if f"shift_{n}" in data else data.get(f"shift_{n}_driver")
+            # Обязательность в файле не хранится: смена с водителем или с пометкой "Нет водителя"
+            shift = ShiftAssignment.from_dict(n, raw)
+            shift.required = shift.filled or SHIFT_LABELS[n] in issues
+            setattr(tram, f"shift_{n}", shift)
+        return tram
+
+    def __repr__(self):
+        return f"TramRoster({self.tram_number!r}, {self.shift_1.driver!r}, {self.shift_2.driver!r})"
+
+
+class DayRoster:
+    """
+    Наряд маршрута на день. error — расчет не выполнен (например, нет расписания),
+    тогда trams пуст. leftover — таб.№ водителей, оставшихся без смены.
+    """
+    __slots__ = ("day", "route", "day_name", "day_type", "trams", "leftover", "error")
+
+    def __init__(self, day: Optional[int] = None, route: Optional[str] = None, day_name: Optional[str] = None,
+                 day_type: Optional[str] = None, trams: Optional[List[TramRoster]] = None,
+                 leftover: Optional[List[int]] = None, error: Optional[str] = None):
+        self.day = day
+        self.route = route
+        self.day_name = day_name
+        self.day_type = day_type
+        self.trams = trams if trams is not None else []
+        self.leftover = leftover if leftover is not None else []
+        self.error = error
+
+    @classmethod
+    def failed(cls, error: str, day: Optional[int] = None, route: Optional[str] = None) -> "DayRoster":
+        return cls(day=day, route=route, error=error)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def iter_shifts(self):
+        """(вагон, смена) по всем сменам дня."""
+        for tram in self.trams:
+            yield tram, tram.shift_1
+            yield tram, tram.shift_2
+
+    def unfilled_count(self) -> int:
+        return sum(1 for _, s in self.iter_shifts() if s.required and not s.filled)
+
+    def warnings_count(self) -> int:
+        return sum(tram.warnings_count for tram in self.trams)
+
+    def to_dict(self) -> dict:
+        if self.error is not None:
+            return {"error": self.error}
+        return {
+            "date": self.day,
+            "route": self.route,
+            "day_name": self.day_name,
+            "day_type": self.day_type,
+            "roster": [tram.to_dict() for tram in self.trams],
+            "stats": {"leftover": len(self.leftover)},
+            "drivers_leftover": list(self.leftover),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DayRoster":
+        """Результат дня из JSON (в том числе старые файлы без day_name/drivers_leftover)."""
+        if "error" in data:
+            return cls.failed(data["error"], data.get("date"), data.get("route"))
+        leftover = data.get("drivers_leftover")
+        if leftover is None:
+            # В старых файлах только число; номера неизвестны
+            leftover = [None] * data.get("stats", {}).get("leftover", 0)
+        return cls(day=data.get("date"), route=data.get("route"), day_name=data.get("day_name"),
+                   day_type=data.get("day_type"), trams=[TramRoster.from_dict(t) for t in data.get("roster", [])],
+                   leftover=list(leftover))
+
+    def __repr__(self):
+        if self.error is not None:
+            return f"DayRoster(route={self.route!r}, day={self.day!r}, error={self.error!r})"
+        return f"DayRoster(route={self.route!r}, day={self.day!r}, trams={len(self.trams)}, leftover={len(self.leftover)})"
+
+
+def roster_json(obj):
+    """default для json.dump: объекты наряда → словари, остальное (даты) → строка."""
+    to_dict = getattr(obj, "to_dict", None)
+    return to_dict() if to_dict is not None else str(obj)
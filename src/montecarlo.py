@@ -0,0 +1,249 @@
+# src/montecarlo.py
+"""
+Монте-Карло по больничным: сколько резерва "ANY" нужно маршрутам.
+
+Каждый прогон — месяц нарядов generate_daily_roster по каждому маршруту,
+где поверх табелей наложены случайные отсутствия (через Scenario, база не меняется).
+Отсутствие начинается в день d с вероятностью day_probs[d] и длится
+в среднем mean_duration дней (геометрическое распределение).
+Прогоны детерминированы: прогон i использует генератор от (seed, i).
+Дни идут по порядку, маршруты внутри дня — одним анализатором, как в run_depot
+и непрерывном моделировании: резерв общий, водитель резерва за день занят на одном маршруте.
+Потребность в резерве за день — незакрытые смены плюс смены, закрытые резервом;
+она считается по маршрутам и по депо в целом (сумма маршрутов за тот же день).
+
+Прогоны раздаются пачками в пул процессов; каждый процесс загружает
+данные один раз (initializer) и дальше считает только наряды.
+
+Запуск: python main.py montecarlo --month Март --runs 2000 --prob 0.02
+"""
+import calendar
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.utils import MONTH_MAP
+
+MAX_WORKERS = None  # None → по числу ядер
+CHUNK_SIZE = 50     # прогонов на одну задачу пула
+RESERVE_ROUTE = "ANY"
+
+
+@dataclass
+class AbsenceModel:
+    probability: float = 0.02           # вероятность начала отсутствия в любой день
+    # Переопределение по дням недели: {0: 0.03, 4: 0.03} (0 — понедельник)
+    weekday: Dict[int, float] = field(default_factory=dict)
+    mean_duration: float = 3.0          # средняя длительность отсутствия, дней
+
+    def day_probs(self, year: int, month_num: int) -> np.ndarray:
+        days = calendar.monthrange(year, month_num)[1]
+        probs = np.full(days, self.probability, dtype=np.float64)
+        for day in range(days):
+            wd = calendar.weekday(year, month_num, day + 1)
+            if wd in self.weekday:
+                probs[day] = self.weekday[wd]
+        return probs
+
+    def sample(self, rng: np.random.Generator, n_drivers: int, probs: np.ndarray) -> np.ndarray:
+        """Матрица отсутствий (водители × дни), bool."""
+        days = len(probs)
+        starts = rng.random((n_drivers, days)) < probs
+        absent = np.zeros((n_drivers, days), dtype=bool)
+        rows, cols = np.nonzero(starts)
+        if len(rows):
+            lengths = rng.geometric(1.0 / max(self.mean_duration, 1.0), size=len(rows))
+            for r, c, length in zip(rows, cols, lengths):
+                absent[r, c:c + length] = True
+        return absent
+
+
+# ================= ПРОЦЕСС-ИСПОЛНИТЕЛЬ =================
+
+# Состояние процесса: данные месяца, загруженные один раз
+_STATE: Dict[str, object] = {}
+
+
+def _init_worker(data_folder: str, month: str, year: int, routes: Optional[List[str]],
+                 model: AbsenceModel, mode: str):
+    from src.database import DataLoader
+    from src.metrics import configure_logging
+    from src.scenarios import DriverOverlay
+
+    configure_logging("WARNING")
+    db = DataLoader(data_folder)
+    db.load_all()
+
+    if routes is None:
+        routes = sorted({str(s.route_number) for s in db.schedules} - {RESERVE_ROUTE}, key=lambda r: (len(r), r))
+    wanted = set(routes) | {RESERVE_ROUTE}
+    # Только водители нужного месяца; дни табеля — словарь вместо поиска по списку
+    drivers = [
+        DriverOverlay(d, dict(d.iter_days()), str(d.assigned_route_number))
+        for d in db.drivers
+        if d.month == month and d.year in (None, year) and str(d.assigned_route_number) in wanted
+    ]
+    _STATE.update(
+        base=SimpleNamespace(drivers=drivers, schedules=db.schedules, assignments=[]),
+        month=month, year=year, routes=list(routes), model=model, mode=mode,
+        probs=model.day_probs(year, MONTH_MAP[month]),
+    )
+
+
+def _run_chunk(seed: int, run_ids: List[int]) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Прогоны run_ids; для каждого маршрута массивы (прогоны × дни):
+    незакрытые смены, смены резерва и недоотдых.
+    """
+    from src.scenarios import Scenario
+    from src.scheduler import WorkforceAnalyzer
+
+    base = _STATE["base"]
+    month, year, routes = _STATE["month"], _STATE["year"], _STATE["routes"]
+    probs, model, mode = _STATE["probs"], _STATE["model"], _STATE["mode"]
+    days = len(probs)
+
+    unfilled = {r: np.zeros((len(run_ids), days), dtype=np.int16) for r in routes}
+    violations = {r: np.zeros((len(run_ids), days), dtype=np.int16) for r in routes}
+    reserve = {r: np.zeros((len(run_ids), days), dtype=np.int16) for r in routes}
+
+    for i, run_id in enumerate(run_ids):
+        rng = np.random.default_rng([seed, run_id])
+        absent = model.sample(rng, len(base.drivers), probs)
+
+        scenario = Scenario(base, f"run-{run_id}")
+        for row, col in zip(*np.nonzero(absent)):
+            scenario.set_cell(base.drivers[row].id, month, int(col) + 1, "Б")
+
+        analyzer = WorkforceAnalyzer(scenario)
+        for day in range(1, days + 1):
+            for route in routes:
+                result = analyzer.generate_daily_roster(route, day, month, year, mode=mode)
+                if not result.ok:
+                    continue
+                unfilled[route][i, day - 1] = result.unfilled_count()
+                violations[route][i, day - 1] = result.warnings_count()
+                reserve[route][i, day - 1] = sum(1 for _, s in result.iter_shifts() if s.is_reserve)
+
+    return {r: {"unfilled": unfilled[r], "violations": violations[r], "reserve": reserve[r]} for r in routes}
+
+
+# ================= ЗАПУСК =================
+
+def run_montecarlo(month: str, year: int, routes: Optional[List[str]] = None, runs: int = 1000,
+                   model: Optional[AbsenceModel] = None, seed: int = 0, data_folder: str = "data",
+                   mode: str = "real", max_workers: Optional[int] = MAX_WORKERS) -> dict:
+    """
+    Выполняет runs прогонов и возвращает сводку по маршрутам (см. summarize).
+    routes=None — все маршруты из расписания, кроме резерва.
+    """
+    if runs < 1:
+        raise ValueError(f"Число прогонов должно быть не меньше 1, получено {runs}")
+    model = model or AbsenceModel()
+
+    chunks = [list(range(start, min(start + CHUNK_SIZE, runs))) for start in range(0, runs, CHUNK_SIZE)]
+    init_args = (data_folder, month, year, routes, model, mode)
+    workers = max_workers or os.cpu_count() or 1
+
+    if workers == 1 or len(chunks) == 1:
+        _init_worker(*init_args)
+        started = time.perf_counter()
+        parts = [_run_chunk(seed, chunk) for chunk in chunks]
+    else:
+        # Здесь в замер входит и загрузка данных в каждом процессе
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            parts = list(pool.map(_run_chunk, [seed] * len(chunks), chunks))
+    elapsed = time.perf_counter() - started
+
+    merged = {
+        r: {key: np.concatenate([p[r][key] for p in parts]) for key in ("unfilled", "violations", "reserve")}
+        for r in parts[0]
+    }
+    summary = summarize(merged)
+    summary["meta"] = {
+        "month": month, "year": year, "runs": runs, "seed": seed, "mode": mode,
+        "model": {"probability": model.probability, "weekday": model.weekday,
+                  "mean_duration": model.mean_duration},
+        "seconds": round(elapsed, 3),
+        "runs_per_second": round(runs / elapsed, 2) if elapsed else None,
+    }
+    return summary
+
+
+def _dist(values: np.ndarray) -> dict:
+    return {
+        "mean": round(float(values.mean()), 3),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "max": int(values.max()),
+    }
+
+
+def _reserve_needed(need: np.ndarray) -> int:
+    """95-й перцентиль по прогонам худшего дня потребности (прогоны × дни)."""
+    return int(np.ceil(np.percentile(need.max(axis=1), 95)))
+
+
+def summarize(merged: Dict[str, Dict[str, np.ndarray]]) -> dict:
+    """
+    По маршруту: распределения за месяц, по дням и оценка нужного резерва —
+    95-й перцентиль худшего дня по незакрытым сменам плюс сменам резерва
+    (столько водителей резерва маршрут занимал бы в худший день).
+    По депо — то же для суммы маршрутов за день: маршрутные оценки берутся
+    в разные дни, поэтому их сумма — только верхняя граница.
+    """
+    routes = {}
+    depot_need = None
+    for route, data in merged.items():
+        unfilled, violations, reserve = data["unfilled"], data["violations"], data["reserve"]
+        need = unfilled.astype(np.int32) + reserve
+        depot_need = need if depot_need is None else depot_need + need
+        routes[route] = {
+            "unfilled_per_month": _dist(unfilled.sum(axis=1)),
+            "violations_per_month": _dist(violations.sum(axis=1)),
+            "reserve_shifts_per_month": _dist(reserve.sum(axis=1)),
+            "reserve_needed_p95": _reserve_needed(need),
+            "days": {
+                str(day + 1): {
+                    "unfilled": _dist(unfilled[:, day]),
+                    "p_unfilled": round(float((unfilled[:, day] > 0).mean()), 4),
+                    "reserve": _dist(reserve[:, day]),
+                    "violations": _dist(violations[:, day]),
+                }
+                for day in range(unfilled.shape[1])
+            },
+        }
+    depot = {}
+    if depot_need is not None:
+        depot = {
+            "reserve_per_day": _dist(depot_need.ravel()),
+            "reserve_needed_p95": _reserve_needed(depot_need),
+        }
+    return {"routes": routes, "depot": depot}
+
+
+def print_summary(summary: dict):
+    meta = summary["meta"]
+    print(f"\n--- МОНТЕ-КАРЛО: {meta['month']} {meta['year']}, прогонов {meta['runs']} ---")
+    print(f"Скорость: {meta['runs_per_second']} прогонов/с ({meta['seconds']} с)")
+    print(f"\n{'Маршрут':<10} {'Незакр./мес (ср, p95)':>24} {'Недоотдых/мес (ср, p95)':>26} {'Резерв p95':>11}")
+    for route, stats in summary["routes"].items():
+        u, v = stats["unfilled_per_month"], stats["violations_per_month"]
+        print(f"{route:<10} {u['mean']:>14.2f} {u['p95']:>9.1f} {v['mean']:>16.2f} {v['p95']:>9.1f} "
+              f"{stats['reserve_needed_p95']:>11}")
+    if summary.get("depot"):
+        print(f"{'Депо':<10} {'':>24} {'':>26} {summary['depot']['reserve_needed_p95']:>11}")
+
+
+def save_summary(summary: dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"Результаты сохранены: {path}")
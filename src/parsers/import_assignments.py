@@ -1,10 +1,16 @@
 import pandas as pd
-import json
 import os
+import sys
+from pathlib import Path
+
+# Корень проекта в sys.path, чтобы скрипт можно было запускать из его папки
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.db.assignment_registry import AssignmentRegistry
 
 # НАСТРОЙКИ
-EXCEL_PATH = "../../data/закрепления.xlsx"
-JSON_PATH = "../../data/assignments.json"
+DATA_DIR = os.environ.get("VKR_DATA_DIR", "../../data")  # папку данных задает ETL (src/pipeline.py)
+EXCEL_PATH = os.path.join(DATA_DIR, "закрепления.xlsx")
+JSON_PATH = os.path.join(DATA_DIR, "assignments.json")
 RESERVE_ROUTE_NAME = "ANY"  # Как будем называть "свободных" водителей
 
 
@@ -42,35 +48,24 @@ def run_import():
 
     print(f"🔍 Найдено в Excel {len(new_entries)} водителей.")
 
-    # --- ЗАГРУЗКА И СЛИЯНИЕ С СУЩЕСТВУЮЩИМ JSON ---
-    existing_data = []
-    if os.path.exists(JSON_PATH):
-        try:
-            with open(JSON_PATH, "r", encoding="utf-8") as f:
-                existing_data = json.load(f)
-        except json.JSONDecodeError:
-            print("⚠️ Существующий JSON был пуст или поврежден. Создаем новый.")
+    # --- ЗАГРУЗКА И СЛИЯНИЕ С СУЩЕСТВУЮЩИМИ ЗАКРЕПЛЕНИЯМИ ---
+    registry = AssignmentRegistry(JSON_PATH)
+    try:
+        registry.load()
+    except ValueError:
+        print("⚠️ Существующий JSON был пуст или поврежден. Создаем новый.")
 
-    # Создаем список уже существующих ID, чтобы не дублировать
+    # Уже закрепленных не трогаем
     # (Если водитель 101 уже закреплен за маршрутом 1, мы не должны добавлять его в ANY)
-    existing_ids = {item["driver_id"] for item in existing_data}
+    added_count = registry.add_many_if_absent(
+        (entry["driver_id"] for entry in new_entries), RESERVE_ROUTE_NAME
+    )
 
-    added_count = 0
-    for entry in new_entries:
-        if entry["driver_id"] not in existing_ids:
-            existing_data.append(entry)
-            added_count += 1
-        else:
-            # Опционально: можно написать print, если хочешь знать, кого пропустили
-            pass
-
-    # --- СОХРАНЕНИЕ ---
-    with open(JSON_PATH, "w", encoding="utf-8") as f:
-        json.dump(existing_data, f, ensure_ascii=False, indent=2)
+    # --- СОХРАНЕНИЕ (атомарно: журнал сворачивается в новый assignments.json) ---
+    registry.compact()
 
     print(f"✅ Готово! Добавлено {added_count} новых водителей в группу '{RESERVE_ROUTE_NAME}'.")
-    print(f"   Всего закреплений теперь: {len(existing_data)}")
-
+    print(f"   Всего закреплений теперь: {len(registry.records())}")
 
 if __name__ == "__main__":
     run_import()
\ No newline at end of file
@@ -3,9 +3,10 @@ import re
 import json
 import os
 
-os.makedirs("../../data", exist_ok=True)
-output_path = "../../data/schedule.json"
-file_path = "../../data/data.xlsx"
+DATA_DIR = os.environ.get("VKR_DATA_DIR", "../../data")  # папку данных задает ETL (src/pipeline.py)
+os.makedirs(DATA_DIR, exist_ok=True)
+output_path = os.path.join(DATA_DIR, "schedule.json")
+file_path = os.path.join(DATA_DIR, "data.xlsx")
 
 sheet_names = pd.ExcelFile(file_path).sheet_names[2:]
 all_schedules = []
@@ -1,16 +1,31 @@
 import json
+import os
+import sys
+import hashlib
 import calendar
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from openpyxl import load_workbook
 
+# Корень проекта в sys.path, чтобы скрипт можно было запускать из его папки
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.metrics import METRICS
+
 # --- Пути ---
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent.parent
 
-TABELS_DIR = PROJECT_ROOT / "data" / "tabeles_2026"
-OUTPUT_DIR = PROJECT_ROOT / "data" / "drivers_json"
+# Папку данных задает ETL (src/pipeline.py); по умолчанию data/ проекта
+DATA_DIR = Path(os.environ.get("VKR_DATA_DIR", PROJECT_ROOT / "data"))
+TABELS_DIR = DATA_DIR / "tabeles_2026"
+OUTPUT_DIR = DATA_DIR / "drivers_json"
 YEAR = 2026
 
+# Манифест с хешами входных файлов: неизменившиеся месяцы не пересчитываются
+MANIFEST_PATH = OUTPUT_DIR / ".manifest.json"
+MANIFEST_VERSION = 1
+MAX_WORKERS = None  # None → по числу ядер
+
 # Английские → русские названия месяцев (для содержимого JSON)
 EN_TO_RU_MONTH = {
     "january": "Январь",
@@ -47,18 +62,22 @@ def extract_english_month(filename: str) -> str | None:
 
 
 def parse_whole_sheet(sheet_rows, en_month: str, year: int):
-    """Парсит одну таблицу в структуру водителей."""
+    """
+    Парсит одну таблицу в структуру водителей.
+    sheet_rows может быть списком или генератором строк (потоковое чтение).
+    """
     month_num = EN_MONTH_TO_NUM[en_month]
     days_in_month = calendar.monthrange(year, month_num)[1]
 
-    if not sheet_rows:
+    rows = iter(sheet_rows)
+    header = next(rows, None)
+    if header is None:
         return []
 
-    header = sheet_rows[0]
     total_columns_expected = len(header)
     drivers = []
 
-    for row in sheet_rows[1:]:
+    for row in rows:
         if len(row) < total_columns_expected:
             row = list(row) + [None] * (total_columns_expected - len(row))
         if len(row) < 5:
@@ -90,7 +109,80 @@ def parse_whole_sheet(sheet_rows, en_month: str, year: int):
     return drivers
 
 
-def main():
+def iter_sheet_rows(file_path: Path, sheet_name: str = SHEET_NAME):
+    """
+    Потоково отдает строки листа (read_only режим openpyxl).
+    Строки не материализуются в список — каждая обрабатывается по мере чтения.
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        if sheet_name not in workbook.sheetnames:
+            raise KeyError(f"Лист '{sheet_name}' не найден в {file_path.name}")
+        yield from workbook[sheet_name].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def file_sha256(file_path: Path) -> str:
+    """Хеш содержимого файла (читаем блоками, чтобы не держать файл в памяти)."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {}
+    # При смене формата манифеста или года пересчитываем все
+    if data.get("version") != MANIFEST_VERSION or data.get("year") != YEAR:
+        return {}
+    return data.get("files", {})
+
+
+def save_manifest(files: dict, path: Path = MANIFEST_PATH):
+    """Атомарная запись манифеста (через временный файл)."""
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "year": YEAR, "files": files},
+                  f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def convert_month_file(file_path: Path, en_month: str, output_dir: Path = OUTPUT_DIR):
+    """
+    Конвертирует один месячный табель в drivers_<month>.json.
+    Выполняется в отдельном процессе. Возвращает (кол-во водителей, ошибка).
+    """
+    try:
+        with METRICS.span("etl.parse"):
+            drivers = parse_whole_sheet(iter_sheet_rows(file_path), en_month, YEAR)
+
+        # Имя файла: drivers_january.json
+        output_file = output_dir / f"drivers_{en_month}.json"
+        result_data = {
+            "month": EN_TO_RU_MONTH[en_month],  # Внутри — по-русски, как вы просили
+            "year": YEAR,
+            "drivers": drivers
+        }
+
+        with METRICS.span("etl.write"), open(output_file, "w", encoding="utf-8") as f:
+            json.dump(result_data, f, ensure_ascii=False, indent=2)
+
+        return len(drivers), None
+
+    except Exception as e:
+        return 0, str(e)
+
+
+def main(force: bool = False, inline: bool = False):
+    """inline=True — все месяцы в текущем процессе (нужно для профилирования)."""
     if not TABELS_DIR.exists():
         raise FileNotFoundError(f"Папка с табелями не найдена: {TABELS_DIR}")
 
@@ -104,7 +196,10 @@ def main():
         )
     )
 
-    processed = 0
+    manifest = {} if force else load_manifest()
+    new_manifest = {}
+    jobs = []  # (file_path, en_month, sha256)
+    skipped = 0
 
     for file_path in files:
         en_month = extract_english_month(file_path.name)
@@ -112,38 +207,51 @@ def main():
             print(f"⚠️ Пропущен файл (не распознан месяц): {file_path.name}")
             continue
 
-        ru_month = EN_TO_RU_MONTH[en_month]
-        print(f"Обрабатываю: {file_path.name} → {ru_month} {YEAR}")
-
-        try:
-            workbook = load_workbook(file_path, data_only=True)
-            if SHEET_NAME not in workbook.sheetnames:
-                print(f"  ❌ Лист '{SHEET_NAME}' не найден в {file_path.name}")
-                continue
+        file_hash = file_sha256(file_path)
+        entry = manifest.get(file_path.name)
+        output_file = OUTPUT_DIR / f"drivers_{en_month}.json"
 
-            sheet = workbook[SHEET_NAME]
-            rows = [list(row) for row in sheet.iter_rows(values_only=True)]
-            drivers = parse_whole_sheet(rows, en_month, YEAR)
-
-            # Имя файла: drivers_january.json
-            output_file = OUTPUT_DIR / f"drivers_{en_month}.json"
-            result_data = {
-                "month": ru_month,  # Внутри — по-русски, как вы просили
-                "year": YEAR,
-                "drivers": drivers
-            }
-
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(result_data, f, ensure_ascii=False, indent=2)
+        if entry and entry.get("sha256") == file_hash and output_file.exists():
+            new_manifest[file_path.name] = entry
+            skipped += 1
+            continue
 
-            processed += 1
+        jobs.append((file_path, en_month, file_hash))
 
-        except Exception as e:
-            print(f"  ❌ Ошибка при обработке {file_path.name}: {e}")
+    processed = 0
 
-    print(f"\n✅ Успешно обработано {processed} месяцев.")
+    def _on_done(file_path, en_month, file_hash, count, error):
+        nonlocal processed
+        ru_month = EN_TO_RU_MONTH[en_month]
+        if error:
+            print(f"  ❌ Ошибка при обработке {file_path.name}: {error}")
+            return
+        print(f"Обработан: {file_path.name} → {ru_month} {YEAR} ({count} вод.)")
+        new_manifest[file_path.name] = {"sha256": file_hash, "output": f"drivers_{en_month}.json"}
+        processed += 1
+
+    if len(jobs) == 1 or inline:
+        # Один месяц — без накладных расходов на запуск пула процессов
+        for file_path, en_month, file_hash in jobs:
+            _on_done(file_path, en_month, file_hash, *convert_month_file(file_path, en_month))
+    elif jobs:
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = [(job, pool.submit(convert_month_file, job[0], job[1])) for job in jobs]
+            for (file_path, en_month, file_hash), future in futures:
+                _on_done(file_path, en_month, file_hash, *future.result())
+
+    save_manifest(new_manifest)
+
+    print(f"\n✅ Успешно обработано {processed} месяцев (без изменений пропущено: {skipped}).")
     print(f"Файлы сохранены в: {OUTPUT_DIR.absolute()}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # --profile / --profile=cprofile — профилирование (src/profiling.py), месяцы считаются в этом процессе
+    profile = next((a.partition("=")[2] or "sample" for a in sys.argv[1:] if a.startswith("--profile")), None)
+    if profile:
+        from src.profiling import profile_run
+        with profile_run("parsing_tabel", profile, str(DATA_DIR / "results" / "profile")):
+            main(force="--force" in sys.argv[1:], inline=True)
+    else:
+        main(force="--force" in sys.argv[1:])
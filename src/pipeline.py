@@ -0,0 +1,303 @@
+# src/pipeline.py
+"""
+Инкрементальный ETL: табели → drivers_json, расписание, закрепления → проверка данных.
+
+Каждый этап объявляет входы и выходы (пути/маски относительно папки данных).
+После успешного запуска хеши входов и выходов сохраняются в <данные>/.pipeline_state.json,
+и при следующем запуске этап выполняется, только если его входы изменились
+или выходов нет. Независимые этапы выполняются параллельно.
+Скрипты этапов получают папку данных через переменную окружения VKR_DATA_DIR.
+
+Запуск: python -m src.pipeline [--data data] [--force] [--dry-run]
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+DATA_DIR = PROJECT_ROOT / "data"
+STATE_FILE_NAME = ".pipeline_state.json"
+STATE_VERSION = 1
+
+
+@dataclass
+class Stage:
+    name: str
+    inputs: List[str]
+    outputs: List[str] = field(default_factory=list)
+    script: Optional[str] = None          # путь к скрипту относительно src/
+    func: Optional[Callable[[Path], str]] = None  # или функция в текущем процессе (папка данных → вывод)
+
+    def run(self, data_dir: Path = DATA_DIR) -> str:
+        if self.func is not None:
+            return self.func(data_dir)
+
+        # Скрипты по умолчанию используют пути вида ../../data, поэтому запускаем их из их папки,
+        # а папку данных передаем через VKR_DATA_DIR
+        script_path = SRC_DIR / self.script
+        proc = subprocess.run(
+            [sys.executable, script_path.name],
+            cwd=script_path.parent,
+            env={**os.environ, "VKR_DATA_DIR": str(Path(data_dir).resolve())},
+            capture_output=True, text=True, encoding="utf-8", errors="replace",
+        )
+        output = (proc.stdout or "") + (proc.stderr or "")
+        if proc.returncode != 0:
+            raise RuntimeError(f"{self.script} завершился с кодом {proc.returncode}\n{output}")
+        return output
+
+
+def _validate_data(data_dir: Path) -> str:
+    """Проверка итоговых данных (src/validation.py): ошибки останавливают ETL."""
+    from src.validation import validate_folder
+
+    report = validate_folder(str(data_dir))
+    summary = f"ошибок: {len(report.errors)}, предупреждений: {len(report.warnings)}"
+    if not report.ok:
+        first = report.errors[0]
+        raise RuntimeError(f"Проверка данных не пройдена ({summary}); первая: "
+                           f"{first['file']}: {first['message']}")
+    return f"Проверка данных: {summary}"
+
+
+# Порядок важен: этап зависит от более ранних этапов, чьи выходы он читает
+STAGES = [
+    Stage("tabeles",
+          inputs=["tabeles_2026/february_2026.xlsx"],
+          outputs=["tabeles_2026/*_2026.xlsx"],
+          script="help_functions/clean_parsing_tabeles.py"),
+    Stage("drivers_json",
+          inputs=["tabeles_2026/*.xlsx"],
+          outputs=["drivers_json/drivers_*.json"],
+          script="parsers/parsing_tabel.py"),
+    Stage("schedule",
+          inputs=["data.xlsx"],
+          outputs=["schedule.json"],
+          script="parsers/parsing_schedule.py"),
+    Stage("assignments",
+          inputs=["закрепления.xlsx"],
+          outputs=["assignments.json"],
+          script="parsers/import_assignments.py"),
+    Stage("sync_drivers",
+          inputs=["drivers_json/drivers_april.json", "assignments.json"],
+          outputs=["assignments.json"],
+          script="help_functions/sync_missing_drivers.py"),
+    Stage("validate",
+          inputs=["drivers_json/*.json", "schedule.json", "assignments.json"],
+          func=_validate_data),
+]
+
+
+# ================= ХЕШИ =================
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashCache:
+    """
+    Хеши файлов с быстрым путем по (size, mtime): неизменившийся файл не перечитывается.
+    """
+
+    def __init__(self, data_dir: Path = DATA_DIR, known: Optional[Dict[str, dict]] = None):
+        self.data_dir = Path(data_dir)
+        self.entries: Dict[str, dict] = dict(known or {})
+
+    def get(self, rel_path: str) -> str:
+        path = self.data_dir / rel_path
+        st = path.stat()
+        entry = self.entries.get(rel_path)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["sha256"]
+        sha = file_sha256(path)
+        self.entries[rel_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+        return sha
+
+
+def expand(patterns: List[str], data_dir: Path = DATA_DIR) -> List[str]:
+    """Раскрывает маски в отсортированный список существующих файлов (пути относительно папки данных)."""
+    data_dir = Path(data_dir)
+    found = set()
+    for pattern in patterns:
+        for path in data_dir.glob(pattern):
+            if path.is_file():
+                found.add(path.relative_to(data_dir).as_posix())
+    return sorted(found)
+
+
+def fingerprint(patterns: List[str], hashes: HashCache) -> Dict[str, str]:
+    return {rel: hashes.get(rel) for rel in expand(patterns, hashes.data_dir)}
+
+
+# ================= СОСТОЯНИЕ =================
+
+def state_path(data_dir: Path = DATA_DIR) -> Path:
+    return Path(data_dir) / STATE_FILE_NAME
+
+
+def load_state(data_dir: Path = DATA_DIR) -> dict:
+    path = state_path(data_dir)
+    if not path.exists():
+        return {"stages": {}, "files": {}}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {"stages": {}, "files": {}}
+    if data.get("version") != STATE_VERSION:
+        return {"stages": {}, "files": {}}
+    return data
+
+
+def save_state(state: dict, data_dir: Path = DATA_DIR):
+    """Атомарная запись состояния (через временный файл)."""
+    state["version"] = STATE_VERSION
+    path = state_path(data_dir)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ================= ЗАПУСК =================
+
+def dependencies(stages: List[Stage]) -> Dict[str, List[str]]:
+    """Этап зависит от предыдущих этапов, выходы которых пересекаются с его входами."""
+    deps = {}
+    for i, stage in enumerate(stages):
+        deps[stage.name] = []
+        for prev in stages[:i]:
+            if any(_patterns_overlap(inp, out) for inp in stage.inputs for out in prev.outputs):
+                deps[stage.name].append(prev.name)
+    return deps
+
+
+def _patterns_overlap(a: str, b: str) -> bool:
+    # Маски сравниваются в обе стороны: "drivers_json/*.json" покрывает "drivers_json/drivers_*.json"
+    return a == b or fnmatch(a, b) or fnmatch(b, a)
+
+
+def needs_run(stage: Stage, state: dict, hashes: HashCache) -> Optional[str]:
+    """Причина запуска этапа или None, если этап актуален."""
+    prev = state["stages"].get(stage.name)
+    if prev is None:
+        return "ещё не запускался"
+    if fingerprint(stage.inputs, hashes) != prev.get("inputs"):
+        return "изменились входы"
+    for pattern in stage.outputs:
+        if not expand([pattern], hashes.data_dir):
+            return f"нет выходов {pattern}"
+    return None
+
+
+def run_pipeline(stages: List[Stage] = STAGES, force: bool = False, dry_run: bool = False,
+                 max_workers: int = 4, data_dir=DATA_DIR) -> Dict[str, str]:
+    """
+    Запускает устаревшие этапы с учетом зависимостей для папки данных data_dir.
+    Возвращает статус каждого этапа: 'ok', 'актуален', 'ошибка', 'пропущен'.
+    """
+    data_dir = Path(data_dir)
+    state = load_state(data_dir)
+    hashes = HashCache(data_dir, state.get("files"))
+    deps = dependencies(stages)
+    by_name = {s.name: s for s in stages}
+
+    status: Dict[str, str] = {}
+    pending = [s.name for s in stages]
+    running = {}
+
+    def _finish(name, result, inputs):
+        status[name] = result
+        if result == "ok":
+            stage = by_name[name]
+            outputs = fingerprint(stage.outputs, hashes)
+            # Входы — снятые при запуске: правка входа во время работы этапа даст перезапуск.
+            # Файл, который этап сам перезаписывает (вход и выход), — после записи
+            state["stages"][name] = {
+                "inputs": {rel: outputs.get(rel, sha) for rel, sha in inputs.items()},
+                "outputs": outputs,
+                "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            state["files"] = hashes.entries
+            save_state(state, data_dir)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for name in list(pending):
+                if any(d not in status for d in deps[name]):
+                    continue
+                pending.remove(name)
+
+                if any(status[d] in ("ошибка", "пропущен") for d in deps[name]):
+                    status[name] = "пропущен"
+                    print(f"⏭  {name}: пропущен (ошибка в зависимостях)")
+                    continue
+
+                reason = "принудительно" if force else needs_run(by_name[name], state, hashes)
+                if reason is None:
+                    status[name] = "актуален"
+                    print(f"✔  {name}: актуален")
+                    continue
+
+                print(f"▶  {name}: {reason}")
+                if dry_run:
+                    status[name] = "ok"
+                    continue
+                inputs = fingerprint(by_name[name].inputs, hashes)
+                running[pool.submit(_timed_run, by_name[name], data_dir)] = (name, inputs)
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, inputs = running.pop(future)
+                try:
+                    elapsed, output = future.result()
+                    if output.strip():
+                        print(f"--- {name} ---\n{output.rstrip()}")
+                    print(f"✅ {name}: готово за {elapsed:.1f} с")
+                    _finish(name, "ok", inputs)
+                except Exception as e:
+                    print(f"❌ {name}: {e}")
+                    status[name] = "ошибка"
+
+    return status
+
+
+def _timed_run(stage: Stage, data_dir: Path):
+    started = time.perf_counter()
+    output = stage.run(data_dir)
+    return time.perf_counter() - started, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Инкрементальный ETL данных депо")
+    parser.add_argument("--data", default=str(DATA_DIR), help="папка данных")
+    parser.add_argument("--force", action="store_true", help="перезапустить все этапы")
+    parser.add_argument("--dry-run", action="store_true", help="только показать, что будет запущено")
+    args = parser.parse_args()
+
+    from src.metrics import configure_logging
+    configure_logging()
+    status = run_pipeline(force=args.force, dry_run=args.dry_run, data_dir=args.data)
+    if "ошибка" in status.values():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
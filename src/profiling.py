@@ -0,0 +1,309 @@
+# src/profiling.py
+"""
+Профилирование моделирования и ETL: где уходят время и память.
+
+Этапы — это уже расставленные METRICS.span(...) (load.drivers, load.link,
+roster.schedule_lookup, roster.driver_filter, simulate.save, etl.parse, ...):
+пока профилировщик запущен, каждый span отмечает вход и выход из этапа.
+Поиск кандидата и проверка отдыха вызываются тысячи раз за месяц, поэтому
+своих span у них нет — их доля считается по функциям в стеке (HOT_FUNCTIONS).
+Без профилирования ничего не меняется: span() остается пустым контекстом.
+
+Режимы:
+  sample   — раз в SAMPLE_INTERVAL процессорного времени таймер ITIMER_PROF присылает
+             SIGPROF, и обработчик в основном потоке снимает его стек: сэмплы не
+             привязаны к отпусканию GIL и не копятся в точках ввода-вывода. Где таймера
+             нет (Windows, запуск не из основного потока) — поток-сэмплер, на время
+             сбора sys.setswitchinterval уменьшается ниже интервала.
+             Результат — collapsed stacks (<имя>.collapsed) для flamegraph.pl/speedscope,
+             в начале каждого стека — текущие этапы;
+  cprofile — cProfile для всего запуска: <имя>.pstats и топ функций <имя>.txt.
+В обоих режимах tracemalloc: прирост и пик памяти по этапам и топ мест выделения
+(<имя>_memory.txt), сводка по этапам — <имя>_stages.json.
+
+    with profile_run("simulate", mode="sample", output_dir="data/results/profile"):
+        simulate_month(db, "47", "Март", 2026)
+
+Запуск: python main.py --profile sample simulate --route 47 --month Март
+"""
+import cProfile
+import json
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from src.metrics import METRICS, get_logger
+
+logger = get_logger("profiling")
+
+MODES = ("sample", "cprofile")
+SAMPLE_INTERVAL = 0.005   # с
+SWITCH_INTERVAL_SHARE = 0.1  # поток-сэмплер: переключение GIL в 10 раз чаще сэмплов
+TRACEMALLOC_FRAMES = 1  # глубже — в разы медленнее: на импорте табеля 5 кадров ≈ 18× времени
+TOP_ALLOCATORS = 25
+TOP_FUNCTIONS = 40
+PROFILE_DIR = os.path.join("data", "results", "profile")
+
+# Горячие функции без собственных span: имя функции → этап
+HOT_FUNCTIONS = {
+    "find_candidate": "roster.candidate_search",
+    "_check_rest": "roster.rest_check",
+    "get_status_for_day": "roster.tabel_lookup",
+}
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class Profiler:
+    def __init__(self, name: str, mode: str = "sample", output_dir: str = PROFILE_DIR,
+                 interval: float = SAMPLE_INTERVAL):
+        if mode not in MODES:
+            raise ValueError(f"Неизвестный режим профилирования: {mode} (есть: {', '.join(MODES)})")
+        self.name = name
+        self.mode = mode
+        self.output_dir = output_dir
+        self.interval = interval
+
+        self.thread_id = threading.get_ident()
+        # Текущие этапы по потокам (сэмплер читает стек основного потока)
+        self._stages: Dict[int, List[str]] = {}
+        # Стек [память на входе, пик] по потокам
+        self._memory: Dict[int, List[list]] = {}
+        # этап → [вызовов, секунд, прирост памяти, пик над памятью на входе]
+        self.stage_stats: Dict[str, list] = {}
+        self.samples: Dict[str, int] = {}
+        self.total_samples = 0
+
+        self._profile: Optional[cProfile.Profile] = None
+        self.sampler: Optional[str] = None  # "itimer" или "thread"
+        self._sampler: Optional[threading.Thread] = None
+        self._previous_handler = None
+        self._previous_switch: Optional[float] = None
+        self._stop = threading.Event()
+        self._started = 0.0
+        self._metrics_were_enabled = False
+        self._baseline = None
+        self.elapsed = 0.0
+
+    # ================= ЭТАПЫ (вызывает METRICS.span) =================
+
+    def enter(self, stage: str):
+        tid = threading.get_ident()
+        self._stages.setdefault(tid, []).append(stage)
+        memory = self._memory.setdefault(tid, [])
+        current, peak = tracemalloc.get_traced_memory()
+        # Пик внешнего этапа до начала вложенного сохраняется, счетчик пика сбрасывается
+        if memory:
+            memory[-1][1] = max(memory[-1][1], peak)
+        tracemalloc.reset_peak()
+        memory.append([current, current])
+
+    def exit(self, stage: str, seconds: float):
+        tid = threading.get_ident()
+        stack = self._stages.get(tid)
+        if not stack:
+            return
+        stack.pop()
+        current, peak = tracemalloc.get_traced_memory()
+        memory = self._memory[tid]
+        started, inner_peak = memory.pop()
+        peak = max(peak, inner_peak)
+        if memory:
+            memory[-1][1] = max(memory[-1][1], peak)
+        stat = self.stage_stats.setdefault(stage, [0, 0.0, 0, 0])
+        stat[0] += 1
+        stat[1] += seconds
+        stat[2] += current - started
+        stat[3] = max(stat[3], peak - started)
+
+    # ================= ЗАПУСК =================
+
+    def start(self):
+        self._metrics_were_enabled = METRICS.enabled
+        METRICS.enable()
+        METRICS.profiler = self
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._baseline = tracemalloc.take_snapshot()
+        self._started = time.perf_counter()
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread():
+            self.sampler = "itimer"
+            self._previous_handler = signal.signal(signal.SIGPROF, self._on_sigprof)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self.sampler = "thread"
+            self._previous_switch = sys.getswitchinterval()
+            sys.setswitchinterval(min(self._previous_switch, self.interval * SWITCH_INTERVAL_SHARE))
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+            self._sampler.start()
+
+    def stop(self) -> Dict[str, str]:
+        """Останавливает сбор и пишет отчеты. Возвращает {вид отчета: путь}."""
+        if self._profile is not None:
+            self._profile.disable()
+        if self.sampler == "itimer":
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler)
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            sys.setswitchinterval(self._previous_switch)
+        self.elapsed = time.perf_counter() - self._started
+        # Импорты и сам профилировщик в топ мест выделения не попадают
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, __file__),
+        ])
+        tracemalloc.stop()
+        METRICS.profiler = None
+        METRICS.enable(self._metrics_were_enabled)
+        return self._write(snapshot)
+
+    def _on_sigprof(self, signum, frame):
+        # Обработчик выполняется в основном потоке, frame — прерванный кадр
+        if frame is not None:
+            self._record(frame)
+
+    def _sample_loop(self):
+        frames = sys._current_frames
+        while not self._stop.wait(self.interval):
+            frame = frames().get(self.thread_id)
+            if frame is not None:
+                self._record(frame)
+
+    def _record(self, frame):
+        stack = []
+        while frame is not None:
+            stack.append(_frame_name(frame))
+            frame = frame.f_back
+        stack.reverse()
+        stages = self._stages.get(self.thread_id, [])
+        key = ";".join([f"[{s}]" for s in stages] + stack)
+        self.samples[key] = self.samples.get(key, 0) + 1
+        self.total_samples += 1
+
+    def stage_share(self) -> Dict[str, float]:
+        """Доля сэмплов, снятых внутри этапа (режим sample); вложенные этапы входят во внешний."""
+        if not self.total_samples:
+            return {}
+        share: Dict[str, float] = {}
+        for key, n in self.samples.items():
+            stages = {part[1:-1] for part in key.split(";") if part.startswith("[")}
+            for stage in stages:
+                share[stage] = share.get(stage, 0) + n / self.total_samples
+        return share
+
+    # ================= ОТЧЕТЫ =================
+
+    def hot_function_share(self) -> Dict[str, float]:
+        """Доля сэмплов, где в стеке есть горячая функция (режим sample)."""
+        if not self.total_samples:
+            return {}
+        share = {}
+        for func, stage in HOT_FUNCTIONS.items():
+            marker = f":{func}"
+            hits = sum(n for key, n in self.samples.items()
+                       if any(part.endswith(marker) for part in key.split(";")))
+            if hits:
+                share[stage] = hits / self.total_samples
+        return share
+
+    def _hot_function_times(self) -> Dict[str, dict]:
+        """Время и число вызовов горячих функций по cProfile."""
+        stats = pstats.Stats(self._profile)
+        result = {}
+        for (filename, _, func), (_, ncalls, _, cumtime, _) in stats.stats.items():
+            stage = HOT_FUNCTIONS.get(func)
+            if stage and filename != "~":
+                entry = result.setdefault(stage, {"calls": 0, "seconds": 0.0})
+                entry["calls"] += ncalls
+                entry["seconds"] += cumtime
+        return result
+
+    def _write(self, snapshot) -> Dict[str, str]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, self.name)
+        paths = {}
+
+        if self.mode == "sample":
+            paths["collapsed"] = base + ".collapsed"
+            with open(paths["collapsed"], "w", encoding="utf-8") as f:
+                for key, count in sorted(self.samples.items()):
+                    f.write(f"{key} {count}\n")
+        else:
+            paths["pstats"] = base + ".pstats"
+            self._profile.dump_stats(paths["pstats"])
+            paths["functions"] = base + ".txt"
+            with open(paths["functions"], "w", encoding="utf-8") as f:
+                pstats.Stats(self._profile, stream=f).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+
+        paths["memory"] = base + "_memory.txt"
+        with open(paths["memory"], "w", encoding="utf-8") as f:
+            f.write(f"Топ {TOP_ALLOCATORS} мест выделения памяти: прирост за запуск (еще не освобождено)\n\n")
+            for stat in snapshot.compare_to(self._baseline, "lineno")[:TOP_ALLOCATORS]:
+                frame = stat.traceback[0]
+                f.write(f"{stat.size_diff / 1024:10.1f} КБ {stat.count_diff:8} блоков  "
+                        f"{frame.filename}:{frame.lineno}\n")
+            f.write("\nПо файлам (занято на конец запуска)\n\n")
+            for stat in snapshot.statistics("filename")[:TOP_ALLOCATORS]:
+                f.write(f"{stat.size / 1024:10.1f} КБ {stat.count:8} блоков  {stat.traceback[0].filename}\n")
+
+        paths["stages"] = base + "_stages.json"
+        summary = self.summary()
+        with open(paths["stages"], "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return paths
+
+    def summary(self) -> dict:
+        stages = {
+            name: {"calls": calls, "seconds": round(seconds, 6),
+                   "memory_growth_kb": round(grown / 1024, 1), "peak_kb": round(peak / 1024, 1)}
+            for name, (calls, seconds, grown, peak) in sorted(self.stage_stats.items(), key=lambda kv: -kv[1][1])
+        }
+        result = {"name": self.name, "mode": self.mode, "elapsed_seconds": round(self.elapsed, 6), "stages": stages}
+        if self.mode == "sample":
+            result["sampler"] = self.sampler
+            result["samples"] = self.total_samples
+            result["hot_functions_share"] = {k: round(v, 4) for k, v in self.hot_function_share().items()}
+        else:
+            result["hot_functions"] = self._hot_function_times()
+        return result
+
+
+@contextmanager
+def profile_run(name: str, mode: str = "sample", output_dir: str = PROFILE_DIR):
+    """Профилирует блок и пишет отчеты в output_dir. В контекст отдается Profiler."""
+    profiler = Profiler(name, mode, output_dir)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        paths = profiler.stop()
+        print_profile(profiler, paths)
+
+
+def print_profile(profiler: Profiler, paths: Dict[str, str]):
+    summary = profiler.summary()
+    print(f"\n--- ПРОФИЛЬ {profiler.name} ({profiler.mode}): {summary['elapsed_seconds']:.2f} с ---")
+    print(f"{'Этап':<28} {'Вызовов':>8} {'Секунд':>9} {'Прирост, КБ':>11} {'Пик, КБ':>10}")
+    for name, st in summary["stages"].items():
+        print(f"{name:<28} {st['calls']:>8} {st['seconds']:>9.3f} {st['memory_growth_kb']:>11.1f} {st['peak_kb']:>10.1f}")
+    for stage, share in summary.get("hot_functions_share", {}).items():
+        print(f"{stage:<28} {'':>8} {share * summary['elapsed_seconds']:>9.3f}  ({share:.0%} сэмплов)")
+    for stage, st in summary.get("hot_functions", {}).items():
+        print(f"{stage:<28} {st['calls']:>8} {st['seconds']:>9.3f}")
+    for kind, path in paths.items():
+        print(f"💾 {kind}: {path}")
@@ -0,0 +1,268 @@
+# src/roster_matrix.py
+"""
+Матрица смен всего депо: водители × дни, код дня — один символ.
+
+  '.' — смены нет, '1' / '2' — утренняя / вечерняя, '!' — смена с недоотдыхом.
+
+Наряды (результат simulate_month, прогон run_diff.iter_run или дни песочницы)
+просматриваются один раз: из каждой смены в плоские массивы попадают
+водитель, номер дня и код. Строки матрицы находятся одним np.unique, коды
+раскладываются одной операцией np.maximum.at (если у водителя в день две
+смены, остается старший код — предупреждение важнее). Вывод тоже собирается
+по матрице целиком через таблицы символов/фрагментов, без циклов по ячейкам:
+
+  text — сетка для терминала (одна ячейка — один символ);
+  csv  — водитель, маршрут, по колонке на дату, итоги;
+  html — самодостаточная тепловая карта (стили внутри файла, без скриптов).
+
+    matrix = build_matrix(iter_run("data/results/continuous_2026-01-01_2026-12-31"), db=db)
+    matrix.to_html("data/results/matrix.html")
+
+Запуск: python main.py sandbox --depot --month Март --format html
+"""
+import html
+import os
+from array import array
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.models import DayRoster
+from src.utils import MONTH_MAP, WEEKDAY_NAMES
+
+EMPTY, SHIFT_1, SHIFT_2, WARNING = 0, 1, 2, 3
+CODE_CHARS = ".12!"
+FORMATS = ("text", "csv", "html")
+TEXT_LIMIT = 200  # строк в терминале по умолчанию; None — все
+
+# Коды → байты символов для сборки строк целиком через tobytes()
+_CHAR_BYTES = np.frombuffer(CODE_CHARS.encode("ascii"), dtype=np.uint8)
+_HTML_CELLS = np.array(['<td class="e"></td>', '<td class="s1">1</td>',
+                        '<td class="s2">2</td>', '<td class="w">!</td>'], dtype=object)
+
+_HTML_STYLE = """
+body { font-family: sans-serif; font-size: 12px; margin: 16px; }
+table { border-collapse: collapse; }
+th, td { border: 1px solid #ddd; padding: 0 3px; text-align: center; min-width: 14px; }
+thead th { position: sticky; top: 0; background: #f4f4f4; }
+th.id, td.id { text-align: right; position: sticky; left: 0; background: #fff; }
+th.we { background: #ffe9e9; }
+td.e { background: #fafafa; color: #ccc; }
+td.s1 { background: #9ecae1; }
+td.s2 { background: #3182bd; color: #fff; }
+td.w { background: #e6550d; color: #fff; font-weight: bold; }
+tfoot td { background: #f4f4f4; font-weight: bold; }
+.legend span { display: inline-block; padding: 2px 8px; margin-right: 6px; }
+"""
+
+
+class DriverMatrix:
+    """Коды смен (uint8, водители × дни), табельные номера и маршруты закрепления по строкам."""
+
+    def __init__(self, ids: np.ndarray, routes: np.ndarray, first_day: date, codes: np.ndarray):
+        self.ids = ids
+        self.routes = routes
+        self.first_day = first_day
+        self.codes = codes
+
+    @property
+    def days(self) -> List[date]:
+        return [self.first_day + timedelta(days=i) for i in range(self.codes.shape[1])]
+
+    def _rows(self, rows) -> "DriverMatrix":
+        return DriverMatrix(self.ids[rows], self.routes[rows], self.first_day, self.codes[rows])
+
+    def select(self, ids: Iterable) -> "DriverMatrix":
+        """Только указанные водители (в их порядке); отсутствующие в матрице пропускаются."""
+        wanted = np.fromiter((int(i) for i in ids), dtype=np.int64)
+        rows = np.searchsorted(self.ids, wanted)
+        found = rows < len(self.ids)
+        found[found] = self.ids[rows[found]] == wanted[found]
+        return self._rows(rows[found])
+
+    def order_by_route(self) -> "DriverMatrix":
+        """Строки по маршруту закрепления (числовые маршруты по возрастанию), внутри — по номеру."""
+        routes = self.routes.astype(str)
+        return self._rows(np.lexsort((self.ids, routes, np.char.str_len(routes))))
+
+    # ================= ИТОГИ =================
+
+    def shifts_per_driver(self) -> np.ndarray:
+        return np.count_nonzero(self.codes, axis=1)
+
+    def warnings_per_driver(self) -> np.ndarray:
+        return np.count_nonzero(self.codes == WARNING, axis=1)
+
+    def drivers_per_day(self) -> np.ndarray:
+        return np.count_nonzero(self.codes, axis=0)
+
+    def warnings_per_day(self) -> np.ndarray:
+        return np.count_nonzero(self.codes == WARNING, axis=0)
+
+    def _row_strings(self, sep: str = "") -> List[str]:
+        """Строка кодов на водителя: байты всей матрицы собираются за одну операцию."""
+        n, width = self.codes.shape
+        if not sep:
+            chars = _CHAR_BYTES[self.codes]
+        else:
+            chars = np.full((n, width * 2), ord(sep), dtype=np.uint8)
+            chars[:, 0::2] = _CHAR_BYTES[self.codes]
+        raw = np.ascontiguousarray(chars).tobytes().decode("ascii")
+        step = chars.shape[1]
+        return [raw[i * step:(i + 1) * step] for i in range(n)]
+
+    # ================= ВЫВОД =================
+
+    def to_text(self, limit: Optional[int] = TEXT_LIMIT) -> str:
+        days = self.days
+        shown = self if limit is None else self._rows(slice(0, limit))
+        # Номер дня в две строки заголовка: десятки и единицы
+        tens = "".join(str(d.day // 10) if d.day >= 10 else " " for d in days)
+        units = "".join(str(d.day % 10) for d in days)
+        lines = [f"{'':>8} {'':>6} | {tens} |",
+                 f"{'ID':>8} {'Марш.':>6} | {units} | Смен  !"]
+        lines.append("-" * len(lines[-1]))
+        shifts, warnings = shown.shifts_per_driver(), shown.warnings_per_driver()
+        for driver_id, route, row, n, w in zip(shown.ids.tolist(), shown.routes.tolist(),
+                                               shown._row_strings(), shifts.tolist(), warnings.tolist()):
+            lines.append(f"{driver_id:>8} {route or '-':>6} | {row} | {n:>4} {w:>2}")
+        lines.append("-" * len(lines[1]))
+        if len(shown.ids) < len(self.ids):
+            lines.append(f"... и еще {len(self.ids) - len(shown.ids)} водителей (всего {len(self.ids)})")
+        per_day = self.drivers_per_day()
+        lines.append(f"На смене по дням: от {int(per_day.min())} до {int(per_day.max())} водителей")
+        lines.append(f"Легенда: '.' — нет смены, '1'/'2' — смена, '!' — недоотдых; "
+                     f"недоотдыхов всего {int(np.count_nonzero(self.codes == WARNING))}")
+        return "\n".join(lines)
+
+    def to_csv(self, path: str):
+        days = self.days
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            f.write(",".join(["driver_id", "route"] + [d.isoformat() for d in days] + ["shifts", "warnings"]) + "\n")
+            rows = self._row_strings(sep=",")
+            f.writelines(
+                f"{driver_id},{route},{row}{n},{w}\n"
+                for driver_id, route, row, n, w in zip(self.ids.tolist(), self.routes.tolist(), rows,
+                                                       self.shifts_per_driver().tolist(),
+                                                       self.warnings_per_driver().tolist())
+            )
+
+    def to_html(self, path: str, title: str = "Матрица смен"):
+        days = self.days
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        weekend = ' class="we"'
+        header = "".join(
+            f'<th{weekend if d.weekday() >= 5 else ""} title="{d.isoformat()}, {WEEKDAY_NAMES[d.weekday()]}">'
+            f"{d.day}</th>" for d in days
+        )
+        cells = _HTML_CELLS[self.codes]
+        shifts, warnings = self.shifts_per_driver().tolist(), self.warnings_per_driver().tolist()
+        per_day, warn_day = self.drivers_per_day().tolist(), self.warnings_per_day().tolist()
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f'<!DOCTYPE html>\n<html lang="ru"><head><meta charset="utf-8">'
+                    f"<title>{html.escape(title)}</title><style>{_HTML_STYLE}</style></head><body>\n")
+            f.write(f"<h2>{html.escape(title)}</h2>\n<p>{days[0].isoformat()} — {days[-1].isoformat()}, "
+                    f"водителей: {len(self.ids)}, смен: {sum(shifts)}, недоотдыхов: {sum(warnings)}</p>\n")
+            f.write('<p class="legend"><span class="e" style="background:#fafafa">нет смены</span>'
+                    '<span style="background:#9ecae1">1 — утро</span>'
+                    '<span style="background:#3182bd;color:#fff">2 — вечер</span>'
+                    '<span style="background:#e6550d;color:#fff">! — недоотдых</span></p>\n')
+            f.write(f'<table>\n<thead><tr><th class="id">ID</th><th>Марш.</th>{header}'
+                    f"<th>Смен</th><th>!</th></tr></thead>\n<tbody>\n")
+            f.writelines(
+                f'<tr><td class="id">{driver_id}</td><td>{html.escape(str(route))}</td>{"".join(row)}'
+                f"<td>{n}</td><td>{w}</td></tr>\n"
+                for driver_id, route, row, n, w in zip(self.ids.tolist(), self.routes.tolist(),
+                                                       cells.tolist(), shifts, warnings)
+            )
+            f.write("</tbody>\n<tfoot>")
+            f.write('<tr><td class="id">На смене</td><td></td>' + "".join(f"<td>{n}</td>" for n in per_day)
+                    + f"<td>{sum(shifts)}</td><td></td></tr>")
+            f.write('<tr><td class="id">Недоотдых</td><td></td>' + "".join(f"<td>{n or ''}</td>" for n in warn_day)
+                    + f"<td></td><td>{sum(warnings)}</td></tr>")
+            f.write("</tfoot>\n</table>\n</body></html>\n")
+
+
+# ================= СБОРКА =================
+
+def build_matrix(records: Iterable[Tuple[str, str, DayRoster]], db=None,
+                 start: Optional[date] = None, end: Optional[date] = None) -> DriverMatrix:
+    """
+    Матрица по дням прогона (дата ISO, маршрут, результат дня) — формат run_diff.iter_run.
+    Период — от start до end, по умолчанию от первой до последней даты прогона.
+    С db в матрицу попадают все водители табеля первого месяца (в том числе без смен),
+    а маршрут закрепления берется из табеля.
+    """
+    driver_ids, day_ordinals, codes = array("q"), array("q"), array("B")
+    for day_str, _, result in records:
+        ordinal = date.fromisoformat(day_str).toordinal()
+        for _, shift in result.iter_shifts():
+            if shift.driver_id is not None:
+                driver_ids.append(shift.driver_id)
+                day_ordinals.append(ordinal)
+                codes.append(WARNING if shift.warnings else shift.number)
+
+    ordinals = np.frombuffer(day_ordinals, dtype=np.int64)
+    if start is None and not len(ordinals):
+        raise ValueError("Нет ни одного дня с нарядом: период матрицы не определен")
+    first = start.toordinal() if start else int(ordinals.min())
+    last = end.toordinal() if end else int(ordinals.max())
+    if last < first:
+        raise ValueError("Конец периода раньше начала")
+    first_day = date.fromordinal(first)
+
+    # Водители табеля на первый месяц периода и их маршруты
+    known_ids, known_routes = np.zeros(0, dtype=np.int64), []
+    if db is not None:
+        month_name = next(name for name, num in MONTH_MAP.items() if num == first_day.month)
+        tabel = [d for d in db.drivers
+                 if d.month == month_name and (d.year is None or d.year == first_day.year)]
+        known_ids = np.fromiter((int(d.id) for d in tabel), dtype=np.int64, count=len(tabel))
+        known_routes = [str(d.assigned_route_number) if d.assigned_route_number is not None else ""
+                        for d in tabel]
+
+    shift_ids = np.frombuffer(driver_ids, dtype=np.int64)
+    ids = np.unique(np.concatenate([known_ids, shift_ids]))
+    routes = np.full(len(ids), "", dtype=object)
+    if len(known_ids):
+        routes[np.searchsorted(ids, known_ids)] = known_routes
+
+    matrix = np.zeros((len(ids), last - first + 1), dtype=np.uint8)
+    if len(shift_ids):
+        cols = ordinals - first
+        inside = (cols >= 0) & (cols < matrix.shape[1])
+        rows = np.searchsorted(ids, shift_ids[inside])
+        np.maximum.at(matrix, (rows, cols[inside]), np.frombuffer(codes, dtype=np.uint8)[inside])
+    return DriverMatrix(ids, routes, first_day, matrix)
+
+
+def month_records(results: dict, route: str, month: str, year: int) -> Iterable[Tuple[str, str, DayRoster]]:
+    """Результат simulate_month ({ "1": DayRoster, ... }) в формате записей run_diff."""
+    month_num = MONTH_MAP[month]
+    for day, result in results.items():
+        yield date(year, month_num, int(day)).isoformat(), str(route), result
+
+
+def render(matrix: DriverMatrix, fmt: str = "text", output: Optional[str] = None,
+           limit: Optional[int] = TEXT_LIMIT, title: str = "Матрица смен"):
+    """Печатает сетку (text) или пишет файл (csv/html; text — тоже в файл, если задан output)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {fmt} (есть: {', '.join(FORMATS)})")
+    if fmt == "text":
+        text = matrix.to_text(limit=None if output else limit)
+        if output:
+            os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+            with open(output, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+            print(f"💾 Матрица сохранена: {output}")
+        else:
+            print(text)
+    elif fmt == "csv":
+        matrix.to_csv(output)
+        print(f"💾 Матрица сохранена: {output}")
+    else:
+        matrix.to_html(output, title=title)
+        print(f"💾 Тепловая карта сохранена: {output}")
@@ -0,0 +1,252 @@
+# src/run_diff.py
+"""
+Сравнение двух прогонов моделирования по (дата, маршрут, вагон, смена).
+
+Прогоном может быть:
+  - файл simulation_<маршрут>_<месяц>_<год>.json (run_simulation);
+  - results.jsonl непрерывного моделирования (src/continuous.py) или папка с ним;
+  - папка с файлами simulation_*.json (все маршруты/месяцы сразу).
+
+Файлы читаются потоково: JSON месяца разбирается по одному дню
+(JSONDecoder.raw_decode по буферу), JSONL — по строкам, несколько файлов
+сливаются по дате через heapq.merge. В памяти одновременно держится
+только одна дата из каждого прогона.
+
+Запуск: python main.py diff data/results/old data/results/new
+"""
+import heapq
+import json
+import os
+import re
+from collections import Counter
+from datetime import date
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from src.models import DayRoster, ShiftAssignment
+from src.utils import MONTH_MAP
+
+CHUNK_SIZE = 1 << 16
+NUMBER_END = frozenset(" \t\r\n,}]")
+SIMULATION_FILE = re.compile(r"simulation_(?P<route>.+)_(?P<month>[^_]+)_(?P<year>\d{4})\.json$")
+
+# (дата, маршрут, результат дня)
+DayRecord = Tuple[str, str, DayRoster]
+ShiftKey = Tuple[str, str, str, int]
+
+
+# ================= ПОТОКОВОЕ ЧТЕНИЕ =================
+
+def iter_json_object(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, object]]:
+    """Пары (ключ, значение) верхнего уровня JSON-объекта без загрузки файла целиком."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        def skip(chars: str):
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in chars:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        def decode():
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    # Число на границе буфера могло оборваться ("-0." + "5") — дочитываем,
+                    # пока за ним не встретится разделитель
+                    if (not eof and not isinstance(value, (dict, list, str))
+                            and (end == len(buf) or buf[end] not in NUMBER_END)):
+                        raise json.JSONDecodeError("граница буфера", buf, end)
+                    pos = end
+                    return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    fill()
+
+        skip(" \t\r\n")
+        if buf[pos:pos + 1] != "{":
+            raise ValueError(f"{path}: ожидается JSON-объект")
+        pos += 1
+        while True:
+            skip(" \t\r\n,")
+            if pos >= len(buf):
+                raise ValueError(f"{path}: файл оборван")
+            if buf[pos] == "}":
+                return
+            key = decode()
+            skip(" \t\r\n:")
+            yield key, decode()
+
+
+def iter_simulation_file(path: Path) -> Iterator[DayRecord]:
+    """Дни файла simulation_<маршрут>_<месяц>_<год>.json."""
+    match = SIMULATION_FILE.search(path.name)
+    if not match:
+        raise ValueError(f"{path.name}: имя не похоже на simulation_<маршрут>_<месяц>_<год>.json")
+    route = match["route"]
+    month_num = MONTH_MAP[match["month"]]
+    year = int(match["year"])
+    for day, result in iter_json_object(path):
+        yield date(year, month_num, int(day)).isoformat(), str(result.get("route", route)), DayRoster.from_dict(result)
+
+
+def iter_jsonl(path: Path) -> Iterator[DayRecord]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                rec = json.loads(line)
+                yield rec["date"], str(rec["route"]), DayRoster.from_dict(rec["result"])
+
+
+def iter_run(path) -> Iterator[DayRecord]:
+    """Все дни прогона в порядке дат (файл или папка)."""
+    path = Path(path)
+    if path.is_dir():
+        if (path / "results.jsonl").exists():
+            return iter_jsonl(path / "results.jsonl")
+        files = sorted(p for p in path.iterdir() if SIMULATION_FILE.search(p.name))
+        if not files:
+            raise ValueError(f"{path}: нет results.jsonl или simulation_*.json")
+        return heapq.merge(*(iter_simulation_file(p) for p in files), key=lambda rec: rec[0])
+    if path.suffix == ".jsonl":
+        return iter_jsonl(path)
+    return iter_simulation_file(path)
+
+
+def iter_dates(records: Iterator[DayRecord]) -> Iterator[Tuple[str, Dict[str, DayRoster]]]:
+    """(дата, {маршрут: результат}) с проверкой, что даты идут по возрастанию."""
+    last = None
+    for day, group in groupby(records, key=lambda rec: rec[0]):
+        if last is not None and day <= last:
+            raise ValueError(f"Даты прогона идут не по порядку: {day} после {last}")
+        last = day
+        yield day, {route: result for _, route, result in group}
+
+
+# ================= СРАВНЕНИЕ =================
+
+def _shifts(result: DayRoster) -> Dict[Tuple[str, int], ShiftAssignment]:
+    """{ (вагон, смена): смена } для результата дня."""
+    return {(str(tram.tram_number), shift.number): shift for tram, shift in result.iter_shifts()}
+
+
+def _diff_day(day: str, route: str, old: Optional[DayRoster], new: Optional[DayRoster]) -> Iterator[dict]:
+    base = {"date": day, "route": route}
+    if old is None or new is None:
+        yield {**base, "kind": "route_added" if old is None else "route_removed"}
+        return
+    if not old.ok or not new.ok:
+        if old.error != new.error:
+            yield {**base, "kind": "error_changed", "old": old.error, "new": new.error}
+        return
+
+    old_shifts, new_shifts = _shifts(old), _shifts(new)
+    for key in sorted(old_shifts.keys() | new_shifts.keys(), key=lambda k: (len(k[0]), k)):
+        tram, shift = key
+        rec = {**base, "tram": tram, "shift": shift}
+        if key not in new_shifts:
+            yield {**rec, "kind": "tram_removed", "old": old_shifts[key].driver}
+            continue
+        if key not in old_shifts:
+            yield {**rec, "kind": "tram_added", "new": new_shifts[key].driver}
+            continue
+        old_shift, new_shift = old_shifts[key], new_shifts[key]
+        if (old_shift.driver_id, old_shift.source) != (new_shift.driver_id, new_shift.source):
+            if not new_shift.filled:
+                kind = "newly_unfilled"
+            elif not old_shift.filled:
+                kind = "newly_filled"
+            else:
+                kind = "driver_changed"
+            yield {**rec, "kind": kind, "old": old_shift.driver, "new": new_shift.driver}
+        elif tuple(old_shift.warnings) != tuple(new_shift.warnings):
+            yield {**rec, "kind": "warnings_changed", "driver": new_shift.driver,
+                   "old": list(old_shift.warnings), "new": list(new_shift.warnings)}
+
+
+def diff_runs(old_path, new_path) -> Iterator[dict]:
+    """Поток изменений между прогонами (merge-join по дате)."""
+    old_iter, new_iter = iter_dates(iter_run(old_path)), iter_dates(iter_run(new_path))
+    old_item, new_item = next(old_iter, None), next(new_iter, None)
+
+    while old_item is not None or new_item is not None:
+        if new_item is None or (old_item is not None and old_item[0] < new_item[0]):
+            day, routes = old_item
+            for route in routes:
+                yield {"date": day, "route": route, "kind": "route_removed"}
+            old_item = next(old_iter, None)
+        elif old_item is None or new_item[0] < old_item[0]:
+            day, routes = new_item
+            for route in routes:
+                yield {"date": day, "route": route, "kind": "route_added"}
+            new_item = next(new_iter, None)
+        else:
+            day, old_routes = old_item
+            new_routes = new_item[1]
+            for route in sorted(old_routes.keys() | new_routes.keys(), key=lambda r: (len(r), r)):
+                yield from _diff_day(day, route, old_routes.get(route), new_routes.get(route))
+            old_item, new_item = next(old_iter, None), next(new_iter, None)
+
+
+def diff_summary(old_path, new_path, output: Optional[str] = None, limit: int = 0) -> Tuple[Counter, list]:
+    """
+    Считает изменения по видам. output — записать все изменения в JSONL,
+    limit — сколько первых изменений вернуть для показа.
+    """
+    counts = Counter()
+    shown = []
+    out = None
+    if output:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        out = open(output, "w", encoding="utf-8")
+    try:
+        for change in diff_runs(old_path, new_path):
+            counts[change["kind"]] += 1
+            if len(shown) < limit:
+                shown.append(change)
+            if out is not None:
+                out.write(json.dumps(change, ensure_ascii=False) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+    return counts, shown
+
+
+KIND_TITLES = {
+    "driver_changed": "сменился водитель",
+    "newly_unfilled": "смена стала пустой",
+    "newly_filled": "смена стала закрытой",
+    "warnings_changed": "изменились предупреждения",
+    "tram_added": "новый вагон",
+    "tram_removed": "вагон убран",
+    "route_added": "маршрут-день только в новом",
+    "route_removed": "маршрут-день только в старом",
+    "error_changed": "изменилась ошибка расчета",
+}
+
+
+def format_change(change: dict) -> str:
+    where = f"{change['date']} м.{change['route']}"
+    if "tram" in change:
+        where += f" ваг.{change['tram']} см.{change['shift']}"
+    title = KIND_TITLES.get(change["kind"], change["kind"])
+    if "old" in change or "new" in change:
+        return f"{where}: {title}: {change.get('old')} → {change.get('new')}"
+    return f"{where}: {title}"
@@ -0,0 +1,284 @@
+# src/scenarios.py
+"""
+Сценарии "что если" поверх загруженного DataLoader.
+
+Сценарий хранит только правки (ячейки табеля, закрепления, расписания)
+и отдает те же атрибуты, что и DataLoader (drivers, schedules, assignments),
+поэтому WorkforceAnalyzer работает с ним без изменений:
+
+    base = DataLoader(); base.load_all()
+    sick = Scenario(base, "1234 на больничном").absent(1234, "Март", from_day=10)
+    extra = Scenario(base, "+2 вагона").add_trams("47", "выходной", 2)
+    WorkforceAnalyzer(sick).generate_daily_roster("47", 12, "Март", 2026)
+
+Копирование при записи: незатронутые водители и расписания — те же объекты,
+что и в базе; для измененного водителя создается легкая обертка с правками,
+для измененного расписания — поверхностная копия со своим списком вагонов.
+База не меняется, и десятки сценариев можно считать от одной загрузки.
+"""
+import calendar
+from typing import Dict, List, Optional, Tuple
+
+from src.models import Assignment, DayStatus, RouteSchedule, TimeWindow, TramOutput
+from src.utils import MONTH_MAP
+
+# Отметка табеля для отсутствующего водителя (не "1"/"2" — в наряд не попадет)
+ABSENT = "Б"
+
+# Время смен для добавленных вагонов
+EXTRA_SHIFT_1 = ("05:00", "13:00")
+EXTRA_SHIFT_2 = ("14:00", "22:00")
+
+
+class DriverOverlay:
+    """Водитель базы с правками дней и маршрута. Остальные поля берутся из базового объекта."""
+    __slots__ = ("base", "days", "route", "id", "month")
+
+    def __init__(self, base, days: Optional[Dict[int, str]] = None, route: Optional[str] = None):
+        if isinstance(base, DriverOverlay):
+            # Обертка над оберткой сворачивается в одну: правки нового слоя важнее
+            days = {**base.days, **(days or {})}
+            route = route if route is not None else base.route
+            base = base.base
+        self.base = base
+        self.days = days or {}
+        self.route = route
+        # Поля, по которым анализатор фильтрует водителей, — без обращения к базе
+        self.id = base.id
+        self.month = base.month
+
+    def __getattr__(self, name):
+        if name == "base":
+            raise AttributeError(name)
+        return getattr(self.base, name)
+
+    @property
+    def assigned_route_number(self):
+        return self.route if self.route is not None else self.base.assigned_route_number
+
+    @property
+    def days_list(self) -> List[DayStatus]:
+        if not self.days:
+            return self.base.days_list
+        # Новые объекты только для измененных дней
+        return [d if d.day not in self.days else DayStatus(day=d.day, value=self.days[d.day])
+                for d in self.base.days_list]
+
+    def iter_days(self):
+        for day, value in self.base.iter_days():
+            yield day, self.days.get(day, value)
+
+    def get_status_for_day(self, day_num: int) -> str:
+        value = self.days.get(day_num)
+        if value is not None:
+            return value
+        return self.base.get_status_for_day(day_num)
+
+    def __repr__(self):
+        return f"DriverOverlay(id={self.base.id}, month={self.base.month}, days={self.days}, route={self.route})"
+
+
+class Scenario:
+    def __init__(self, base, name: str = "scenario"):
+        self.base = base
+        self.name = name
+        # { (driver_id, месяц, год|None): { день: значение } }
+        self._cells: Dict[Tuple[int, str, Optional[int]], Dict[int, str]] = {}
+        # { (driver_id, месяц|None): маршрут }
+        self._routes: Dict[Tuple[int, Optional[str]], str] = {}
+        # { (маршрут, тип дня): RouteSchedule }
+        self._schedules: Dict[Tuple[str, str], RouteSchedule] = {}
+        self._drivers_cache: Optional[list] = None
+        self._schedules_cache: Optional[list] = None
+
+    def __getattr__(self, name):
+        # data_folder, registry и прочее — как у базы
+        if name == "base":
+            raise AttributeError(name)
+        return getattr(self.base, name)
+
+    def fork(self, name: str) -> "Scenario":
+        """Новый сценарий с теми же правками (словари правок копируются, данные базы — нет)."""
+        other = Scenario(self.base, name)
+        other._cells = {key: dict(days) for key, days in self._cells.items()}
+        other._routes = dict(self._routes)
+        other._schedules = dict(self._schedules)
+        return other
+
+    # ================= ПРАВКИ ТАБЕЛЯ =================
+
+    def set_cell(self, driver_id: int, month: str, day: int, value: str, year: Optional[int] = None) -> "Scenario":
+        """Меняет одну ячейку табеля: '1', '2', 'В', 'Б' и т.д."""
+        _check_month(month)
+        self._cells.setdefault((int(driver_id), month, year), {})[int(day)] = str(value)
+        self._drivers_cache = None
+        return self
+
+    def absent(self, driver_id: int, month: str, from_day: int, to_day: Optional[int] = None,
+               year: Optional[int] = None, value: str = ABSENT) -> "Scenario":
+        """
+        Водитель отсутствует с from_day по to_day включительно (по умолчанию до конца месяца).
+        Конец месяца — по году year, а без него по году табеля водителя.
+        """
+        _check_month(month)
+        if to_day is None:
+            to_year = year if year is not None else self._tabel_year(int(driver_id), month)
+            # Табель без года — как в проверке данных (src/validation.py): невисокосный год
+            to_day = calendar.monthrange(to_year if isinstance(to_year, int) else 2001, MONTH_MAP[month])[1]
+        for day in range(from_day, to_day + 1):
+            self.set_cell(driver_id, month, day, value, year)
+        return self
+
+    def _tabel_year(self, driver_id: int, month: str) -> Optional[int]:
+        return next((d.year for d in self.base.drivers
+                     if d.id == driver_id and d.month == month and d.year is not None), None)
+
+    # ================= ПРАВКИ ЗАКРЕПЛЕНИЙ =================
+
+    def assign(self, driver_id: int, route_number, month: Optional[str] = None) -> "Scenario":
+        """Переводит водителя на маршрут: во всех месяцах или только в указанном."""
+        if month is not None:
+            _check_month(month)
+        self._routes[(int(driver_id), month)] = str(route_number)
+        self._drivers_cache = None
+        return self
+
+    # ================= ПРАВКИ РАСПИСАНИЯ =================
+
+    def set_trams(self, route_number, day_type: str, trams: List[TramOutput]) -> "Scenario":
+        key = (str(route_number), day_type.lower())
+        base_schedule = self._find_schedule(*key)
+        if base_schedule is not None:
+            schedule = base_schedule.model_copy(update={"trams": list(trams)})
+        else:
+            schedule = RouteSchedule.model_construct(route_number=key[0], day_type=day_type, trams=list(trams))
+        self._schedules[key] = schedule
+        self._schedules_cache = None
+        return self
+
+    def add_trams(self, route_number, day_type: str, count: int,
+                  shift_1: bool = True, shift_2: bool = True) -> "Scenario":
+        """Добавляет count вагонов с номерами после последнего существующего."""
+        current = self._find_schedule(str(route_number), day_type.lower())
+        trams = list(current.trams) if current is not None else []
+        last = max((int(t.number) for t in trams if str(t.number).isdigit()), default=0)
+        for n in range(last + 1, last + count + 1):
+            trams.append(TramOutput.model_construct(
+                number=str(n),
+                shift_1=_window(*EXTRA_SHIFT_1) if shift_1 else None,
+                shift_2=_window(*EXTRA_SHIFT_2) if shift_2 else None,
+            ))
+        return self.set_trams(route_number, day_type, trams)
+
+    def remove_trams(self, route_number, day_type: str, count: int) -> "Scenario":
+        """Убирает count вагонов с наибольшими номерами."""
+        current = self._find_schedule(str(route_number), day_type.lower())
+        if current is None:
+            return self
+        # "10" должен идти после "9"
+        trams = sorted(current.trams, key=lambda t: (len(str(t.number)), str(t.number)))
+        return self.set_trams(route_number, day_type, trams[:max(0, len(trams) - count)])
+
+    def _find_schedule(self, route_number: str, day_type: str) -> Optional[RouteSchedule]:
+        patched = self._schedules.get((route_number, day_type))
+        if patched is not None:
+            return patched
+        return next((s for s in self.base.schedules
+                     if str(s.route_number) == route_number and s.day_type.lower() == day_type), None)
+
+    # ================= ДАННЫЕ ДЛЯ АНАЛИЗАТОРА =================
+
+    @property
+    def drivers(self) -> list:
+        if self._drivers_cache is None:
+            self._drivers_cache = self._build_drivers()
+        return self._drivers_cache
+
+    def _build_drivers(self) -> list:
+        if not self._cells and not self._routes:
+            return self.base.drivers
+
+        touched = {key[0] for key in self._cells} | {key[0] for key in self._routes}
+        result = []
+        for d in self.base.drivers:
+            if d.id not in touched:
+                result.append(d)
+                continue
+            days = self._days_for(d)
+            route = self._routes.get((d.id, d.month), self._routes.get((d.id, None)))
+            result.append(DriverOverlay(d, days, route) if days or route is not None else d)
+        return result
+
+    def _days_for(self, driver) -> Dict[int, str]:
+        days = {}
+        # Сначала правки без года, затем на конкретный год (они важнее)
+        for year in (None, driver.year):
+            patch = self._cells.get((driver.id, driver.month, year))
+            if patch:
+                days.update(patch)
+        return days
+
+    @property
+    def schedules(self) -> list:
+        if self._schedules_cache is None:
+            if not self._schedules:
+                self._schedules_cache = self.base.schedules
+            else:
+                result = []
+                seen = set()
+                for s in self.base.schedules:
+                    key = (str(s.route_number), s.day_type.lower())
+                    if key in self._schedules and key not in seen:
+                        result.append(self._schedules[key])
+                        seen.add(key)
+                    elif key not in self._schedules:
+                        result.append(s)
+                result.extend(s for key, s in self._schedules.items() if key not in seen)
+                self._schedules_cache = result
+        return self._schedules_cache
+
+    @property
+    def assignments(self) -> List[Assignment]:
+        extra = [Assignment(driver_id=driver_id, route_number=route, month=month)
+                 for (driver_id, month), route in self._routes.items()]
+        return self.base.assignments + extra
+
+    def __repr__(self):
+        return (f"Scenario({self.name!r}: ячеек={sum(len(v) for v in self._cells.values())}, "
+                f"закреплений={len(self._routes)}, расписаний={len(self._schedules)})")
+
+
+def _check_month(month: str):
+    if month not in MONTH_MAP:
+        raise ValueError(f"Неизвестный месяц: {month}")
+
+
+def _window(start: str, end: str) -> TimeWindow:
+    return TimeWindow.model_construct(start=start, end=end)
+
+
+def compare_scenarios(scenarios: List[Scenario], route_number: str, month: str, year: int,
+                      days: Optional[List[int]] = None, mode: str = "real") -> Dict[str, dict]:
+    """
+    Считает наряды по дням для каждого сценария (история отдыха у каждого своя).
+    Возвращает { имя: {"unfilled": ..., "warnings": ..., "errors": ...} }.
+    """
+    import calendar
+    from src.scheduler import WorkforceAnalyzer
+
+    if days is None:
+        days = range(1, calendar.monthrange(year, MONTH_MAP[month])[1] + 1)
+
+    summary = {}
+    for scenario in scenarios:
+        analyzer = WorkforceAnalyzer(scenario)
+        stats = {"unfilled": 0, "warnings": 0, "errors": 0}
+        for day in days:
+            result = analyzer.generate_daily_roster(route_number, day, month, year, mode=mode)
+            if not result.ok:
+                stats["errors"] += 1
+                continue
+            stats["unfilled"] += result.unfilled_count()
+            stats["warnings"] += result.warnings_count()
+        summary[scenario.name] = stats
+    return summary
@@ -1,6 +1,15 @@
 from datetime import datetime, timedelta, time
 from typing import List, Dict, Tuple, Optional
-from src.utils import get_day_type_by_date, get_weekday_name
+from src.utils import MONTH_MAP, get_day_type_by_date, get_weekday_name
+from src.metrics import METRICS, get_logger
+from src.models import DayRoster, TramRoster
+from src.workload import WorkloadStats
+
+logger = get_logger("scheduler")
+
+# ЗАГЛУШКА ВРЕМЕНИ (Пока нет точных данных в tram): начало смен и длительность, ч
+SHIFT_START_HOURS = {"1": 5, "2": 14}
+SHIFT_DURATION = 8.0
 
 
 class WorkforceAnalyzer:
@@ -8,117 +17,102 @@ class WorkforceAnalyzer:
         self.db = db
         # История: { driver_id: { 'end_dt': datetime, 'duration': float } }
         self.history = {}
+        # Нагрузка по водителям и маршрутам, копится по ходу назначений
+        self.workload = WorkloadStats()
 
     def load_history(self, history_data: dict):
         """Загрузить внешнюю историю (например, из прошлого месяца)"""
         self.history = history_data
 
     def generate_daily_roster(self, route_number: str, day_of_month: int,
-                              target_month: str, target_year: int, mode: str = "real"):
+                              target_month: str, target_year: int, mode: str = "real") -> DayRoster:
         """
-        Главный метод генерации наряда на день.
+        Главный метод генерации наряда на день (DayRoster; словарь для JSON — result.to_dict()).
         mode:
           - 'strict': Водитель пропускается при нарушении отдыха.
           - 'real': Водитель назначается, но с пометкой warning.
         """
-        # 1. Поиск расписания
-        current_day_type = get_day_type_by_date(day_of_month, target_month, year=target_year)
-        schedule = next((s for s in self.db.schedules if
-                         str(s.route_number) == str(route_number) and
-                         s.day_type.lower() == current_day_type), None)
+        with METRICS.span("roster.total"):
+            return self._generate_daily_roster(route_number, day_of_month, target_month, target_year, mode)
 
-        if not schedule: return {"error": f"Нет расписания ({current_day_type})"}
+    def _generate_daily_roster(self, route_number, day_of_month, target_month, target_year, mode):
+        # 1. Поиск расписания
+        with METRICS.span("roster.schedule_lookup"):
+            current_day_type = get_day_type_by_date(day_of_month, target_month, year=target_year)
+            schedule = next((s for s in self.db.schedules if
+                             str(s.route_number) == str(route_number) and
+                             s.day_type.lower() == current_day_type), None)
+
+        if not schedule:
+            METRICS.inc("roster.missing_schedule", labels={"route": route_number})
+            logger.warning(f"Нет расписания ({current_day_type})",
+                           extra={"route": route_number, "day": day_of_month, "month": target_month})
+            return DayRoster.failed(f"Нет расписания ({current_day_type})", day_of_month, route_number)
 
         # 2. Списки водителей
-        main_drivers = [d for d in self.db.drivers if
-                        str(d.assigned_route_number) == str(route_number) and d.month == target_month]
-        reserve_drivers = [d for d in self.db.drivers if
-                           str(d.assigned_route_number) == "ANY" and d.month == target_month]
+        with METRICS.span("roster.driver_filter"):
+            main_drivers = [d for d in self.db.drivers if
+                            str(d.assigned_route_number) == str(route_number) and d.month == target_month]
+            reserve_drivers = [d for d in self.db.drivers if
+                               str(d.assigned_route_number) == "ANY" and d.month == target_month]
 
         # 3. Подготовка
-        roster = []
-        month_map = {
-            "Январь": 1, "Февраль": 2, "Март": 3, "Апрель": 4, "Май": 5, "Июнь": 6,
-            "Июль": 7, "Август": 8, "Сентябрь": 9, "Октябрь": 10, "Ноябрь": 11, "Декабрь": 12
-        }
-        m_num = month_map.get(target_month, 2)
+        m_num = MONTH_MAP.get(target_month, 2)
         current_date = datetime(target_year, m_num, day_of_month)
+        result = DayRoster(day=day_of_month, route=route_number,
+                           day_name=get_weekday_name(day_of_month, target_month, target_year),
+                           day_type=current_day_type)
 
         # Сортируем вагоны по номеру (можно по времени выхода)
         sorted_trams = sorted(schedule.trams, key=lambda t: t.number)
 
         for tram in sorted_trams:
-            tram_res = {
-                "tram_number": tram.number,
-                "shift_1": {"driver": None, "warnings": []},
-                "shift_2": {"driver": None, "warnings": []},
-                "issues": []
-            }
-
-            # === СМЕНА 1 (УТРО) ===
-            if tram.shift_1:
-                # ЗАГЛУШКА ВРЕМЕНИ (Пока нет точных данных в tram)
-                s_start = current_date + timedelta(hours=5)  # 05:00
-                s_dur = 8.0
-
-                cand, src, warns = self._find_candidate(
-                    [main_drivers, reserve_drivers],
-                    day_of_month, "1", s_start, s_dur, mode
-                )
+            tram_res = TramRoster(tram.number, bool(tram.shift_1), bool(tram.shift_2))
 
-                if cand:
-                    tram_res["shift_1"]["driver"] = f"{cand.id}" + (" (Рез)" if src == "reserve" else "")
-                    tram_res["shift_1"]["warnings"] = warns
-                    self.history[str(cand.id)] = {
-                        'end_dt': s_start + timedelta(hours=s_dur),
-                        'duration': s_dur
-                    }
-                    if src == "main":
-                        main_drivers.remove(cand)
-                    else:
-                        reserve_drivers.remove(cand)
-                else:
-                    tram_res["issues"].append("Нет водителя (утро)")
-
-            # === СМЕНА 2 (ВЕЧЕР) ===
-            if tram.shift_2:
-                s_start = current_date + timedelta(hours=14)  # 14:00
-                s_dur = 8.0
+            # === СМЕНА 1 (УТРО), СМЕНА 2 (ВЕЧЕР) ===
+            for shift in tram_res.shifts:
+                if not shift.required:
+                    continue
+                code = str(shift.number)
+                s_start = current_date + timedelta(hours=SHIFT_START_HOURS[code])  # 05:00 / 14:00
+                s_dur = SHIFT_DURATION
 
-                cand, src, warns = self._find_candidate(
+                cand, src, warns = self.find_candidate(
                     [main_drivers, reserve_drivers],
-                    day_of_month, "2", s_start, s_dur, mode
+                    day_of_month, code, s_start, s_dur, mode
                 )
 
                 if cand:
-                    tram_res["shift_2"]["driver"] = f"{cand.id}" + (" (Рез)" if src == "reserve" else "")
-                    tram_res["shift_2"]["warnings"] = warns
+                    shift.assign(cand.id, src, warns, s_start, s_dur)
                     self.history[str(cand.id)] = {
                         'end_dt': s_start + timedelta(hours=s_dur),
                         'duration': s_dur
                     }
+                    self.workload.record(cand.id, route_number, code, s_dur, src == "reserve", len(warns))
                     if src == "main":
                         main_drivers.remove(cand)
                     else:
                         reserve_drivers.remove(cand)
                 else:
-                    tram_res["issues"].append("Нет водителя (вечер)")
+                    self.workload.record_unfilled(route_number)
+                    METRICS.inc("roster.unfilled_shifts", labels={"route": route_number, "shift": code})
 
-            roster.append(tram_res)
+            result.trams.append(tram_res)
 
-        return {
-            "date": day_of_month,
-            "route": route_number,
-            "roster": roster,
-            "stats": {"leftover": len(main_drivers) + len(reserve_drivers)}
-        }
+        result.leftover = [d.id for d in main_drivers] + [d.id for d in reserve_drivers]
+        return result
 
-    def _find_candidate(self, groups, day, target_shift_code, shift_start, shift_dur, mode):
+    def find_candidate(self, groups, day, target_shift_code, shift_start, shift_dur, mode="real"):
         """
-        Ищет подходящего водителя.
-        Возвращает: (driver, source_type, warnings_list)
+        Ищет подходящего водителя на смену: первый по порядку в groups ([основные, резерв]),
+        у кого в табеле на day стоит target_shift_code, с учетом отдыха по истории анализатора.
+        Списки не меняются. Возвращает: (driver, source_type, warnings_list);
+        source_type — "main"/"reserve", (None, None, []) — никто не подошел.
         """
         group_names = ["main", "reserve"]
+        # Счетчики копятся в локальных переменных и передаются в METRICS один раз
+        scanned = 0
+        rest_rejected = 0
 
         for i, drivers in enumerate(groups):
             source = group_names[i]
@@ -126,6 +120,7 @@ class WorkforceAnalyzer:
             # drivers.sort(key=lambda d: d.id)
 
             for driver in drivers:
+                scanned += 1
                 # 1. Проверка Табеля (Жесткая)
                 status = driver.get_status_for_day(day)
                 # Табель "1" ждет смену "1", табель "2" ждет смену "2"
@@ -137,13 +132,27 @@ class WorkforceAnalyzer:
 
                 if warnings:
                     if mode == "strict":
+                        rest_rejected += 1
                         continue  # В строгом режиме пропускаем
                     # В режиме real берем, warning уже записан в переменную
 
+                if METRICS.enabled:
+                    self._record_search(scanned, rest_rejected, bool(warnings))
                 return driver, source, warnings
 
+        if METRICS.enabled:
+            self._record_search(scanned, rest_rejected, False)
         return None, None, []
 
+    @staticmethod
+    def _record_search(scanned: int, rest_rejected: int, with_warning: bool):
+        METRICS.inc("roster.candidate_searches")
+        METRICS.inc("roster.candidates_scanned", scanned)
+        if rest_rejected:
+            METRICS.inc("roster.rest_rejections", rest_rejected)
+        if with_warning:
+            METRICS.inc("roster.rest_warnings")
+
     def _check_rest(self, driver_id, current_start_dt) -> List[str]:
         """Расчет недоотдыха"""
         last_rec = self.history.get(str(driver_id))
@@ -0,0 +1,261 @@
+# src/snapshots.py
+"""
+Неизменяемые версии загруженных данных для долгоживущего процесса.
+
+DataLoader меняет свои списки и объекты водителей при каждой загрузке,
+поэтому перечитывать данные, пока идет расчет, небезопасно. Здесь каждая
+загрузка — отдельный снимок (DataSnapshot): после создания он не меняется,
+а хранилище (SnapshotStore) подменяет ссылку на текущий снимок одной
+операцией присваивания. Расчет, начатый на версии N, так на ней и закончится,
+даже если посреди него появилась версия N+1; читатели никогда не ждут блокировок.
+
+При перезагрузке заново читаются только изменившиеся файлы (по mtime и размеру):
+табель одного месяца, schedule.json или закрепления. Остальные месяцы берутся
+из кэша уже разобранных строк, объекты водителей каждый раз создаются свои,
+чтобы закрепления новой версии не затронули старую; реестр закреплений у каждого
+снимка свой, только для чтения. С validate=True проверяются (src/validation.py)
+только перечитанные табели и расписание, закрепления — всегда (файлы маленькие,
+а сверяются с таб.№ и маршрутами всех месяцев).
+
+    store = SnapshotStore("data")
+    store.start_watcher()                 # фоновая проверка файлов раз в WATCH_INTERVAL с
+    db = store.current                    # снимок фиксируется в начале расчета
+    WorkforceAnalyzer(db).generate_daily_roster("47", 3, "Январь", 2026)
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.database import DataLoader, DriverRow, parse_drivers_data, read_drivers_json, read_schedules
+from src.db.assignment_registry import AssignmentRegistry
+from src.metrics import METRICS, get_logger
+from src.models import Assignment
+
+logger = get_logger("snapshots")
+
+WATCH_INTERVAL = 2.0  # с
+
+# (mtime_ns, размер) файла; None — файла нет
+FileSignature = Optional[Tuple[int, int]]
+
+
+def file_signature(path: str) -> FileSignature:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class DataSnapshot(DataLoader):
+    """
+    Одна версия данных с тем же интерфейсом, что у DataLoader (drivers, schedules,
+    assignments, profiles, registry). Списки заменены кортежами, атрибуты не меняются,
+    registry — свое представление только для чтения.
+    """
+
+    def __init__(self, data_folder: str, version: int, files: Dict[str, FileSignature],
+                 months: List[Tuple[str, object, List[DriverRow]]], schedules: list,
+                 registry: AssignmentRegistry):
+        super().__init__(data_folder)
+        for month_name, year, rows in months:
+            self.drivers.extend(self._make_drivers(month_name, year, rows))
+        self.schedules = schedules
+        self.registry = registry.read_only()
+        self.assignments = [Assignment(**a) for a in registry.records()]
+        self._link_drivers_to_routes()
+
+        self.drivers = tuple(self.drivers)
+        self.schedules = tuple(self.schedules)
+        self.assignments = tuple(self.assignments)
+        self.profiles = MappingProxyType(self.profiles)
+        self.version = version
+        self.files = MappingProxyType(dict(files))
+        self.loaded_at = datetime.now()
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"Снимок данных v{self.version} только для чтения")
+        super().__setattr__(name, value)
+
+    def load_all(self, validate=False):
+        raise TypeError("Снимок не перезагружается: используйте SnapshotStore.reload()")
+
+    def __repr__(self):
+        return (f"DataSnapshot(v{self.version}, {self.data_folder!r}, водителей={len(self.drivers)}, "
+                f"загружен {self.loaded_at:%H:%M:%S})")
+
+
+class SnapshotStore:
+    def __init__(self, data_folder: str = "data", validate: bool = False):
+        self.data_folder = data_folder
+        self.drivers_dir = os.path.join(data_folder, "drivers_json")
+        self.schedule_path = os.path.join(data_folder, "schedule.json")
+        self.assignments_path = os.path.join(data_folder, "assignments.json")
+        # Снимок с ошибками проверки (src/validation.py) не публикуется
+        self.validate = validate
+
+        self._current: Optional[DataSnapshot] = None
+        # Перезагрузки идут по одной; читатели этот замок не берут
+        self._lock = threading.Lock()
+        # Кэш разобранных файлов: путь → (подпись, данные)
+        self._months: Dict[str, Tuple[FileSignature, Tuple[str, object, List[DriverRow]]]] = {}
+        self._schedules: Tuple[FileSignature, list] = (None, [])
+        self._registry: Tuple[Tuple[FileSignature, FileSignature], Optional[AssignmentRegistry]] = ((None, None), None)
+
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def current(self) -> DataSnapshot:
+        """Текущий снимок. Первый вызов загружает данные."""
+        snapshot = self._current
+        if snapshot is None:
+            self.reload()
+            snapshot = self._current
+        return snapshot
+
+    @property
+    def version(self) -> int:
+        return self._current.version if self._current is not None else 0
+
+    def _scan(self) -> Dict[str, FileSignature]:
+        files = {}
+        if os.path.isdir(self.drivers_dir):
+            # Порядок как в DataLoader (os.listdir), чтобы порядок водителей совпадал
+            for name in os.listdir(self.drivers_dir):
+                if name.endswith(".json") and not name.startswith("."):
+                    path = os.path.join(self.drivers_dir, name)
+                    files[path] = file_signature(path)
+        registry = AssignmentRegistry(self.assignments_path)
+        for path in (self.schedule_path, self.assignments_path, str(registry.journal_path)):
+            files[path] = file_signature(path)
+        return files
+
+    # ================= ПЕРЕЗАГРУЗКА =================
+
+    def reload(self, force: bool = False) -> Optional[DataSnapshot]:
+        """
+        Собирает новый снимок, если файлы изменились (или force=True), и публикует его.
+        Возвращает новый снимок; None — изменений нет или новая версия не собралась
+        (тогда текущий снимок остается прежним).
+        """
+        with self._lock:
+            files = self._scan()
+            current = self._current
+            if current is not None and not force and dict(current.files) == files:
+                return None
+            try:
+                with METRICS.span("snapshot.build"):
+                    snapshot, changed = self._build(files)
+            except Exception as e:
+                # Например, файл записан наполовину — попробуем на следующей проверке
+                METRICS.inc("snapshot.failed")
+                logger.error(f"Новая версия данных не собрана, остается v{self.version}: {e}",
+                             extra={"path": self.data_folder})
+                return None
+
+            self._current = snapshot
+            METRICS.inc("snapshot.reloads")
+            logger.info(f"🔄 Данные v{snapshot.version}: {len(snapshot.drivers)} вод., "
+                        f"перечитано файлов: {len(changed)}",
+                        extra={"version": snapshot.version, "changed": [os.path.basename(p) for p in changed]})
+            return snapshot
+
+    def _build(self, files: Dict[str, FileSignature]) -> Tuple[DataSnapshot, List[str]]:
+        changed = []
+
+        # Табели: перечитываются только изменившиеся месяцы; их JSON идет и в проверку
+        months = {}
+        read = {}
+        for path, sig in files.items():
+            if not path.startswith(self.drivers_dir + os.sep):
+                continue
+            cached = self._months.get(path)
+            if cached is not None and cached[0] == sig:
+                months[path] = cached
+            else:
+                read[path] = read_drivers_json(path)
+                months[path] = (sig, parse_drivers_data(read[path]))
+                changed.append(path)
+
+        sig = files[self.schedule_path]
+        schedules = self._schedules
+        if schedules[0] != sig or self._current is None:
+            schedules = (sig, read_schedules(self.schedule_path) if sig is not None else [])
+            changed.append(self.schedule_path)
+
+        registry = AssignmentRegistry(self.assignments_path)
+        registry_sig = (files[self.assignments_path], files[str(registry.journal_path)])
+        cached_sig, cached_registry = self._registry
+        if cached_registry is None or cached_sig != registry_sig:
+            cached_registry = registry.load()
+            changed.append(self.assignments_path)
+
+        if self.validate:
+            self._validate_changed(changed, read, months, schedules[1])
+
+        snapshot = DataSnapshot(self.data_folder, self.version + 1, files,
+                                [data for _, data in months.values()], schedules[1], cached_registry)
+        # Кэш обновляется только после успешной сборки
+        self._months = months
+        self._schedules = schedules
+        self._registry = (registry_sig, cached_registry)
+        return snapshot, changed
+
+    def _validate_changed(self, changed: List[str], read: dict, months: dict, schedules: list):
+        """
+        Проверка перечитанных файлов (табели — по уже прочитанному JSON из read);
+        закрепления сверяются с таб.№ и маршрутами из кэша.
+        """
+        from src.validation import ValidationReport, validate_assignments, validate_drivers_data, validate_schedule
+
+        report = ValidationReport()
+        for path in changed:
+            if path in read:
+                validate_drivers_data(os.path.basename(path), read[path], report)
+            elif path == self.schedule_path:
+                validate_schedule(Path(path), report)
+
+        driver_ids = np.unique(np.fromiter((row[0] for _, (_, _, rows) in months.values() for row in rows),
+                                           dtype=np.int64))
+        routes = {str(s.route_number) for s in schedules}
+        validate_assignments(Path(self.data_folder), report, driver_ids, routes)
+        if not report.ok:
+            first = report.errors[0]
+            raise ValueError(f"ошибок проверки данных: {len(report.errors)} "
+                             f"(первая: {first['file']}: {first['message']})")
+
+    # ================= НАБЛЮДЕНИЕ ЗА ФАЙЛАМИ =================
+
+    def start_watcher(self, interval: float = WATCH_INTERVAL):
+        """Фоновый поток: раз в interval секунд проверяет файлы и подменяет снимок."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self.current  # первая загрузка — до старта потока
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                         name="snapshot-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout)
+            self._watcher = None
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            started = time.perf_counter()
+            try:
+                if self.reload() is not None:
+                    METRICS.observe("snapshot.reload_seconds", time.perf_counter() - started)
+            except Exception as e:
+                logger.error(f"Ошибка наблюдения за данными: {e}", extra={"path": self.data_folder})
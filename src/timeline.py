@@ -0,0 +1,161 @@
+# src/timeline.py
+"""
+Хронология водителя за любой период: табель, закрепление и фактические смены.
+
+Индекс строится один раз:
+  - табели — ссылки на помесячные записи водителя (id → {(год, месяц): Driver}),
+    код дня берется из записи за O(1);
+  - результаты моделирования (любой прогон, который читает run_diff.iter_run) —
+    для каждого водителя отсортированный массив дат и параллельный список смен.
+
+Запрос за период берет только нужные месяцы табеля и находит смены
+двоичным поиском (bisect), не просматривая остальные даты и водителей:
+
+    index = TimelineIndex(db, run="data/results/continuous_2026-01-01_2026-12-31")
+    index.timeline(1234, date(2026, 3, 1), date(2026, 5, 31))
+
+Запуск: python main.py timeline 1234 --from 2026-03-01 --to 2026-05-31 --run data/results/...
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from src.utils import MONTH_MAP, WEEKDAY_NAMES
+
+# (маршрут, вагон, смена, из резерва, предупреждения)
+ShiftRecord = Tuple[str, str, int, bool, Tuple[str, ...]]
+
+
+class _DriverShifts:
+    """Смены одного водителя: даты (ordinal) по возрастанию и записи по тем же индексам."""
+    __slots__ = ("days", "shifts")
+
+    def __init__(self):
+        self.days = array("l")
+        self.shifts: List[ShiftRecord] = []
+
+
+class TimelineIndex:
+    def __init__(self, db, run=None):
+        # id → {(год или None, номер месяца): запись табеля}
+        self.months: Dict[int, Dict[Tuple[Optional[int], int], object]] = {}
+        self.shifts: Dict[int, _DriverShifts] = {}
+        self.run_days = (None, None)  # первая и последняя дата прогона
+        self._add_tabels(db)
+        if run is not None:
+            self.add_run(run)
+
+    def _add_tabels(self, db):
+        for d in db.drivers:
+            month_num = MONTH_MAP.get(d.month)
+            if month_num is not None:
+                self.months.setdefault(int(d.id), {})[(d.year, month_num)] = d
+
+    def add_run(self, run):
+        """
+        Добавляет смены прогона (файл, results.jsonl или папка) одним потоковым проходом.
+        Смена, которая уже есть в индексе (водитель, дата, маршрут, вагон, смена), не повторяется.
+        """
+        from src.run_diff import iter_run
+
+        first, last = self.run_days
+        for day_str, route, result in iter_run(run):
+            ordinal = date.fromisoformat(day_str).toordinal()
+            first = ordinal if first is None else min(first, ordinal)
+            last = ordinal if last is None else max(last, ordinal)
+            for tram, shift in result.iter_shifts():
+                if not shift.filled:
+                    continue
+                rec = self.shifts.get(shift.driver_id)
+                if rec is None:
+                    rec = self.shifts[shift.driver_id] = _DriverShifts()
+                key = (str(route), str(tram.tram_number), shift.number)
+                # Прогоны идут по датам, но при добавлении второго прогона порядок восстанавливается
+                pos = len(rec.days)
+                if pos and rec.days[-1] >= ordinal:
+                    # Смена на эту дату уже есть (тот же прогон еще раз или прогоны с общими датами)
+                    lo, pos = bisect_left(rec.days, ordinal), bisect_right(rec.days, ordinal)
+                    if any(rec.shifts[i][:3] == key for i in range(lo, pos)):
+                        continue
+                rec.days.insert(pos, ordinal)
+                rec.shifts.insert(pos, key + (shift.is_reserve, tuple(shift.warnings)))
+        self.run_days = (first, last)
+
+    # ================= ЗАПРОСЫ =================
+
+    def month_record(self, driver_id: int, year: int, month_num: int):
+        """Запись табеля на месяц: сначала за этот год, затем без года."""
+        months = self.months.get(int(driver_id))
+        if not months:
+            return None
+        rec = months.get((year, month_num))
+        return rec if rec is not None else months.get((None, month_num))
+
+    def shifts_between(self, driver_id: int, start: date, end: date) -> List[Tuple[date, ShiftRecord]]:
+        rec = self.shifts.get(int(driver_id))
+        if rec is None:
+            return []
+        lo = bisect_left(rec.days, start.toordinal())
+        hi = bisect_right(rec.days, end.toordinal())
+        return [(date.fromordinal(rec.days[i]), rec.shifts[i]) for i in range(lo, hi)]
+
+    def timeline(self, driver_id: int, start: date, end: date) -> List[dict]:
+        """По дню на каждую дату [start, end]: код табеля, закрепление, смены по результатам."""
+        driver_id = int(driver_id)
+        by_day: Dict[date, List[dict]] = {}
+        for day, (route, tram, shift, is_reserve, warnings) in self.shifts_between(driver_id, start, end):
+            by_day.setdefault(day, []).append({
+                "route": route, "tram": tram, "shift": shift,
+                "reserve": is_reserve, "warnings": list(warnings),
+            })
+
+        first, last = self.run_days
+        result = []
+        day = start
+        while day <= end:
+            month = self.month_record(driver_id, day.year, day.month)
+            code = month.get_status_for_day(day.day) if month is not None else None
+            # Вне табеля месяца ("Unknown") и без табеля — None
+            entry = {
+                "date": day.isoformat(),
+                "weekday": WEEKDAY_NAMES[day.weekday()],
+                "code": code if code != "Unknown" else None,
+                "assigned_route": month.assigned_route_number if month is not None else None,
+                "shifts": by_day.get(day, []),
+            }
+            # Дни вне прогона отличаются от дней прогона без смен
+            if first is not None:
+                entry["simulated"] = first <= day.toordinal() <= last
+            result.append(entry)
+            day += timedelta(days=1)
+        return result
+
+    def summary(self, driver_id: int, start: date, end: date) -> dict:
+        days = self.timeline(driver_id, start, end)
+        worked = [d for d in days if d["shifts"]]
+        planned = [d for d in days if d["code"] in ("1", "2")]
+        return {
+            "driver_id": int(driver_id),
+            "days": len(days),
+            "planned_shifts": len(planned),
+            "actual_shifts": sum(len(d["shifts"]) for d in worked),
+            "planned_not_used": sum(1 for d in planned if d.get("simulated") and not d["shifts"]),
+            "reserve_shifts": sum(1 for d in worked for s in d["shifts"] if s["reserve"]),
+            "warnings": sum(len(s["warnings"]) for d in worked for s in d["shifts"]),
+            "routes": sorted({s["route"] for d in worked for s in d["shifts"]}, key=lambda r: (len(r), r)),
+        }
+
+
+def print_timeline(days: List[dict], driver_id: int):
+    print(f"\n--- ХРОНОЛОГИЯ ВОДИТЕЛЯ {driver_id}: {days[0]['date']} — {days[-1]['date']} ---")
+    print(f"{'Дата':<11} {'День':<12} {'Табель':>6} {'Маршрут':>8}  Смены")
+    for d in days:
+        shifts = "; ".join(
+            f"м.{s['route']} ваг.{s['tram']} см.{s['shift']}" + (" (Рез)" if s["reserve"] else "")
+            + (f" ⚠️ {', '.join(s['warnings'])}" if s["warnings"] else "")
+            for s in d["shifts"]
+        )
+        if not shifts and d.get("simulated") and d["code"] in ("1", "2"):
+            shifts = "— не назначен"
+        print(f"{d['date']:<11} {d['weekday']:<12} {d['code'] or '-':>6} {d['assigned_route'] or '-':>8}  {shifts}")
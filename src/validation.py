@@ -0,0 +1,368 @@
+# src/validation.py
+"""
+Проверка исходных данных до загрузки: все ошибки сразу, с файлом, строкой и днем.
+
+Проверяется:
+  - drivers_json/*.json — месяц и год, таб.№ (число, без повторов в файле),
+    график и режим, дни табеля (номер в пределах месяца, без повторов,
+    допустимый код, все дни месяца на месте);
+  - schedule.json — маршрут, тип дня, номера вагонов без повторов,
+    время смен в формате ЧЧ:ММ, повтор (маршрут, тип дня);
+  - assignments.json и журнал — таб.№ есть в табелях, маршрут есть
+    в расписании (или ANY), месяц/год закрепления корректны.
+
+Ячейки табелей всех водителей файла разворачиваются в плоские массивы
+(строка, день, значение), и проверки идут операциями numpy над всем файлом:
+
+    report = validate_folder("data")
+    report.ok                 # нет ошибок (предупреждения допускаются)
+    print_report(report)
+
+Запуск: python main.py validate [--csv data/results/validation.csv] [--strict]
+"""
+import calendar
+import csv
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.utils import MONTH_MAP
+
+# Допустимые коды табеля: смены, выходной, больничный, отпуск
+DAY_CODES = ["1", "2", "В", "Б", "О"]
+DAY_TYPES = ("рабочий", "выходной")
+RESERVE_ROUTE = "ANY"
+TIME_FORMAT = re.compile(r"([01]\d|2[0-3]):[0-5]\d")
+
+ERROR = "error"
+WARNING = "warning"
+
+
+class ValidationReport:
+    def __init__(self):
+        self.issues: List[dict] = []
+
+    def add(self, severity: str, file: str, message: str, row: Optional[int] = None,
+            day: Optional[int] = None, field: Optional[str] = None, value=None):
+        self.issues.append({"severity": severity, "file": file, "row": row, "day": day,
+                            "field": field, "message": message, "value": value})
+
+    @property
+    def errors(self) -> List[dict]:
+        return [i for i in self.issues if i["severity"] == ERROR]
+
+    @property
+    def warnings(self) -> List[dict]:
+        return [i for i in self.issues if i["severity"] == WARNING]
+
+    @property
+    def ok(self) -> bool:
+        return not any(i["severity"] == ERROR for i in self.issues)
+
+    def summary(self) -> Counter:
+        """Сколько раз встретилась каждая проблема: {(файл, сообщение): n}."""
+        return Counter((i["file"], i["message"]) for i in self.issues)
+
+    def to_csv(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        columns = ["severity", "file", "row", "day", "field", "message", "value"]
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(self.issues)
+
+
+def _as_int(value) -> int:
+    """Целое из числа или строки цифр; -1 — не число."""
+    if type(value) is int:
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return -1
+
+
+def _load_json(path: Path, report: ValidationReport):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError as e:
+        report.add(ERROR, path.name, f"Ошибка JSON: {e.msg}", row=e.lineno, field="строка файла")
+    except OSError as e:
+        report.add(ERROR, path.name, f"Файл не читается: {e}")
+    return None
+
+
+# ================= ТАБЕЛИ =================
+
+def validate_drivers_file(path: Path, report: ValidationReport) -> np.ndarray:
+    """Проверяет один файл табеля. Возвращает таб.№ водителей файла (для проверки закреплений)."""
+    data = _load_json(path, report)
+    if data is None:
+        return np.empty(0, dtype=np.int64)
+    return validate_drivers_data(path.name, data, report)
+
+
+def validate_drivers_data(name: str, data, report: ValidationReport) -> np.ndarray:
+    """То же для уже прочитанного JSON табеля (name — имя файла для отчета)."""
+    if not isinstance(data, dict) or not isinstance(data.get("drivers"), list):
+        report.add(ERROR, name, "Ожидается объект {month, year, drivers: [...]}")
+        return np.empty(0, dtype=np.int64)
+
+    month, year = data.get("month"), data.get("year")
+    month_num = MONTH_MAP.get(month)
+    if month_num is None:
+        report.add(ERROR, name, "Неизвестный месяц", field="month", value=month)
+    if not isinstance(year, int):
+        report.add(WARNING, name, "Год не указан: табель относится к месяцу любого года", field="year", value=year)
+    if month_num is not None:
+        days_in_month = calendar.monthrange(year if isinstance(year, int) else 2001, month_num)[1]
+    else:
+        days_in_month = 31
+
+    drivers = [d if isinstance(d, dict) else {} for d in data["drivers"]]
+    n = len(drivers)
+
+    # --- Поля водителя ---
+    ids = np.fromiter((_as_int(d.get("tab_number")) for d in drivers), dtype=np.int64, count=n)
+    for row in np.nonzero(ids < 0)[0]:
+        report.add(ERROR, name, "Таб.№ не число", row=int(row), field="tab_number",
+                   value=drivers[row].get("tab_number"))
+
+    valid_ids = ids[ids >= 0]
+    uniq, counts = np.unique(valid_ids, return_counts=True)
+    dup = uniq[counts > 1]
+    if len(dup):
+        for row in np.nonzero(np.isin(ids, dup))[0]:
+            report.add(ERROR, name, "Таб.№ повторяется в файле", row=int(row), field="tab_number",
+                       value=int(ids[row]))
+
+    for field in ("schedule", "mode"):
+        for row, d in enumerate(drivers):
+            if d.get(field) in (None, ""):
+                report.add(ERROR, name, f"Не заполнено поле {field}", row=row, field=field, value=int(ids[row]))
+
+    # --- Дни табеля: плоские массивы по всем ячейкам файла ---
+    day_lists = [d.get("days") if isinstance(d.get("days"), list) else [] for d in drivers]
+    lengths = np.fromiter((len(days) for days in day_lists), dtype=np.int64, count=n)
+    cells = [c if isinstance(c, dict) else {} for days in day_lists for c in days]
+    rows = np.repeat(np.arange(n), lengths)
+    raw_days = np.array([c.get("day") for c in cells], dtype=object)
+    if set(map(type, raw_days)) <= {int}:
+        days = raw_days.astype(np.int64)   # обычный случай: все номера дней — целые
+    else:
+        days = np.fromiter((_as_int(d) for d in raw_days), dtype=np.int64, count=len(cells))
+    values = np.array([c.get("value") for c in cells], dtype=object)
+    # Значение сравнивается так же, как при загрузке (str); None и "" — пустая ячейка
+    # (parse_whole_sheet пишет "" для пустых ячеек Excel)
+    empty = np.equal(values, None) | (values == "")
+    text = values.astype(str)
+
+    def report_cells(mask, severity, message, field, shown):
+        for i in np.nonzero(mask)[0]:
+            report.add(severity, name, message, row=int(rows[i]), day=int(days[i]) if days[i] >= 0 else None,
+                       field=field, value=shown[i])
+
+    in_month = (days >= 1) & (days <= days_in_month)
+    report_cells(days < 0, ERROR, "Номер дня не число", "day", raw_days)
+    report_cells((days >= 0) & ~in_month, ERROR, f"День вне месяца (1–{days_in_month})", "day", raw_days)
+    report_cells(empty, ERROR, "Пустое значение дня", "value", values)
+    report_cells(~empty & ~np.isin(text, DAY_CODES), ERROR, "Недопустимый код табеля", "value", values)
+
+    # Повтор дня у одного водителя: ключ (строка, день)
+    key = rows * 64 + np.where(in_month, days, 0)
+    uniq_keys, first, counts = np.unique(key, return_index=True, return_counts=True)
+    repeated = np.zeros(len(key), dtype=bool)
+    repeated[in_month] = True
+    repeated[first] = False
+    repeated &= np.isin(key, uniq_keys[counts > 1])
+    report_cells(repeated, ERROR, "День повторяется у водителя", "day", raw_days)
+
+    # Пропущенные дни: сколько разных дней месяца есть у каждой строки
+    present = np.bincount(uniq_keys[(uniq_keys % 64) > 0] // 64, minlength=n)
+    for row in np.nonzero(present < days_in_month)[0]:
+        report.add(WARNING, name, "Не все дни месяца в табеле (будут 'Unknown')", row=int(row),
+                   field="days", value=f"{int(present[row])} из {days_in_month}")
+
+    return valid_ids
+
+
+# ================= РАСПИСАНИЕ =================
+
+def validate_schedule(path: Path, report: ValidationReport) -> set:
+    """Проверяет schedule.json. Возвращает номера маршрутов."""
+    name = path.name
+    routes = set()
+    if not path.exists():
+        report.add(ERROR, name, "Файл не найден")
+        return routes
+    data = _load_json(path, report)
+    if data is None:
+        return routes
+    if isinstance(data, dict):
+        data = [data]
+
+    seen = {}
+    for row, s in enumerate(data):
+        if not isinstance(s, dict):
+            report.add(ERROR, name, "Запись расписания не объект", row=row)
+            continue
+        route = s.get("маршрут")
+        if route in (None, ""):
+            report.add(ERROR, name, "Не указан маршрут", row=row, field="маршрут")
+        else:
+            routes.add(str(route))
+        day_type = str(s.get("день", "")).lower()
+        if day_type not in DAY_TYPES:
+            report.add(ERROR, name, "Неизвестный тип дня", row=row, field="день", value=s.get("день"))
+        pair = (str(route), day_type)
+        if pair in seen:
+            report.add(WARNING, name, f"Повтор маршрута и типа дня (используется строка {seen[pair]})",
+                       row=row, field="маршрут", value=str(route))
+        else:
+            seen[pair] = row
+
+        trams = s.get("трамваи")
+        if not isinstance(trams, list):
+            report.add(ERROR, name, "Нет списка трамваев", row=row, field="трамваи")
+            continue
+        numbers = Counter(str(t.get("номер")) for t in trams if isinstance(t, dict))
+        for number, count in numbers.items():
+            if number == "None":
+                report.add(ERROR, name, "Вагон без номера", row=row, field="номер")
+            elif count > 1:
+                report.add(ERROR, name, "Номер вагона повторяется", row=row, field="номер", value=number)
+        for t in trams:
+            if not isinstance(t, dict):
+                report.add(ERROR, name, "Вагон не объект", row=row, field="трамваи")
+                continue
+            for shift in ("смена_1", "смена_2"):
+                window = t.get(shift)
+                if window is None:
+                    continue
+                if not isinstance(window, dict):
+                    report.add(ERROR, name, "Смена не объект", row=row, field=shift, value=t.get("номер"))
+                    continue
+                for part in ("отправление", "прибытие"):
+                    value = window.get(part)
+                    if not isinstance(value, str) or not TIME_FORMAT.fullmatch(value):
+                        report.add(ERROR, name, f"Время не в формате ЧЧ:ММ (вагон {t.get('номер')})",
+                                   row=row, field=f"{shift}.{part}", value=value)
+    return routes
+
+
+# ================= ЗАКРЕПЛЕНИЯ =================
+
+def _assignment_rows(folder: Path, report: ValidationReport):
+    """(файл, строка, запись) снимка и журнала закреплений."""
+    snapshot = folder / "assignments.json"
+    if snapshot.exists():
+        data = _load_json(snapshot, report)
+        if data is not None and not isinstance(data, list):
+            report.add(ERROR, snapshot.name, "Ожидается список закреплений")
+        elif data:
+            for row, rec in enumerate(data):
+                yield snapshot.name, row, rec
+
+    journal = folder / "assignments.journal.jsonl"
+    if journal.exists():
+        with open(journal, "r", encoding="utf-8") as f:
+            lines = [line for line in f]
+        for row, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                yield journal.name, row, json.loads(line)
+            except json.JSONDecodeError:
+                # Последнюю оборванную строку реестр пропускает сам
+                severity = WARNING if row == len(lines) - 1 else ERROR
+                report.add(severity, journal.name, "Строка журнала не JSON", row=row)
+
+
+def validate_assignments(folder: Path, report: ValidationReport, driver_ids: np.ndarray, routes: set):
+    recs = list(_assignment_rows(folder, report))
+    if not recs:
+        return
+    ids = np.fromiter((_as_int(rec.get("driver_id")) if isinstance(rec, dict) else -1 for _, _, rec in recs),
+                      dtype=np.int64, count=len(recs))
+    known = np.isin(ids, driver_ids)
+    removes = np.array([isinstance(rec, dict) and rec.get("op") == "remove" for _, _, rec in recs], dtype=bool)
+    allowed_routes = routes | {RESERVE_ROUTE}
+
+    for i in np.nonzero(ids < 0)[0]:
+        file, row, rec = recs[i]
+        report.add(ERROR, file, "Таб.№ закрепления не число", row=row, field="driver_id",
+                   value=rec.get("driver_id") if isinstance(rec, dict) else rec)
+    for i in np.nonzero((ids >= 0) & ~known & ~removes)[0]:
+        file, row, _ = recs[i]
+        report.add(ERROR, file, "Закрепление водителя, которого нет в табелях", row=row, field="driver_id",
+                   value=int(ids[i]))
+
+    for i, (file, row, rec) in enumerate(recs):
+        if not isinstance(rec, dict):
+            continue
+        route = rec.get("route_number")
+        if not removes[i] and (route is None or (routes and str(route) not in allowed_routes)):
+            report.add(WARNING, file, "Маршрута нет в расписании", row=row, field="route_number", value=route)
+        month, year = rec.get("month"), rec.get("year")
+        if month is not None and month not in MONTH_MAP and not (isinstance(month, int) and 1 <= month <= 12):
+            report.add(ERROR, file, "Неизвестный месяц закрепления", row=row, field="month", value=month)
+        if year is not None and (month is None or _as_int(year) < 0):
+            report.add(ERROR, file, "Год закрепления задается числом и только вместе с месяцем",
+                       row=row, field="year", value=year)
+
+
+# ================= ВСЯ ПАПКА =================
+
+def validate_folder(data_folder: str = "data", drivers: Optional[Dict[str, object]] = None) -> ValidationReport:
+    """
+    drivers — уже прочитанный JSON табелей {имя файла: данные} (DataLoader.load_all):
+    эти файлы не читаются второй раз, остальные читаются здесь.
+    """
+    folder = Path(data_folder)
+    report = ValidationReport()
+
+    drivers_dir = folder / "drivers_json"
+    id_parts = []
+    if not drivers_dir.exists():
+        report.add(ERROR, "drivers_json", "Папка табелей не найдена")
+    else:
+        for path in sorted(p for p in drivers_dir.iterdir() if p.suffix == ".json" and not p.name.startswith(".")):
+            if drivers is not None and path.name in drivers:
+                id_parts.append(validate_drivers_data(path.name, drivers[path.name], report))
+            else:
+                id_parts.append(validate_drivers_file(path, report))
+    driver_ids = np.unique(np.concatenate(id_parts)) if id_parts else np.empty(0, dtype=np.int64)
+
+    routes = validate_schedule(folder / "schedule.json", report)
+    validate_assignments(folder, report, driver_ids, routes)
+    return report
+
+
+def print_report(report: ValidationReport, limit: int = 30):
+    errors, warnings = len(report.errors), len(report.warnings)
+    print(f"\n--- ПРОВЕРКА ДАННЫХ: ошибок {errors}, предупреждений {warnings} ---")
+    if not report.issues:
+        print("✅ Проблем не найдено")
+        return
+    for (file, message), count in report.summary().most_common():
+        print(f"  {file}: {message} — {count}")
+
+    print()
+    for issue in report.issues[:limit]:
+        mark = "❌" if issue["severity"] == ERROR else "⚠️"
+        where = issue["file"]
+        if issue["row"] is not None:
+            where += f", строка {issue['row']}"
+        if issue["day"] is not None:
+            where += f", день {issue['day']}"
+        value = f" ({issue['field']}={issue['value']!r})" if issue["field"] else ""
+        print(f"{mark} {where}: {issue['message']}{value}")
+    if len(report.issues) > limit:
+        print(f"... и еще {len(report.issues) - limit}")
@@ -0,0 +1,105 @@
+# src/workload.py
+"""
+Накопительная статистика нагрузки, которую WorkforceAnalyzer ведет по ходу расчета.
+
+Каждое назначение сразу добавляется в счетчики водителя и маршрута, поэтому
+после прогона сводка готова без повторного разбора результатов
+и строк вида "123 (Рез)". Счетчики лежат в типизированных массивах
+(array.array) по колонкам; водитель/маршрут — индекс строки в них.
+"""
+from array import array
+from typing import Dict, List
+
+
+class _Columns:
+    """Набор колонок одинаковой длины; строка добавляется при первом обращении к ключу."""
+
+    def __init__(self, spec: Dict[str, str]):
+        self.spec = spec
+        self.index: Dict[object, int] = {}
+        self.cols = {name: array(code) for name, code in spec.items()}
+
+    def row(self, key) -> int:
+        idx = self.index.get(key)
+        if idx is None:
+            idx = self.index[key] = len(self.index)
+            for col in self.cols.values():
+                col.append(0)
+        return idx
+
+    def rows(self, key_name: str) -> List[dict]:
+        names = list(self.cols)
+        columns = [self.cols[n] for n in names]
+        return [
+            {key_name: key, **{n: col[idx] for n, col in zip(names, columns)}}
+            for key, idx in self.index.items()
+        ]
+
+
+class WorkloadStats:
+    DRIVER_COLUMNS = {
+        "shifts": "l", "shift_1": "l", "shift_2": "l",
+        "hours": "d", "reserve_shifts": "l", "warnings": "l",
+    }
+    ROUTE_COLUMNS = {
+        "filled": "l", "unfilled": "l", "reserve_shifts": "l",
+        "warnings": "l", "hours": "d",
+    }
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.drivers = _Columns(self.DRIVER_COLUMNS)
+        self.routes = _Columns(self.ROUTE_COLUMNS)
+
+    def record(self, driver_id: int, route_number: str, shift: str, hours: float,
+               from_reserve: bool, warnings: int, sign: int = 1):
+        """Учет назначения; sign=-1 — отмена ранее учтенного (например, диспетчером)."""
+        d = self.drivers.row(int(driver_id))
+        cols = self.drivers.cols
+        cols["shifts"][d] += sign
+        cols["shift_1" if shift == "1" else "shift_2"][d] += sign
+        cols["hours"][d] += sign * hours
+        if from_reserve:
+            cols["reserve_shifts"][d] += sign
+        if warnings:
+            cols["warnings"][d] += sign * warnings
+
+        r = self.routes.row(str(route_number))
+        cols = self.routes.cols
+        cols["filled"][r] += sign
+        cols["hours"][r] += sign * hours
+        if from_reserve:
+            cols["reserve_shifts"][r] += sign
+        if warnings:
+            cols["warnings"][r] += sign * warnings
+
+    def record_unfilled(self, route_number: str, sign: int = 1):
+        self.routes.cols["unfilled"][self.routes.row(str(route_number))] += sign
+
+    # ================= СВОДКА =================
+
+    def driver_table(self, sort_by: str = "hours") -> List[dict]:
+        return sorted(self.drivers.rows("driver_id"), key=lambda row: (-row[sort_by], row["driver_id"]))
+
+    def route_table(self) -> List[dict]:
+        return sorted(self.routes.rows("route"), key=lambda row: (len(row["route"]), row["route"]))
+
+    def summary(self) -> dict:
+        return {"drivers": self.driver_table(), "routes": self.route_table()}
+
+
+def print_workload(stats: WorkloadStats, top: int = 15):
+    print(f"\n{'Маршрут':<10} {'Закрыто':>8} {'Пусто':>6} {'Резерв':>7} {'Недоотдых':>10} {'Часов':>8}")
+    for row in stats.route_table():
+        print(f"{row['route']:<10} {row['filled']:>8} {row['unfilled']:>6} {row['reserve_shifts']:>7} "
+              f"{row['warnings']:>10} {row['hours']:>8.1f}")
+
+    drivers = stats.driver_table()
+    print(f"\n{'Водитель':<10} {'Смен':>5} {'1-х':>5} {'2-х':>5} {'Часов':>7} {'Резерв':>7} {'Недоотдых':>10}")
+    for row in drivers[:top]:
+        print(f"{row['driver_id']:<10} {row['shifts']:>5} {row['shift_1']:>5} {row['shift_2']:>5} "
+              f"{row['hours']:>7.1f} {row['reserve_shifts']:>7} {row['warnings']:>10}")
+    if len(drivers) > top:
+        print(f"... всего водителей со сменами: {len(drivers)}")
@@ -0,0 +1,171 @@
+# tests/benchmarks/depot_factory.py
+"""
+Генератор синтетических депо для бенчмарков.
+
+Создает папку данных в том же формате, что и реальный ETL:
+drivers_json/drivers_<month>.json, schedule.json, assignments.json.
+Графики водителей строятся теми же функциями, что и генератор табелей
+(CYCLIC_PATTERNS + 5x2), поэтому табели выглядят как настоящие.
+Результат полностью определяется seed.
+"""
+import json
+import random
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.help_functions.clean_parsing_tabeles import (
+    CYCLIC_PATTERNS, META_COLS, MONTH_NAMES, build_cycle_for_pattern, build_month_codes,
+    encode_cycle, write_formatted_month,
+)
+from src.utils import MONTH_MAP
+
+RU_MONTHS = {num: name for name, num in MONTH_MAP.items()}
+
+# Доли графиков в депо (примерно как в реальных табелях)
+PATTERN_WEIGHTS = {
+    '5x2': 0.30,
+    '4x2': 0.20,
+    '3x2x3x1': 0.15,
+    '3x1x2x2': 0.15,
+    '3x4': 0.10,
+    '1x6': 0.10,
+}
+MODE_WEIGHTS = {'1': 0.4, '2': 0.4, '1x2': 0.2}
+
+RESERVE_ROUTE = "ANY"
+
+
+@dataclass
+class DepotSpec:
+    n_drivers: int
+    n_routes: Optional[int] = None         # по умолчанию ~60 водителей на маршрут
+    trams_per_route: int = 10
+    reserve_share: float = 0.15            # доля водителей в резерве "ANY"
+    year: int = 2026
+    months: int = 12
+    seed: int = 42
+
+    def routes(self):
+        n_routes = self.n_routes or max(1, self.n_drivers // 60)
+        return [str(r) for r in range(1, n_routes + 1)]
+
+
+class SyntheticDepot:
+    """Водители с графиками (план как у build_plan) и маршруты с расписанием."""
+
+    def __init__(self, spec: DepotSpec):
+        self.spec = spec
+        rnd = random.Random(spec.seed)
+        n = spec.n_drivers
+
+        self.tab_numbers = list(range(1, n + 1))
+        self.patterns = rnd.choices(list(PATTERN_WEIGHTS), weights=list(PATTERN_WEIGHTS.values()), k=n)
+        self.modes = rnd.choices(list(MODE_WEIGHTS), weights=list(MODE_WEIGHTS.values()), k=n)
+
+        cycles, cycle_index = [], {}
+        cycle_id = np.full(n, -1, dtype=np.int64)
+        offset = np.zeros(n, dtype=np.int64)
+        shift_5x2 = np.zeros(n, dtype=np.int8)
+
+        for i, (pattern, mode) in enumerate(zip(self.patterns, self.modes)):
+            if pattern == '5x2':
+                shift_5x2[i] = 2 if mode == '2' else 1
+                continue
+            cycle = tuple(build_cycle_for_pattern(pattern, mode, CYCLIC_PATTERNS[pattern]))
+            if cycle not in cycle_index:
+                cycle_index[cycle] = len(cycles)
+                cycles.append(encode_cycle(cycle))
+            cycle_id[i] = cycle_index[cycle]
+            offset[i] = rnd.randrange(len(cycle))
+
+        self.plan = {
+            "anchor": date(spec.year, 1, 1),
+            "cycles": cycles,
+            "cycle_id": cycle_id,
+            "offset": offset,
+            "shift_5x2": shift_5x2,
+        }
+
+        # Закрепления: резерв + равномерно по маршрутам
+        self.routes = spec.routes()
+        self.assignments = {}
+        for i, tab in enumerate(self.tab_numbers):
+            if rnd.random() < spec.reserve_share:
+                self.assignments[tab] = RESERVE_ROUTE
+            else:
+                self.assignments[tab] = self.routes[i % len(self.routes)]
+
+    # ================= ДАННЫЕ =================
+
+    def month_codes(self, month_num: int):
+        return build_month_codes(self.plan, self.spec.year, month_num)
+
+    def month_json(self, month_num: int) -> dict:
+        values = self.month_codes(month_num)
+        days = [[{"day": d + 1, "value": str(v)} for d, v in enumerate(row)] for row in values]
+        return {
+            "month": RU_MONTHS[month_num],
+            "year": self.spec.year,
+            "drivers": [
+                {"tab_number": tab, "schedule": pattern, "mode": mode, "days": row_days}
+                for tab, pattern, mode, row_days in zip(self.tab_numbers, self.patterns, self.modes, days)
+            ],
+        }
+
+    def schedule_json(self) -> list:
+        schedules = []
+        for route in self.routes:
+            for day_type in ("рабочий", "выходной"):
+                trams = self.spec.trams_per_route if day_type == "рабочий" else max(1, self.spec.trams_per_route * 2 // 3)
+                schedules.append({
+                    "маршрут": route,
+                    "день": day_type,
+                    "трамваи": [
+                        {
+                            "номер": str(t),
+                            "смена_1": {"отправление": f"05:{t % 60:02d}", "прибытие": f"13:{t % 60:02d}"},
+                            "смена_2": {"отправление": f"13:{t % 60:02d}", "прибытие": f"22:{t % 60:02d}"},
+                        }
+                        for t in range(1, trams + 1)
+                    ],
+                })
+        return schedules
+
+    def month_frame(self, month_num: int) -> pd.DataFrame:
+        """Табель месяца в виде таблицы, как его пишет clean_parsing_tabeles."""
+        meta = pd.DataFrame({
+            'Таб.№': self.tab_numbers, 'График': self.patterns, 'Режим': self.modes, 'см.': "", 'вых.': "",
+        })[META_COLS]
+        values = self.month_codes(month_num)
+        days = pd.DataFrame(values, columns=[str(d) for d in range(1, values.shape[1] + 1)])
+        return pd.concat([meta, days], axis=1)
+
+    # ================= ЗАПИСЬ =================
+
+    def write(self, folder: Path) -> Path:
+        """Пишет папку данных, которую можно открыть через DataLoader(folder)."""
+        folder = Path(folder)
+        drivers_dir = folder / "drivers_json"
+        drivers_dir.mkdir(parents=True, exist_ok=True)
+
+        for month_num in range(1, self.spec.months + 1):
+            with open(drivers_dir / f"drivers_{MONTH_NAMES[month_num]}.json", "w", encoding="utf-8") as f:
+                json.dump(self.month_json(month_num), f, ensure_ascii=False)
+
+        with open(folder / "schedule.json", "w", encoding="utf-8") as f:
+            json.dump(self.schedule_json(), f, ensure_ascii=False)
+
+        with open(folder / "assignments.json", "w", encoding="utf-8") as f:
+            json.dump([{"driver_id": tab, "route_number": route} for tab, route in self.assignments.items()],
+                      f, ensure_ascii=False)
+        return folder
+
+    def write_tabel_xlsx(self, path: Path, month_num: int = 1) -> Path:
+        """Месячный табель в Excel (вход для parsing_tabel)."""
+        write_formatted_month(self.month_frame(month_num), str(path), month_num, self.spec.year)
+        return Path(path)
@@ -0,0 +1,263 @@
+# tests/benchmarks/run_benchmarks.py
+"""
+Бенчмарки загрузки, генерации наряда, месячной симуляции и Excel-парсеров
+на синтетических депо разного размера.
+
+Запуск из корня проекта:
+    python -m tests.benchmarks.run_benchmarks                 # все уровни
+    python -m tests.benchmarks.run_benchmarks --tiers 100 1000
+    python -m tests.benchmarks.run_benchmarks --update-baseline
+
+Результаты пишутся в tests/benchmarks/results/latest.json и сравниваются
+с tests/benchmarks/baseline.json; при регрессии код возврата 1.
+"""
+import argparse
+import calendar
+import contextlib
+import io
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from tests.benchmarks.depot_factory import DepotSpec, SyntheticDepot
+from src.utils import MONTH_MAP
+
+BENCH_DIR = Path(__file__).resolve().parent
+RESULTS_FILE = BENCH_DIR / "results" / "latest.json"
+BASELINE_FILE = BENCH_DIR / "baseline.json"
+
+DEFAULT_TIERS = [100, 1000, 5000, 20000]
+MONTH = "Январь"
+
+# Регрессия: медленнее/больше базы на TOLERANCE и не меньше чем на абсолютный порог
+TOLERANCE = 0.25
+MIN_SECONDS_DELTA = 0.05
+MIN_MB_DELTA = 1.0
+
+
+def _quiet(func):
+    """Глушит print() внутри измеряемого кода (DataLoader печатает по строке на файл)."""
+    def wrapper(*args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def measure(func, repeat: int = 1) -> dict:
+    """
+    Лучшее время из repeat запусков, пиковая память отдельного запуска под tracemalloc
+    и память, которую держит результат (например, загруженный DataLoader).
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        result = func()
+        retained, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(best, 4), "peak_mb": round(peak / 2 ** 20, 2),
+            "retained_mb": round(retained / 2 ** 20, 2)}
+
+
+# ================= СЦЕНАРИИ =================
+
+def bench_tier(n_drivers: int, workdir: Path) -> dict:
+    from src.database import DataLoader
+    from src.models import DriverRecord
+    from src.scheduler import WorkforceAnalyzer
+    from src.parsers.parsing_tabel import iter_sheet_rows, parse_whole_sheet
+    from src.help_functions.clean_parsing_tabeles import write_formatted_month
+
+    depot = SyntheticDepot(DepotSpec(n_drivers=n_drivers))
+    data_dir = depot.write(workdir / "data")
+    year = depot.spec.year
+    route = depot.routes[0]
+    results = {}
+
+    @_quiet
+    def load():
+        db = DataLoader(str(data_dir))
+        db.load_all()
+        return db
+
+    results["load_all"] = measure(load)
+
+    def load_pydantic():
+        # Прежнее представление (до DriverProfile/Driver): модель на каждую запись табеля
+        drivers_dir = data_dir / "drivers_json"
+        models = []
+        for path in sorted(drivers_dir.glob("*.json")):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            models.extend(DriverRecord.model_validate(d) for d in data.get("drivers", []))
+        return models
+
+    results["load_drivers_pydantic"] = measure(load_pydantic)
+    db = load()
+
+    def daily_roster():
+        WorkforceAnalyzer(db).generate_daily_roster(route, 1, MONTH, year)
+
+    results["daily_roster"] = measure(daily_roster, repeat=3)
+
+    days_in_month = calendar.monthrange(year, MONTH_MAP[MONTH])[1]
+
+    def month_simulation():
+        analyzer = WorkforceAnalyzer(db)
+        for day in range(1, days_in_month + 1):
+            analyzer.generate_daily_roster(route, day, MONTH, year)
+
+    results["month_simulation"] = measure(month_simulation)
+    del db
+
+    frame = depot.month_frame(1)
+    xlsx_path = workdir / "january.xlsx"
+
+    def format_tabel():
+        write_formatted_month(frame, str(xlsx_path), 1, year)
+
+    results["format_tabel"] = measure(format_tabel)
+
+    def parse_tabel():
+        parse_whole_sheet(iter_sheet_rows(xlsx_path), "january", year)
+
+    results["parse_tabel"] = measure(parse_tabel)
+    return results
+
+
+def run_tier_isolated(n_drivers: int) -> dict:
+    """
+    Уровень запускается в отдельном процессе: память предыдущих уровней не мешает,
+    а нехватка памяти на большом депо не обрывает весь прогон.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-m", "tests.benchmarks.run_benchmarks", "--worker", str(n_drivers)],
+        capture_output=True, text=True, encoding="utf-8",
+    )
+    if proc.returncode != 0:
+        tail = (proc.stderr or "").strip().splitlines()[-1:] or [f"код возврата {proc.returncode}"]
+        raise RuntimeError(tail[0])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _worker(n_drivers: int):
+    workdir = Path(tempfile.mkdtemp(prefix=f"bench_{n_drivers}_"))
+    try:
+        print(json.dumps(bench_tier(n_drivers, workdir)))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ================= СРАВНЕНИЕ =================
+
+def compare(results: dict, baseline: dict):
+    """Список регрессий: (бенчмарк, уровень, метрика, база, сейчас)."""
+    regressions = []
+    for name, tiers in results.items():
+        for tier, metrics in tiers.items():
+            base = baseline.get(name, {}).get(tier)
+            if not base:
+                continue
+            for metric, min_delta in (("seconds", MIN_SECONDS_DELTA), ("peak_mb", MIN_MB_DELTA),
+                                      ("retained_mb", MIN_MB_DELTA)):
+                if metric not in base or metric not in metrics:
+                    continue
+                old, new = base[metric], metrics[metric]
+                if new > old * (1 + TOLERANCE) and new - old > min_delta:
+                    regressions.append((name, tier, metric, old, new))
+    return regressions
+
+
+def print_table(results: dict, baseline: dict):
+    print(f"\n{'Бенчмарк':<18} {'Водит.':>7} {'Время, с':>10} {'База':>10} {'Пик, МБ':>10} {'База':>10}")
+    print("-" * 70)
+    for name, tiers in results.items():
+        for tier, m in tiers.items():
+            base = baseline.get(name, {}).get(tier, {})
+            print(f"{name:<18} {tier:>7} {m['seconds']:>10.3f} {base.get('seconds', float('nan')):>10.3f} "
+                  f"{m['peak_mb']:>10.1f} {base.get('peak_mb', float('nan')):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки на синтетическом депо")
+    parser.add_argument("--tiers", type=int, nargs="+", default=DEFAULT_TIERS, help="размеры депо (водителей)")
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="сохранить результаты как базу")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker)
+        return
+
+    results = {}
+    failed = {}
+    for n_drivers in args.tiers:
+        print(f"▶ Депо на {n_drivers} водителей...")
+        try:
+            tier_results = run_tier_isolated(n_drivers)
+        except RuntimeError as e:
+            print(f"   ❌ уровень не завершился: {e}")
+            failed[str(n_drivers)] = str(e)
+            continue
+        for name, metrics in tier_results.items():
+            results.setdefault(name, {})[str(n_drivers)] = metrics
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+        "failed_tiers": failed,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты: {args.output}")
+
+    baseline = {}
+    if args.baseline.exists():
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    print_table(results, baseline)
+
+    if args.update_baseline:
+        # Уровни, которые не запускались в этот раз, в базе сохраняются
+        merged = {name: dict(tiers) for name, tiers in baseline.items()}
+        for name, tiers in results.items():
+            merged.setdefault(name, {}).update(tiers)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": report["meta"], "results": merged, "failed_tiers": failed},
+                      f, ensure_ascii=False, indent=2)
+        print(f"База обновлена: {args.baseline}")
+        return
+
+    regressions = compare(results, baseline)
+    if regressions or failed:
+        print("\n❌ Регрессии:")
+        for name, tier, metric, old, new in regressions:
+            print(f"   {name} [{tier}] {metric}: {old} → {new}")
+        for tier, error in failed.items():
+            print(f"   уровень {tier}: {error}")
+        sys.exit(1)
+    print("\n✅ Регрессий нет" if baseline else "\nБазы нет — сравнение пропущено")
+
+
+if __name__ == "__main__":
+    main()
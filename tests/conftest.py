@@ -0,0 +1,41 @@
+# tests/conftest.py
+"""
+Общие данные для тестов: маленькое синтетическое депо (tests/benchmarks/depot_factory.py).
+
+Запуск: python -m pytest tests
+"""
+import contextlib
+import io
+import shutil
+
+import pytest
+
+from tests.benchmarks.depot_factory import DepotSpec, SyntheticDepot
+
+# 2 маршрута по 4 вагона, ~50 водителей на маршрут: замена на смену всегда найдется
+DEPOT_SPEC = DepotSpec(n_drivers=120, n_routes=2, trams_per_route=4, months=2)
+MONTH = "Январь"
+YEAR = DEPOT_SPEC.year
+ROUTE = "1"
+
+
+@pytest.fixture(scope="session")
+def depot_dir(tmp_path_factory):
+    """Папка данных депо. Только для чтения — тестам, которые пишут, нужен data_dir."""
+    return SyntheticDepot(DEPOT_SPEC).write(tmp_path_factory.mktemp("depot") / "data")
+
+
+@pytest.fixture
+def data_dir(depot_dir, tmp_path):
+    """Своя копия папки данных для теста."""
+    return shutil.copytree(depot_dir, tmp_path / "data")
+
+
+@pytest.fixture(scope="session")
+def db(depot_dir):
+    from src.database import DataLoader
+
+    loader = DataLoader(str(depot_dir))
+    with contextlib.redirect_stdout(io.StringIO()):
+        loader.load_all()
+    return loader
@@ -0,0 +1,105 @@
+# tests/test_assignment_registry.py
+"""
+Реестр закреплений (src/db/assignment_registry.py): журнал поверх снимка,
+закрепления на месяц и свертка журнала.
+
+Запуск: python -m pytest tests
+"""
+import json
+
+from src.db.assignment_registry import AssignmentRegistry
+
+
+def make_registry(tmp_path, records=None, compact_every=1000):
+    path = tmp_path / "assignments.json"
+    if records is not None:
+        path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+    return AssignmentRegistry(path, compact_every=compact_every).load()
+
+
+def journal_lines(registry):
+    if not registry.journal_path.exists():
+        return []
+    return registry.journal_path.read_text(encoding="utf-8").splitlines()
+
+
+def test_changes_go_to_journal_not_snapshot(tmp_path):
+    registry = make_registry(tmp_path, [{"driver_id": 1, "route_number": 47}])
+    snapshot = registry.path.read_text(encoding="utf-8")
+
+    registry.upsert(2, "9")
+    registry.upsert(1, "ANY", month="Март", year=2026)
+    registry.remove(1, month="Март", year=2026)
+    registry.upsert(1, "9", month="Март")
+
+    assert registry.path.read_text(encoding="utf-8") == snapshot
+    assert len(journal_lines(registry)) == 4
+
+    reloaded = AssignmentRegistry(registry.path).load()
+    assert sorted(reloaded.records(), key=lambda r: (r["driver_id"], "month" in r)) == [
+        {"driver_id": 1, "route_number": "47"},
+        {"driver_id": 1, "route_number": "9", "month": "Март"},
+        {"driver_id": 2, "route_number": "9"},
+    ]
+
+
+def test_resolve_prefers_most_specific_period(tmp_path):
+    registry = make_registry(tmp_path, [
+        {"driver_id": 1, "route_number": "47"},
+        {"driver_id": 1, "route_number": "9", "month": "Март"},
+        {"driver_id": 1, "route_number": "ANY", "month": "Март", "year": 2026},
+    ])
+    assert registry.resolve(1, "Март", 2026) == "ANY"
+    assert registry.resolve(1, "Март", 2027) == "9"
+    assert registry.resolve(1, "Апрель", 2026) == "47"
+    assert registry.resolve(1, "Unknown") == "47"
+    assert registry.resolve(2, "Март", 2026) is None
+
+
+def test_add_many_if_absent_writes_one_batch(tmp_path):
+    registry = make_registry(tmp_path, [{"driver_id": 1, "route_number": "47"}])
+
+    added = registry.add_many_if_absent([1, 2, 3, 3], "ANY")
+
+    assert added == 2
+    assert [json.loads(line)["driver_id"] for line in journal_lines(registry)] == [2, 3]
+    assert registry.resolve(1) == "47"
+    assert registry.add_if_absent(2, "9") is False
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path):
+    registry = make_registry(tmp_path, [{"driver_id": 1, "route_number": "47"}], compact_every=3)
+
+    registry.upsert(2, "9")
+    registry.upsert(3, "9")
+    assert len(journal_lines(registry)) == 2
+    registry.remove(1)  # третья операция — свертка
+
+    assert not registry.journal_path.exists()
+    snapshot = json.loads(registry.path.read_text(encoding="utf-8"))
+    assert sorted(r["driver_id"] for r in snapshot) == [2, 3]
+    assert not (tmp_path / "assignments.json.tmp").exists()
+    assert AssignmentRegistry(registry.path).load().records() == registry.records()
+
+
+def test_torn_last_journal_line_is_skipped(tmp_path):
+    registry = make_registry(tmp_path, [])
+    registry.upsert(5, "47")
+    with open(registry.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "upsert", "driver_id": 6, "route_')
+
+    reloaded = AssignmentRegistry(registry.path).load()
+    assert reloaded.resolve(5) == "47"
+    assert 6 not in reloaded
+
+
+def test_replaying_journal_after_compaction_changes_nothing(tmp_path):
+    registry = make_registry(tmp_path, [])
+    registry.upsert(1, "47")
+    registry.remove(2)
+    journal = registry.journal_path.read_text(encoding="utf-8")
+    registry.compact()
+
+    # Сбой между записью снимка и удалением журнала
+    registry.journal_path.write_text(journal, encoding="utf-8")
+    assert AssignmentRegistry(registry.path).load().records() == [{"driver_id": 1, "route_number": "47"}]
@@ -0,0 +1,90 @@
+# tests/test_database.py
+"""
+Разбор табелей drivers_json: проверка записей и общая таблица кодов дней.
+
+Запуск: python -m pytest tests
+"""
+import json
+import threading
+
+import pytest
+
+from src import models
+from src.database import read_drivers_file
+from src.models import DAY_VALUES, UNKNOWN_DAY_CODE, UNKNOWN_DAY_VALUE, encode_day_value
+
+
+def write_month(path, drivers):
+    path.write_text(json.dumps({"month": "Март", "year": 2026, "drivers": drivers}, ensure_ascii=False),
+                    encoding="utf-8")
+    return str(path)
+
+
+def driver(**fields):
+    record = {"tab_number": 9, "schedule": "5x2", "mode": "1",
+              "days": [{"day": 1, "value": "1"}, {"day": 2, "value": "В"}]}
+    record.update(fields)
+    return record
+
+
+def test_reads_rows(tmp_path):
+    month, year, rows = read_drivers_file(write_month(tmp_path / "m.json", [driver()]))
+    assert (month, year) == ("Март", 2026)
+    tab, schedule, mode, codes = rows[0]
+    assert (tab, schedule, mode) == (9, "5x2", "1")
+    assert [DAY_VALUES[c] for c in codes] == ["1", "В"]
+
+
+def test_tab_number_as_string_is_converted(tmp_path):
+    _, _, rows = read_drivers_file(write_month(tmp_path / "m.json", [driver(tab_number="0009")]))
+    assert rows[0][0] == 9
+
+
+@pytest.mark.parametrize("record, field, message", [
+    ({"tab_number": 9, "mode": "1", "days": []}, "schedule", "Field required"),
+    (driver(tab_number="9a"), "tab_number", "Input should be a valid integer"),
+    (driver(mode=1), "mode", "Input should be a valid string"),
+    (driver(days=[{"day": 1}]), "days.0.value", "Field required"),
+])
+def test_invalid_record_reports_like_pydantic_model(tmp_path, record, field, message):
+    with pytest.raises(ValueError) as err:
+        read_drivers_file(write_month(tmp_path / "m.json", [record]))
+    text = str(err.value)
+    assert "validation error for Driver" in text
+    assert f"\n{field}\n  {message}" in text
+
+
+def test_full_code_table_keeps_month_file(tmp_path, monkeypatch):
+    from src.database import DataLoader
+
+    known = encode_day_value("1")
+    monkeypatch.setattr(models, "MAX_DAY_VALUES", len(DAY_VALUES) - 1)
+    assert encode_day_value("1") == known  # известные значения кодируются как раньше
+    assert encode_day_value("значение, которого нет ни в одном табеле") == UNKNOWN_DAY_CODE
+
+    folder = tmp_path / "data"
+    (folder / "drivers_json").mkdir(parents=True)
+    write_month(folder / "drivers_json" / "m.json", [driver(days=[{"day": 1, "value": "1"},
+                                                                  {"day": 2, "value": "ещё одно новое"}])])
+    loader = DataLoader(str(folder))
+    loader._load_drivers()
+    assert [d.get_status_for_day(day) for d in loader.drivers for day in (1, 2)] == ["1", UNKNOWN_DAY_VALUE]
+
+
+def test_concurrent_encoding_gives_one_code_per_value():
+    values = [f"t{i}" for i in range(20)]
+    codes = [[] for _ in range(4)]
+    barrier = threading.Barrier(len(codes))
+
+    def encode(out):
+        barrier.wait()
+        out.extend(encode_day_value(v) for v in values)
+
+    threads = [threading.Thread(target=encode, args=(out,)) for out in codes]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(c == codes[0] for c in codes)
+    assert [DAY_VALUES[c] for c in codes[0]] == values
@@ -0,0 +1,176 @@
+# tests/test_dispatcher.py
+"""
+Оперативные изменения наряда (src/dispatcher.py): замена заболевшего, возврат,
+снятие и добавление вагона; история отдыха, нагрузка и журнал событий.
+
+Запуск: python -m pytest tests
+"""
+import json
+
+import pytest
+
+from src.dispatcher import Dispatcher
+from src.scheduler import WorkforceAnalyzer
+from tests.conftest import MONTH, ROUTE, YEAR
+
+DAY = 5
+
+
+@pytest.fixture
+def dispatcher(db, tmp_path):
+    return Dispatcher(WorkforceAnalyzer(db), ROUTE, DAY, MONTH, YEAR, log_path=str(tmp_path / "events.jsonl"))
+
+
+def route_row(dispatcher) -> dict:
+    return next(r for r in dispatcher.analyzer.workload.route_table() if r["route"] == ROUTE)
+
+
+def driver_shifts(dispatcher, driver_id: int) -> int:
+    rows = {r["driver_id"]: r for r in dispatcher.analyzer.workload.driver_table()}
+    return rows[driver_id]["shifts"] if driver_id in rows else 0
+
+
+def assert_consistent(dispatcher):
+    """Нагрузка, история и пулы совпадают с тем, что сейчас стоит в наряде."""
+    slots = [s for _, s in dispatcher.result.iter_shifts() if s.required]
+    filled = [s for s in slots if s.filled]
+    row = route_row(dispatcher)
+    assert row["filled"] == len(filled)
+    assert row["unfilled"] == len(slots) - len(filled) == len(dispatcher.open_shifts())
+
+    on_shift = {s.driver_id for s in filled}
+    assert on_shift == set(dispatcher.assigned.values())
+    assert set(dispatcher.analyzer.history) == {str(d) for d in on_shift}
+    pooled = {int(d.id) for d in dispatcher.main_pool + dispatcher.reserve_pool}
+    assert not pooled & on_shift
+    assert not pooled & dispatcher.unavailable
+    assert set(dispatcher.result.leftover) == pooled
+
+
+def first_assigned(dispatcher):
+    (tram, shift), driver_id = next(iter(dispatcher.assigned.items()))
+    return tram, shift, driver_id
+
+
+def test_roster_matches_analyzer(db, dispatcher):
+    expected = WorkforceAnalyzer(db).generate_daily_roster(ROUTE, DAY, MONTH, YEAR)
+    assert dispatcher.result.to_dict() == expected.to_dict()
+    assert_consistent(dispatcher)
+
+
+def test_sick_driver_is_replaced(dispatcher):
+    tram, shift, sick = first_assigned(dispatcher)
+
+    entry = dispatcher.driver_sick(sick)
+
+    slot = dispatcher.trams[tram].shift(shift)
+    assert slot.filled and slot.driver_id != sick
+    assert sick not in dispatcher.assigned.values()
+    assert sick in dispatcher.unavailable
+    assert driver_shifts(dispatcher, sick) == 0
+    assert driver_shifts(dispatcher, slot.driver_id) == 1
+    assert str(sick) not in dispatcher.analyzer.history
+    assert entry["event"] == "driver_sick"
+    assert entry["changes"] == [{"tram": tram, "shift": shift, "old": str(sick), "new": slot.driver,
+                                 "warnings": list(slot.warnings)}]
+    assert entry["unfilled"] == 0
+    assert_consistent(dispatcher)
+
+
+def test_sick_then_available_restores_pool(dispatcher):
+    _, _, sick = first_assigned(dispatcher)
+    dispatcher.driver_sick(sick)
+
+    entry = dispatcher.driver_available(sick)
+
+    # Его смену уже закрыла замена: водитель возвращается в пул, наряд не меняется
+    assert sick not in dispatcher.unavailable
+    assert sick in dispatcher.result.leftover
+    assert entry["changes"] == []
+    assert_consistent(dispatcher)
+
+
+def test_sick_without_replacement_leaves_open_shift(dispatcher):
+    tram, shift, sick = first_assigned(dispatcher)
+    dispatcher.main_pool.clear()
+    dispatcher.reserve_pool.clear()
+
+    entry = dispatcher.driver_sick(sick)
+    assert entry["changes"] == [{"tram": tram, "shift": shift, "old": str(sick), "new": None}]
+    assert entry["unfilled"] == 1
+    assert_consistent(dispatcher)
+
+    # Выздоровел — закрывает свою же пустую смену, история отдыха снова его
+    entry = dispatcher.driver_available(sick)
+    assert dispatcher.assigned[(tram, shift)] == sick
+    assert entry["changes"][0]["new"] == str(sick)
+    assert entry["unfilled"] == 0
+    assert "end_dt" in dispatcher.analyzer.history[str(sick)]
+    assert_consistent(dispatcher)
+
+
+def test_history_before_roster_is_restored(db):
+    analyzer = WorkforceAnalyzer(db)
+    Dispatcher(analyzer, ROUTE, DAY - 1, MONTH, YEAR)
+    before = dict(analyzer.history)
+    dispatcher = Dispatcher(analyzer, ROUTE, DAY, MONTH, YEAR)
+    sick = next(d for d in dispatcher.assigned.values() if str(d) in before)
+    assert analyzer.history[str(sick)] != before[str(sick)]
+
+    dispatcher.driver_sick(sick)
+    # Снятие со смены возвращает запись вчерашнего дня, а не удаляет ее
+    assert analyzer.history[str(sick)] == before[str(sick)]
+
+
+def test_withdraw_and_add_run(dispatcher):
+    tram, _, _ = first_assigned(dispatcher)
+    freed = {d for (t, _), d in dispatcher.assigned.items() if t == tram}
+
+    entry = dispatcher.withdraw_tram(tram)
+    assert tram not in dispatcher.trams
+    assert {int(c["old"]) for c in entry["changes"] if c["old"]} >= freed
+    assert freed <= set(dispatcher.result.leftover)
+    assert_consistent(dispatcher)
+
+    entry = dispatcher.add_run("99", shifts=("1",))
+    assert dispatcher.trams["99"].shift("1").filled
+    assert not dispatcher.trams["99"].shift("2").required
+    assert entry["unfilled"] == 0
+    assert_consistent(dispatcher)
+
+    with pytest.raises(KeyError):
+        dispatcher.withdraw_tram(tram)
+    with pytest.raises(ValueError):
+        dispatcher.add_run("99")
+
+
+def test_event_log_file(dispatcher):
+    _, _, sick = first_assigned(dispatcher)
+    dispatcher.apply({"type": "sick", "driver": sick})
+    dispatcher.apply({"type": "available", "driver": sick})
+    with pytest.raises(ValueError):
+        dispatcher.apply({"type": "unknown"})
+
+    with open(dispatcher.log_path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    assert [e["event"] for e in entries] == ["driver_sick", "driver_available"]
+    assert entries == dispatcher.log
+    assert all(e["route"] == ROUTE and e["date"] == f"{YEAR}-01-{DAY:02d}" for e in entries)
+
+
+def test_find_candidate_respects_tabel_and_order(db):
+    analyzer = WorkforceAnalyzer(db)
+    dispatcher = Dispatcher(analyzer, ROUTE, DAY, MONTH, YEAR)
+    start, duration = dispatcher._shift_window("1")
+    main, reserve = list(dispatcher.main_pool), list(dispatcher.reserve_pool)
+
+    driver, source, warnings = analyzer.find_candidate([main, reserve], DAY, "1", start, duration)
+    expected = next((d for d in main if d.get_status_for_day(DAY) == "1"), None)
+    if expected is None:
+        expected = next(d for d in reserve if d.get_status_for_day(DAY) == "1")
+    assert driver is expected
+    assert source == ("main" if expected in main else "reserve")
+    assert warnings == []
+    assert (main, reserve) == (dispatcher.main_pool, dispatcher.reserve_pool)  # списки не меняются
+
+    assert analyzer.find_candidate([[], []], DAY, "1", start, duration) == (None, None, [])
@@ -0,0 +1,21 @@
+# tests/test_metrics.py
+"""
+Метрики (src/metrics.py): выгрузка в текстовом формате Prometheus.
+
+Запуск: python -m pytest tests
+"""
+from src.metrics import Metrics
+
+
+def test_prometheus_label_values_are_escaped():
+    metrics = Metrics()
+    metrics.enable()
+    metrics.inc("load.errors", labels={"file": 'C:\\data\\"табель"\nфевраль.json'})
+    metrics.observe("load.file", 0.5, labels={"file": "ok.json"})
+
+    lines = metrics.to_prometheus().splitlines()
+
+    assert 'vkr_load_errors_total{file="C:\\\\data\\\\\\"табель\\"\\nфевраль.json"} 1' in lines
+    assert 'vkr_load_file_seconds_count{file="ok.json"} 1' in lines
+    # Каждая выборка — одна строка: перевод строки в метке не рвет выгрузку
+    assert all(line.startswith(("# TYPE ", "vkr_")) for line in lines)
@@ -0,0 +1,49 @@
+# tests/test_montecarlo.py
+"""
+Монте-Карло по больничным (src/montecarlo.py): маршруты дня делят один резерв,
+потребность в резерве считается и по депо.
+
+Запуск: python -m pytest tests
+"""
+import numpy as np
+
+from src import montecarlo
+from src.montecarlo import AbsenceModel, run_montecarlo
+from src.scenarios import Scenario
+from src.scheduler import WorkforceAnalyzer
+from tests.conftest import MONTH, YEAR
+
+SEED = 7
+
+
+def replay(model: AbsenceModel, run_id: int):
+    """Прогон run_id вручную: те же отсутствия, все маршруты дня одним анализатором."""
+    state = montecarlo._STATE
+    base, probs, routes = state["base"], state["probs"], state["routes"]
+    absent = model.sample(np.random.default_rng([SEED, run_id]), len(base.drivers), probs)
+    scenario = Scenario(base)
+    for row, col in zip(*np.nonzero(absent)):
+        scenario.set_cell(base.drivers[row].id, MONTH, int(col) + 1, "Б")
+
+    analyzer = WorkforceAnalyzer(scenario)
+    need = {r: [] for r in routes}
+    for day in range(1, len(probs) + 1):
+        for route in routes:
+            result = analyzer.generate_daily_roster(route, day, MONTH, YEAR)
+            need[route].append(result.unfilled_count() + sum(1 for _, s in result.iter_shifts() if s.is_reserve))
+    return {r: np.array(v) for r, v in need.items()}
+
+
+def test_routes_share_reserve_within_day(depot_dir):
+    model = AbsenceModel(probability=0.3, mean_duration=5)
+    summary = run_montecarlo(MONTH, YEAR, runs=1, model=model, seed=SEED,
+                             data_folder=str(depot_dir), max_workers=1)
+
+    need = replay(model, 0)
+    depot = sum(need.values())
+    assert depot.max() > 0
+    assert list(summary["routes"]) == list(need)
+    for route, values in need.items():
+        assert summary["routes"][route]["reserve_needed_p95"] == values.max()
+    assert summary["depot"]["reserve_needed_p95"] == depot.max()
+    assert summary["depot"]["reserve_per_day"]["mean"] == round(float(depot.mean()), 3)
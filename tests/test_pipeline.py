@@ -0,0 +1,51 @@
+# tests/test_pipeline.py
+"""
+Инкрементальный ETL (src/pipeline.py): этап перезапускается, если входы
+изменились, в том числе пока этап работал.
+
+Запуск: python -m pytest tests
+"""
+from src.pipeline import Stage, run_pipeline
+
+
+def copy_stage(after=None):
+    def run(data_dir):
+        (data_dir / "out.txt").write_text((data_dir / "in.txt").read_text(encoding="utf-8"), encoding="utf-8")
+        if after:
+            after(data_dir)
+        return ""
+    return Stage("copy", inputs=["in.txt"], outputs=["out.txt"], func=run)
+
+
+def test_unchanged_stage_is_skipped(tmp_path):
+    (tmp_path / "in.txt").write_text("1", encoding="utf-8")
+    stages = [copy_stage()]
+    assert run_pipeline(stages, data_dir=tmp_path) == {"copy": "ok"}
+    assert run_pipeline(stages, data_dir=tmp_path) == {"copy": "актуален"}
+
+    (tmp_path / "in.txt").write_text("2", encoding="utf-8")
+    assert run_pipeline(stages, data_dir=tmp_path) == {"copy": "ok"}
+
+
+def test_input_changed_while_running_reruns_stage(tmp_path):
+    (tmp_path / "in.txt").write_text("1", encoding="utf-8")
+    edited = copy_stage(after=lambda d: (d / "in.txt").write_text("правка во время этапа", encoding="utf-8"))
+
+    assert run_pipeline([edited], data_dir=tmp_path) == {"copy": "ok"}
+    assert run_pipeline([copy_stage()], data_dir=tmp_path) == {"copy": "ok"}
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8") == "правка во время этапа"
+    assert run_pipeline([copy_stage()], data_dir=tmp_path) == {"copy": "актуален"}
+
+
+def test_stage_rewriting_its_input_stays_current(tmp_path):
+    # Как sync_drivers: assignments.json — и вход, и выход этапа
+    (tmp_path / "a.json").write_text("[]", encoding="utf-8")
+
+    def append(data_dir):
+        path = data_dir / "a.json"
+        path.write_text(path.read_text(encoding="utf-8") + " ", encoding="utf-8")
+        return ""
+
+    stages = [Stage("sync", inputs=["a.json"], outputs=["a.json"], func=append)]
+    assert run_pipeline(stages, data_dir=tmp_path) == {"sync": "ok"}
+    assert run_pipeline(stages, data_dir=tmp_path) == {"sync": "актуален"}
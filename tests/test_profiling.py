@@ -0,0 +1,59 @@
+# tests/test_profiling.py
+"""
+Профилирование (src/profiling.py): доли сэмплов по этапам сходятся
+с временем этапов из METRICS.span.
+
+Запуск: python -m pytest tests
+"""
+import signal
+import sys
+import threading
+import time
+
+from src.metrics import METRICS
+from src.profiling import Profiler
+
+STAGES = {"test.long": 0.6, "test.short": 0.2}  # с процессорного времени
+
+
+def burn(seconds: float):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        sum(i * i for i in range(200))
+
+
+def profile_stages(tmp_path) -> Profiler:
+    profiler = Profiler("test", output_dir=str(tmp_path), interval=0.002)
+    profiler.start()
+    try:
+        for stage, seconds in STAGES.items():
+            with METRICS.span(stage):
+                burn(seconds)
+    finally:
+        profiler.stop()
+    return profiler
+
+
+def test_stage_shares_match_span_timings(tmp_path):
+    profiler = profile_stages(tmp_path)
+
+    assert profiler.sampler == ("itimer" if hasattr(signal, "setitimer") else "thread")
+    assert profiler.total_samples > 100
+    share = profiler.stage_share()
+    total = sum(profiler.stage_stats[s][1] for s in STAGES)
+    for stage in STAGES:
+        assert abs(share[stage] - profiler.stage_stats[stage][1] / total) < 0.1, (stage, share)
+
+
+def test_thread_sampler_restores_switch_interval(tmp_path):
+    switch = sys.getswitchinterval()
+    result = {}
+    worker = threading.Thread(target=lambda: result.setdefault("profiler", profile_stages(tmp_path)))
+    worker.start()
+    worker.join()
+
+    profiler = result["profiler"]
+    assert profiler.sampler == "thread"
+    assert sys.getswitchinterval() == switch
+    share = profiler.stage_share()
+    assert share["test.long"] > share["test.short"]
@@ -0,0 +1,143 @@
+# tests/test_run_diff.py
+"""
+Сравнение прогонов (src/run_diff.py): потоковое чтение JSON/JSONL
+и merge-join двух прогонов по дате.
+
+Запуск: python -m pytest tests
+"""
+import json
+from collections import Counter
+
+import pytest
+
+from src.models import DayRoster, TramRoster
+from src.run_diff import diff_runs, diff_summary, iter_json_object, iter_run
+
+
+def day(route: str, trams: dict, error: str = None) -> DayRoster:
+    """trams: {вагон: (водитель утром, водитель вечером)}; "123р" — из резерва, None — пусто."""
+    if error:
+        return DayRoster.failed(error, route=route)
+    result = DayRoster(route=route)
+    for number, drivers in trams.items():
+        tram = TramRoster(number)
+        for slot, driver in zip(tram.shifts, drivers):
+            if driver is not None:
+                text = str(driver)
+                slot.assign(int(text.rstrip("р")), "reserve" if text.endswith("р") else "main")
+        result.trams.append(tram)
+    return result
+
+
+def write_jsonl(path, records):
+    """records: [(дата, маршрут, DayRoster)] → results.jsonl непрерывного моделирования."""
+    with open(path, "w", encoding="utf-8") as f:
+        for date, route, result in records:
+            f.write(json.dumps({"date": date, "route": route, "result": result.to_dict()},
+                               ensure_ascii=False) + "\n")
+    return path
+
+
+def write_simulation(folder, route: str, days: dict):
+    """days: {день: DayRoster} → simulation_<маршрут>_Январь_2026.json."""
+    path = folder / f"simulation_{route}_Январь_2026.json"
+    path.write_text(json.dumps({str(d): r.to_dict() for d, r in days.items()}, ensure_ascii=False, indent=2),
+                    encoding="utf-8")
+    return path
+
+
+def kinds(old, new) -> Counter:
+    return Counter(change["kind"] for change in diff_runs(old, new))
+
+
+def test_same_run_has_no_changes(tmp_path):
+    records = [("2026-01-01", "47", day("47", {"1": (10, 11)})), ("2026-01-02", "47", day("47", {"1": (12, None)}))]
+    run = write_jsonl(tmp_path / "run.jsonl", records)
+    assert list(diff_runs(run, run)) == []
+
+
+def test_shift_level_changes(tmp_path):
+    old = write_jsonl(tmp_path / "old.jsonl", [("2026-01-01", "47", day("47", {
+        "1": (10, 11), "2": (12, None), "3": (13, 14), "4": (15, 16),
+    }))])
+    new_day = day("47", {"1": (10, "20р"), "2": (12, 21), "3": (None, 14), "5": (17, 18)})
+    new_day.trams[0].shift_1.warnings = ("Недоотдых: 10.0ч вместо 16.0ч",)
+    new = write_jsonl(tmp_path / "new.jsonl", [("2026-01-01", "47", new_day)])
+
+    changes = {(c["tram"], c["shift"]): c for c in diff_runs(old, new)}
+    assert changes[("1", 1)]["kind"] == "warnings_changed"
+    assert changes[("1", 2)] == {"date": "2026-01-01", "route": "47", "tram": "1", "shift": 2,
+                                 "kind": "driver_changed", "old": "11", "new": "20 (Рез)"}
+    assert changes[("2", 2)]["kind"] == "newly_filled"
+    assert changes[("3", 1)]["kind"] == "newly_unfilled"
+    assert {changes[("4", s)]["kind"] for s in (1, 2)} == {"tram_removed"}
+    assert {changes[("5", s)]["kind"] for s in (1, 2)} == {"tram_added"}
+    assert len(changes) == 8
+
+
+def test_merge_join_by_date(tmp_path):
+    a = day("47", {"1": (10, 11)})
+    old = write_jsonl(tmp_path / "old.jsonl", [
+        ("2026-01-01", "47", a), ("2026-01-02", "47", a), ("2026-01-04", "47", a), ("2026-01-04", "9", a),
+    ])
+    new = write_jsonl(tmp_path / "new.jsonl", [
+        ("2026-01-02", "47", a), ("2026-01-03", "47", a), ("2026-01-04", "47", a),
+    ])
+
+    changes = [(c["date"], c["route"], c["kind"]) for c in diff_runs(old, new)]
+    assert changes == [
+        ("2026-01-01", "47", "route_removed"),
+        ("2026-01-03", "47", "route_added"),
+        ("2026-01-04", "9", "route_removed"),
+    ]
+
+
+def test_error_days(tmp_path):
+    old = write_jsonl(tmp_path / "old.jsonl", [("2026-01-01", "47", day("47", {}, error="Нет расписания (рабочий)"))])
+    same = write_jsonl(tmp_path / "same.jsonl", [("2026-01-01", "47", day("47", {}, error="Нет расписания (рабочий)"))])
+    fixed = write_jsonl(tmp_path / "fixed.jsonl", [("2026-01-01", "47", day("47", {"1": (10, 11)}))])
+    assert kinds(old, same) == Counter()
+    assert kinds(old, fixed) == Counter({"error_changed": 1})
+
+
+def test_simulation_files_match_jsonl(tmp_path):
+    days = {1: day("47", {"1": (10, 11)}), 2: day("47", {"1": (12, "13р")}), 10: day("47", {"2": (None, 14)})}
+    folder = tmp_path / "sims"
+    folder.mkdir()
+    write_simulation(folder, "47", days)
+    write_simulation(folder, "9", {1: day("9", {"1": (30, 31)})})
+    jsonl = write_jsonl(tmp_path / "run.jsonl", [
+        ("2026-01-01", "47", days[1]), ("2026-01-01", "9", day("9", {"1": (30, 31)})),
+        ("2026-01-02", "47", days[2]), ("2026-01-10", "47", days[10]),
+    ])
+
+    assert [(d, r) for d, r, _ in iter_run(folder)] == [("2026-01-01", "47"), ("2026-01-01", "9"),
+                                                         ("2026-01-02", "47"), ("2026-01-10", "47")]
+    assert list(diff_runs(folder, jsonl)) == []
+
+
+def test_dates_out_of_order_are_rejected(tmp_path):
+    a = day("47", {"1": (10, 11)})
+    run = write_jsonl(tmp_path / "run.jsonl", [("2026-01-02", "47", a), ("2026-01-01", "47", a)])
+    with pytest.raises(ValueError, match="не по порядку"):
+        list(diff_runs(run, run))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64])
+def test_iter_json_object_small_chunks(tmp_path, chunk_size):
+    data = {"1": {"a": [1, 2.5, "x"]}, "2": 12345678901234, "3": "строка", "10": None, "11": -0.5}
+    path = tmp_path / "obj.json"
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+    assert dict(iter_json_object(path, chunk_size=chunk_size)) == data
+
+
+def test_diff_summary_writes_all_changes(tmp_path):
+    old = write_jsonl(tmp_path / "old.jsonl", [("2026-01-01", "47", day("47", {"1": (10, 11), "2": (12, 13)}))])
+    new = write_jsonl(tmp_path / "new.jsonl", [("2026-01-01", "47", day("47", {"1": (20, 11), "2": (12, None)}))])
+    output = tmp_path / "out" / "changes.jsonl"
+
+    counts, shown = diff_summary(old, new, output=str(output), limit=1)
+
+    assert counts == Counter({"driver_changed": 1, "newly_unfilled": 1})
+    assert len(shown) == 1
+    assert len(output.read_text(encoding="utf-8").splitlines()) == 2
@@ -0,0 +1,115 @@
+# tests/test_scenarios.py
+"""
+Сценарии "что если" (src/scenarios.py): правки табеля, закреплений и расписания
+поверх базы без ее изменения.
+
+Запуск: python -m pytest tests
+"""
+import pytest
+
+from src.scenarios import ABSENT, DriverOverlay, Scenario, compare_scenarios
+from src.scheduler import WorkforceAnalyzer
+from tests.conftest import MONTH, ROUTE, YEAR
+
+DAY = 5
+
+
+def working_driver(db, shift: str = "1"):
+    """Водитель маршрута, который по табелю работает в DAY."""
+    return next(d for d in db.drivers if d.month == MONTH and str(d.assigned_route_number) == ROUTE
+                and d.get_status_for_day(DAY) == shift)
+
+
+def roster(db, day: int = DAY):
+    return WorkforceAnalyzer(db).generate_daily_roster(ROUTE, day, MONTH, YEAR)
+
+
+def test_empty_scenario_is_the_base(db):
+    scenario = Scenario(db, "без правок")
+    assert scenario.drivers is db.drivers
+    assert scenario.schedules is db.schedules
+    assert roster(scenario).to_dict() == roster(db).to_dict()
+
+
+def test_absent_driver_leaves_roster(db):
+    driver = working_driver(db)
+    base_before = [d.get_status_for_day(DAY) for d in db.drivers]
+
+    scenario = Scenario(db, "болеет").absent(driver.id, MONTH, from_day=DAY, to_day=DAY + 2)
+
+    overlay = next(d for d in scenario.drivers if d.id == driver.id and d.month == MONTH)
+    assert isinstance(overlay, DriverOverlay)
+    assert [overlay.get_status_for_day(d) for d in (DAY - 1, DAY, DAY + 2, DAY + 3)] == [
+        driver.get_status_for_day(DAY - 1), ABSENT, ABSENT, driver.get_status_for_day(DAY + 3)]
+    assigned = {s.driver_id for _, s in roster(scenario).iter_shifts()}
+    assert driver.id not in assigned
+    # База не изменилась
+    assert [d.get_status_for_day(DAY) for d in db.drivers] == base_before
+    assert all(type(d) is not DriverOverlay for d in db.drivers)
+
+
+@pytest.mark.parametrize("year", [None, YEAR, 2028])
+def test_absent_to_end_of_month_stops_at_last_day(db, year):
+    driver = next(d for d in db.drivers if d.month == "Февраль")
+    scenario = Scenario(db).absent(driver.id, "Февраль", from_day=20, year=year)
+
+    last = 29 if year == 2028 else 28
+    assert max(scenario._cells[(driver.id, "Февраль", year)]) == last
+    if year is None:
+        overlay = next(d for d in scenario.drivers if d.id == driver.id and d.month == "Февраль")
+        assert [day for day, _ in overlay.iter_days()][-1] == last
+
+
+def test_untouched_drivers_are_shared(db):
+    driver = working_driver(db)
+    scenario = Scenario(db, "одна правка").set_cell(driver.id, MONTH, DAY, "В")
+    for base, own in zip(db.drivers, scenario.drivers):
+        if base.id != driver.id:
+            assert own is base
+
+
+def test_assign_moves_driver_to_route(db):
+    driver = next(d for d in db.drivers if d.month == MONTH and str(d.assigned_route_number) not in (ROUTE, "ANY"))
+    scenario = Scenario(db, "перевод").assign(driver.id, ROUTE, month=MONTH)
+
+    moved = [d for d in scenario.drivers if d.id == driver.id]
+    assert {str(d.assigned_route_number) for d in moved if d.month == MONTH} == {ROUTE}
+    assert all(str(d.assigned_route_number) != ROUTE for d in moved if d.month != MONTH)
+    assert str(driver.assigned_route_number) != ROUTE
+    assert len(scenario.assignments) == len(db.assignments) + 1
+
+
+def test_add_and_remove_trams(db):
+    base_trams = len(roster(db).trams)
+    day_type = roster(db).day_type
+
+    more = Scenario(db, "+2").add_trams(ROUTE, day_type, 2)
+    fewer = more.fork("+2-3").remove_trams(ROUTE, day_type, 3)
+
+    assert len(roster(more).trams) == base_trams + 2
+    assert len(roster(fewer).trams) == base_trams - 1
+    assert [t.tram_number for t in roster(more).trams][-2:] == [str(base_trams + 1), str(base_trams + 2)]
+    # fork копирует правки: исходный сценарий не изменился
+    assert len(roster(more).trams) == base_trams + 2
+    assert len(db.schedules) == len(more.schedules) == len(fewer.schedules)
+
+
+def test_unknown_month_is_rejected(db):
+    with pytest.raises(ValueError, match="Неизвестный месяц"):
+        Scenario(db).set_cell(1, "Мартобрь", 1, "1")
+
+
+def test_compare_scenarios(db):
+    days = [DAY, DAY + 1]
+    base = Scenario(db, "база")
+    no_trams = Scenario(db, "без вагонов")
+    for day_type in ("рабочий", "выходной"):
+        no_trams.remove_trams(ROUTE, day_type, 100)
+
+    summary = compare_scenarios([base, no_trams], ROUTE, MONTH, YEAR, days=days)
+
+    analyzer = WorkforceAnalyzer(db)
+    results = [analyzer.generate_daily_roster(ROUTE, d, MONTH, YEAR) for d in days]
+    assert summary["база"] == {"unfilled": sum(r.unfilled_count() for r in results),
+                               "warnings": sum(r.warnings_count() for r in results), "errors": 0}
+    assert summary["без вагонов"] == {"unfilled": 0, "warnings": 0, "errors": 0}
@@ -0,0 +1,114 @@
+# tests/test_snapshots.py
+"""
+Версии данных (src/snapshots.py): снимок не меняется при перезагрузке,
+перечитываются и проверяются только изменившиеся файлы.
+
+Запуск: python -m pytest tests
+"""
+import json
+import threading
+
+import pytest
+
+from src import snapshots
+from src.db.assignment_registry import AssignmentRegistry
+from src.scheduler import WorkforceAnalyzer
+from src.snapshots import SnapshotStore
+from tests.conftest import MONTH, ROUTE, YEAR
+
+DAY = 5
+
+
+def roster(db):
+    return WorkforceAnalyzer(db).generate_daily_roster(ROUTE, DAY, MONTH, YEAR).to_dict()
+
+
+def move_route_drivers(data_dir, route: str = "ANY"):
+    """Переводит всех водителей маршрута ROUTE в другой маршрут через журнал реестра."""
+    registry = AssignmentRegistry(data_dir / "assignments.json").load()
+    moved = [r["driver_id"] for r in registry.records() if r["route_number"] == ROUTE]
+    for driver_id in moved:
+        registry.upsert(driver_id, route)
+    return moved
+
+
+def test_snapshot_keeps_version_during_reload(data_dir, monkeypatch):
+    store = SnapshotStore(str(data_dir))
+    old = store.current
+    expected = roster(old)
+
+    # Перезагрузка останавливается посреди чтения табеля, пока читатель считает наряд
+    reading, resume = threading.Event(), threading.Event()
+    read_drivers_json = snapshots.read_drivers_json
+
+    def slow_read(path):
+        reading.set()
+        assert resume.wait(5)
+        return read_drivers_json(path)
+
+    monkeypatch.setattr(snapshots, "read_drivers_json", slow_read)
+    moved = move_route_drivers(data_dir)
+    month_file = sorted((data_dir / "drivers_json").glob("*.json"))[0]
+    month_file.write_text(month_file.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+
+    reloader = threading.Thread(target=store.reload)
+    reloader.start()
+    try:
+        assert reading.wait(5)
+        during = store.current
+        assert during is old and during.version == 1
+        assert roster(during) == expected
+    finally:
+        resume.set()
+        reloader.join(5)
+
+    new = store.current
+    assert new.version == 2 and old.version == 1
+    assert roster(old) == expected
+    assert roster(new) != expected
+    assert {old.registry.resolve(d) for d in moved} == {ROUTE}
+    assert {new.registry.resolve(d) for d in moved} == {"ANY"}
+    assert all(str(d.assigned_route_number) == ROUTE for d in old.drivers if d.id in set(moved))
+
+
+def test_snapshot_registry_is_read_only_and_own(data_dir):
+    store = SnapshotStore(str(data_dir))
+    first = store.current
+    second = store.reload(force=True)
+
+    assert first.registry is not second.registry
+    with pytest.raises(TypeError):
+        first.registry.upsert(1, "9")
+    with pytest.raises(TypeError):
+        first.registry.load()
+    with pytest.raises(AttributeError):
+        first.registry = None
+    assert not (data_dir / "assignments.journal.jsonl").exists()
+
+
+def test_only_changed_files_are_reread_and_validated(data_dir, monkeypatch):
+    from src import validation
+
+    store = SnapshotStore(str(data_dir), validate=True)
+    store.current
+
+    checked = []
+    validate_drivers_data = validation.validate_drivers_data
+    monkeypatch.setattr(validation, "validate_drivers_data",
+                        lambda name, data, report: checked.append(name) or validate_drivers_data(name, data, report))
+    monkeypatch.setattr(validation, "validate_schedule",
+                        lambda path, report: pytest.fail("расписание не менялось"))
+
+    month_file = sorted((data_dir / "drivers_json").glob("*.json"))[0]
+    data = json.loads(month_file.read_text(encoding="utf-8"))
+    data["drivers"][0]["days"][0]["value"] = "Х"
+    month_file.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    assert store.reload() is None               # ошибка проверки: новая версия не публикуется
+    assert store.version == 1
+    assert checked == [month_file.name]
+
+    data["drivers"][0]["days"][0]["value"] = "В"
+    month_file.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    assert store.reload().version == 2
+    assert checked == [month_file.name] * 2
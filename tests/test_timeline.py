@@ -0,0 +1,62 @@
+# tests/test_timeline.py
+"""
+Хронология водителя (src/timeline.py) и команда timeline.
+
+Запуск: python -m pytest tests
+"""
+import json
+from datetime import date
+
+import pytest
+
+from src.cli import main
+from src.models import DayRoster, TramRoster
+from src.timeline import TimelineIndex
+from tests.conftest import YEAR
+
+DRIVER = 1
+
+
+def write_run(path, days):
+    """days: [(день января, маршрут, вагон, смена)] для водителя DRIVER → results.jsonl."""
+    with open(path, "w", encoding="utf-8") as f:
+        for day, route, tram_number, shift in days:
+            result = DayRoster(route=route)
+            tram = TramRoster(tram_number)
+            tram.shifts[shift - 1].assign(DRIVER, "main")
+            result.trams.append(tram)
+            f.write(json.dumps({"date": date(YEAR, 1, day).isoformat(), "route": route,
+                                "result": result.to_dict()}, ensure_ascii=False) + "\n")
+    return path
+
+
+def shifts(index):
+    return [(d, s[:3]) for d, s in index.shifts_between(DRIVER, date(YEAR, 1, 1), date(YEAR, 1, 31))]
+
+
+def test_same_shift_from_overlapping_runs_is_kept_once(db, tmp_path):
+    first = write_run(tmp_path / "a.jsonl", [(1, "1", "1", 1), (2, "1", "1", 1), (3, "1", "1", 1)])
+    second = write_run(tmp_path / "b.jsonl", [(2, "1", "1", 1), (2, "2", "5", 2), (4, "1", "1", 1)])
+
+    index = TimelineIndex(db, run=first)
+    index.add_run(first)
+    index.add_run(second)
+
+    assert shifts(index) == [
+        (date(YEAR, 1, 1), ("1", "1", 1)),
+        (date(YEAR, 1, 2), ("1", "1", 1)),
+        (date(YEAR, 1, 2), ("2", "5", 2)),
+        (date(YEAR, 1, 3), ("1", "1", 1)),
+        (date(YEAR, 1, 4), ("1", "1", 1)),
+    ]
+    summary = index.summary(DRIVER, date(YEAR, 1, 1), date(YEAR, 1, 4))
+    assert summary["actual_shifts"] == 5
+    assert index.run_days == (date(YEAR, 1, 1).toordinal(), date(YEAR, 1, 4).toordinal())
+
+
+@pytest.mark.parametrize("option", ["--from", "--to"])
+def test_bad_date_is_reported_not_raised(depot_dir, capsys, option):
+    with pytest.raises(SystemExit) as exit_:
+        main(["--data", str(depot_dir), "timeline", str(DRIVER), option, f"{YEAR}-13-01"])
+    assert exit_.value.code == 1
+    assert "❌" in capsys.readouterr().out
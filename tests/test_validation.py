@@ -0,0 +1,157 @@
+# tests/test_validation.py
+"""
+Проверка исходных данных (src/validation.py): табели, расписание и закрепления.
+
+Запуск: python -m pytest tests
+"""
+import json
+
+import pytest
+
+from src.validation import validate_folder
+
+
+def load(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def january_file(data_dir):
+    return data_dir / "drivers_json" / "drivers_january.json"
+
+
+def messages(report, severity="error"):
+    return {(i["file"], i["message"]) for i in report.issues if i["severity"] == severity}
+
+
+def test_generated_depot_is_clean(depot_dir):
+    report = validate_folder(str(depot_dir))
+    assert report.ok
+    assert report.issues == []
+
+
+def test_tabel_errors_point_to_row_and_day(data_dir):
+    path = january_file(data_dir)
+    data = load(path)
+    drivers = data["drivers"]
+    drivers[0]["days"][2]["value"] = "Х"                   # недопустимый код
+    drivers[1]["days"][3]["day"] = 40                      # день вне месяца
+    drivers[2]["days"].append(dict(drivers[2]["days"][0]))  # повтор дня
+    drivers[3]["tab_number"] = "abc"
+    drivers[4]["tab_number"] = drivers[5]["tab_number"]
+    del drivers[6]["mode"]
+    del drivers[7]["days"][10]                             # пропущенный день — предупреждение
+    save(path, data)
+
+    report = validate_folder(str(data_dir))
+
+    assert not report.ok
+    by_message = {}
+    for issue in report.issues:
+        by_message.setdefault(issue["message"], []).append(issue)
+    bad_code, = by_message["Недопустимый код табеля"]
+    assert (bad_code["file"], bad_code["row"], bad_code["day"], bad_code["value"]) == (path.name, 0, 3, "Х")
+    assert by_message["День вне месяца (1–31)"][0]["row"] == 1
+    assert by_message["День повторяется у водителя"][0]["row"] == 2
+    assert by_message["Таб.№ не число"][0]["row"] == 3
+    assert sorted(i["row"] for i in by_message["Таб.№ повторяется в файле"]) == [4, 5]
+    assert by_message["Не заполнено поле mode"][0]["row"] == 6
+    missing = [i for i in by_message["Не все дни месяца в табеле (будут 'Unknown')"] if i["row"] == 7]
+    assert missing and missing[0]["severity"] == "warning"
+
+
+def test_empty_string_cell_is_empty(data_dir):
+    path = january_file(data_dir)
+    data = load(path)
+    data["drivers"][0]["days"][4]["value"] = ""    # parse_whole_sheet: пустая ячейка Excel
+    save(path, data)
+
+    report = validate_folder(str(data_dir))
+    assert messages(report) == {(path.name, "Пустое значение дня")}
+
+
+def test_schedule_errors(data_dir):
+    path = data_dir / "schedule.json"
+    schedules = load(path)
+    schedules[0]["трамваи"][1]["номер"] = schedules[0]["трамваи"][0]["номер"]
+    schedules[0]["трамваи"][2]["смена_1"]["отправление"] = "25:00"
+    schedules[1]["день"] = "праздничный"
+    schedules.append(dict(schedules[2]))
+    save(path, schedules)
+
+    report = validate_folder(str(data_dir))
+    assert messages(report) == {("schedule.json", "Номер вагона повторяется"),
+                                ("schedule.json", "Время не в формате ЧЧ:ММ (вагон 3)"),
+                                ("schedule.json", "Неизвестный тип дня")}
+    repeat, = [i for i in report.warnings if i["message"].startswith("Повтор маршрута и типа дня")]
+    assert repeat["row"] == len(schedules) - 1
+
+
+def test_assignment_errors_include_journal(data_dir):
+    save(data_dir / "assignments.json", [
+        {"driver_id": 1, "route_number": "1"},
+        {"driver_id": 99999, "route_number": "1"},
+        {"driver_id": 2, "route_number": "1", "month": "Мартобрь"},
+    ])
+    (data_dir / "assignments.journal.jsonl").write_text(
+        json.dumps({"op": "upsert", "driver_id": 3, "route_number": "777"}) + "\n", encoding="utf-8")
+
+    report = validate_folder(str(data_dir))
+
+    rows = {(i["message"], i["value"]) for i in report.issues}
+    assert any(value == 99999 for _, value in rows)
+    assert ("Неизвестный месяц закрепления", "Мартобрь") in rows
+    assert ("Маршрута нет в расписании", "777") in rows
+
+
+def test_missing_files(tmp_path):
+    report = validate_folder(str(tmp_path))
+    assert messages(report) >= {("drivers_json", "Папка табелей не найдена"), ("schedule.json", "Файл не найден")}
+
+
+def test_broken_json_is_reported_not_raised(data_dir):
+    january_file(data_dir).write_text('{"month": "Январь", "drivers": [', encoding="utf-8")
+    report = validate_folder(str(data_dir))
+    assert not report.ok
+    assert any(i["file"] == january_file(data_dir).name for i in report.errors)
+
+
+@pytest.mark.parametrize("strict", [False, True])
+def test_loader_validation_modes(data_dir, strict):
+    from src.database import DataLoader
+
+    path = january_file(data_dir)
+    data = load(path)
+    data["drivers"][0]["days"][0]["value"] = "Х"
+    save(path, data)
+
+    loader = DataLoader(str(data_dir))
+    if strict:
+        with pytest.raises(ValueError):
+            loader.load_all(validate="strict")
+    else:
+        loader.load_all(validate=True)
+        assert not loader.validation.ok
+        assert loader.drivers
+
+
+def test_loader_reads_each_tabel_once(data_dir, monkeypatch):
+    from src import database, validation
+    from src.database import DataLoader
+
+    reads = []
+    read_drivers_json = database.read_drivers_json
+    monkeypatch.setattr(database, "read_drivers_json", lambda path: reads.append(path) or read_drivers_json(path))
+    load_json = validation._load_json
+    monkeypatch.setattr(validation, "_load_json",
+                        lambda path, report: pytest.fail(f"{path} прочитан повторно")
+                        if path.parent.name == "drivers_json" else load_json(path, report))
+
+    loader = DataLoader(str(data_dir))
+    loader.load_all(validate=True)
+
+    assert loader.validation.ok and loader.drivers
+    assert len(reads) == len(list((data_dir / "drivers_json").glob("*.json")))